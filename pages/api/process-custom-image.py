@@ -8,50 +8,18 @@ import sys
 import json
 import os
 import requests
-from PIL import Image, ImageDraw, ImageFont
-from io import BytesIO
+from PIL import Image, ImageDraw
 import base64
 
-def load_font_prefer_helvetica(size: int, condensed: bool = False):
-    """Load font preferring Helvetica Neue"""
-    candidates = [
-        # macOS fonts
-        ("/System/Library/Fonts/HelveticaNeue.ttc", [0, 1, 2, 3, 4, 5, 6, 7, 8]),
-        ("/System/Library/Fonts/Helvetica.ttc", [0, 1, 2, 3, 4, 5]),
-        ("/Library/Fonts/HelveticaNeue.ttc", [0, 1, 2, 3, 4, 5, 6]),
-        ("/System/Library/Fonts/Supplemental/HelveticaNeue.ttc", [0, 1, 2, 3, 4, 5, 6]),
-        # Windows fonts
-        ("C:/Windows/Fonts/arialbd.ttf", [0]),
-        ("C:/Windows/Fonts/arial.ttf", [0]),
-        ("C:/Windows/Fonts/calibrib.ttf", [0]),
-        ("C:/Windows/Fonts/calibri.ttf", [0]),
-        ("C:/Windows/Fonts/segoeuib.ttf", [0]),
-        ("C:/Windows/Fonts/segoeui.ttf", [0]),
-        # Linux fonts
-        ("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", [0]),
-        ("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", [0]),
-        ("/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf", [0]),
-        ("/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf", [0]),
-        ("/usr/share/fonts/truetype/noto/NotoSans-Bold.ttf", [0]),
-        ("/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf", [0]),
-        ("Arial.ttf", [0])
-    ]
-    index_order = [2, 3, 1, 4, 5, 0]
-    for path, idxs in candidates:
-        if os.path.exists(path):
-            for idx in index_order:
-                if idx in idxs:
-                    try:
-                        return ImageFont.truetype(path, size=size, index=idx)
-                    except Exception:
-                        continue
-            try:
-                return ImageFont.truetype(path, size=size)
-            except Exception:
-                continue
-    return ImageFont.load_default()
+# Shared output encoders live with the weekly automation
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'spotify_api'))
+from brand_fonts import load_font_prefer_helvetica
+from image_compositing import COVER_DIM_ALPHA, dim_and_composite
+from image_encoding import encode_to_bytes, get_encoder
+from image_loading import load_image
 
-def process_custom_image(image_url: str, track_name: str = "Custom Image", artist_name: str = "Custom") -> bytes:
+def process_custom_image(image_url: str, track_name: str = "Custom Image", artist_name: str = "Custom",
+                         image_format: str = 'png') -> bytes:
     """
     Process a custom image by adding branding overlay
     
@@ -59,6 +27,7 @@ def process_custom_image(image_url: str, track_name: str = "Custom Image", artis
         image_url: URL of the image to process
         track_name: Track name for bottom-left text
         artist_name: Artist name for top text
+        image_format: Output encoder ('png', 'jpeg' or 'webp')
         
     Returns:
         Processed image as bytes
@@ -67,16 +36,9 @@ def process_custom_image(image_url: str, track_name: str = "Custom Image", artis
     response = requests.get(image_url)
     response.raise_for_status()
     
-    # Open image
-    artist_image = Image.open(BytesIO(response.content))
-    
-    # Convert to RGB if needed
-    if artist_image.mode != 'RGB':
-        artist_image = artist_image.convert('RGB')
-    
-    # Resize to Instagram-friendly dimensions (1080x1080)
+    # Decode at Instagram-friendly dimensions (1080x1080); oversized uploads are rejected
     target_size = (1080, 1080)
-    artist_image = artist_image.resize(target_size, Image.Resampling.LANCZOS)
+    artist_image = load_image(response.content, target_size)
     
     # Create overlay with branding
     overlay = Image.new('RGBA', target_size, (0, 0, 0, 0))
@@ -243,16 +205,10 @@ def process_custom_image(image_url: str, track_name: str = "Custom Image", artis
         y += h + 16
     
     # Composite overlays
-    artist_image = artist_image.convert('RGBA')
-    black_overlay = Image.new('RGBA', target_size, (0, 0, 0, 60))
-    artist_image = Image.alpha_composite(artist_image, black_overlay)
-    final_image = Image.alpha_composite(artist_image, overlay)
-    final_image = final_image.convert('RGB')
+    final_image = dim_and_composite(artist_image, overlay, COVER_DIM_ALPHA)
     
-    # Save to bytes
-    output = BytesIO()
-    final_image.save(output, format='PNG', quality=95)
-    return output.getvalue()
+    # Encode to bytes
+    return encode_to_bytes(final_image, image_format)
 
 if __name__ == '__main__':
     # Read JSON from stdin
@@ -261,13 +217,16 @@ if __name__ == '__main__':
     image_url = input_data.get('imageUrl')
     track_name = input_data.get('trackName', 'Custom Image')
     artist_name = input_data.get('artistName', 'Custom')
+    # PNG by default so existing callers keep getting the bytes they upload as image/png
+    image_format = input_data.get('format', 'png')
     
     try:
-        processed_image = process_custom_image(image_url, track_name, artist_name)
+        processed_image = process_custom_image(image_url, track_name, artist_name, image_format)
         # Output base64 encoded image
         result = {
             'success': True,
-            'image': base64.b64encode(processed_image).decode('utf-8')
+            'image': base64.b64encode(processed_image).decode('utf-8'),
+            'contentType': get_encoder(image_format).content_type
         }
         print(json.dumps(result))
     except Exception as e:
@@ -8,7 +8,6 @@ import sys
 import json
 import os
 import tempfile
-from io import BytesIO
 
 # Try to import required libraries
 try:
@@ -18,13 +17,20 @@ except ImportError:
     sys.exit(1)
 
 try:
-    from PIL import Image, ImageDraw, ImageFont
+    from PIL import Image, ImageDraw
 except ImportError:
     print(json.dumps({'success': False, 'error': 'PIL/Pillow library not installed. Run: pip install Pillow'}))
     sys.exit(1)
 
-def process_image_with_overlay(image_url, track_name, artist_name):
-    """Process image URL with branding overlay"""
+# Shared output encoders live with the weekly automation
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'spotify_api'))
+from brand_fonts import load_font_prefer_helvetica
+from image_compositing import COVER_DIM_ALPHA, dim_and_composite
+from image_encoding import encode_to_bytes, get_encoder
+from image_loading import load_image
+
+def process_image_with_overlay(image_url, track_name, artist_name, image_format='png'):
+    """Process image URL with branding overlay, encoded with the named output format"""
     try:
         # Download image
         response = requests.get(image_url, timeout=30)
@@ -44,11 +50,8 @@ def process_image_with_overlay(image_url, track_name, artist_name):
             }
             
             
-            # Open and resize image
-            img = Image.open(tmp_path)
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            img = img.resize((1080, 1080), Image.Resampling.LANCZOS)
+            # Open and resize image (decoded near 1080px; oversized uploads are rejected)
+            img = load_image(tmp_path, (1080, 1080))
             
             # Create overlay using the same logic as create_single_artist_image
             # This is a simplified version - you may want to copy the full logic
@@ -61,45 +64,6 @@ def process_image_with_overlay(image_url, track_name, artist_name):
             brand_red = (226, 62, 54, 255)
             light_gray = (210, 210, 210, 255)
             
-            # Load font function (same as main.py)
-            def load_font_prefer_helvetica(size: int, condensed: bool = False):
-                candidates = [
-                    # macOS fonts
-                    ("/System/Library/Fonts/HelveticaNeue.ttc", [0, 1, 2, 3, 4, 5, 6, 7, 8]),
-                    ("/System/Library/Fonts/Helvetica.ttc", [0, 1, 2, 3, 4, 5]),
-                    ("/Library/Fonts/HelveticaNeue.ttc", [0, 1, 2, 3, 4, 5, 6]),
-                    ("/System/Library/Fonts/Supplemental/HelveticaNeue.ttc", [0, 1, 2, 3, 4, 5, 6]),
-                    # Windows fonts
-                    ("C:/Windows/Fonts/arialbd.ttf", [0]),
-                    ("C:/Windows/Fonts/arial.ttf", [0]),
-                    ("C:/Windows/Fonts/calibrib.ttf", [0]),
-                    ("C:/Windows/Fonts/calibri.ttf", [0]),
-                    ("C:/Windows/Fonts/segoeuib.ttf", [0]),
-                    ("C:/Windows/Fonts/segoeui.ttf", [0]),
-                    # Linux fonts
-                    ("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", [0]),
-                    ("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", [0]),
-                    ("/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf", [0]),
-                    ("/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf", [0]),
-                    ("/usr/share/fonts/truetype/noto/NotoSans-Bold.ttf", [0]),
-                    ("/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf", [0]),
-                    ("Arial.ttf", [0])
-                ]
-                index_order = [2, 3, 1, 4, 5, 0]
-                for path, idxs in candidates:
-                    if os.path.exists(path):
-                        for idx in index_order:
-                            if idx in idxs:
-                                try:
-                                    return ImageFont.truetype(path, size=size, index=idx)
-                                except Exception:
-                                    continue
-                        try:
-                            return ImageFont.truetype(path, size=size)
-                        except Exception:
-                            continue
-                return ImageFont.load_default()
-            
             size_multiplier = 1.0
             
             # White border
@@ -182,16 +146,10 @@ def process_image_with_overlay(image_url, track_name, artist_name):
                 y += h + 16
             
             # Composite
-            img = img.convert('RGBA')
-            black_overlay = Image.new('RGBA', (1080, 1080), (0, 0, 0, 60))
-            img = Image.alpha_composite(img, black_overlay)
-            final_img = Image.alpha_composite(img, overlay)
-            final_img = final_img.convert('RGB')
+            final_img = dim_and_composite(img, overlay, COVER_DIM_ALPHA)
             
             # Convert to bytes
-            output = BytesIO()
-            final_img.save(output, format='PNG', quality=95)
-            return output.getvalue()
+            return encode_to_bytes(final_img, image_format)
             
         finally:
             # Cleanup temp file
@@ -209,17 +167,19 @@ if __name__ == '__main__':
         image_url = input_data.get('imageUrl')
         track_name = input_data.get('trackName', 'Custom Image')
         artist_name = input_data.get('artistName', 'Custom')
+        image_format = input_data.get('format', 'png')
         
         if not image_url:
             print(json.dumps({'success': False, 'error': 'imageUrl is required'}))
             sys.exit(1)
         
-        processed_image = process_image_with_overlay(image_url, track_name, artist_name)
+        processed_image = process_image_with_overlay(image_url, track_name, artist_name, image_format)
         
         import base64
         result = {
             'success': True,
-            'image': base64.b64encode(processed_image).decode('utf-8')
+            'image': base64.b64encode(processed_image).decode('utf-8'),
+            'contentType': get_encoder(image_format).content_type
         }
         print(json.dumps(result))
         
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Manifest of the files the pipeline writes to the output directory
+Every save appends one line (kind, week, run, path, hash) to output/manifest.jsonl,
+so "latest track data", "artifacts of week X" and cleanup are index lookups
+instead of globbing the directory and comparing modification times
+
+Usage:
+    python artifact_manifest.py --rebuild          # index files written before the manifest existed
+    python artifact_manifest.py --week 2025-10-10  # list a week's artifacts
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = "manifest.jsonl"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Files in the output directory that are bookkeeping rather than artifacts
+UNTRACKED_FILES = {MANIFEST_FILENAME, "archive.db"}
+UNTRACKED_PREFIXES = ("run_state_", "fingerprints_", "caption_cache_")
+UNTRACKED_SUFFIXES = (".tmp", ".part", "-journal")
+
+_append_lock = threading.Lock()
+
+
+def parse_artifact_name(filename: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """
+    Kind, week and run of an output file from its name
+
+    Handles the naming schemes the pipeline uses, e.g. nmf_data_20251010_101500.json,
+    nmf_data_20251010_20251010_101500.json, 2025-10-10_tracklist_20251010_101500.png,
+    nmf_single_artist_20251010.png and carousel_2025-10-10_03_artist.png.
+
+    Args:
+        filename: File name (directories are ignored)
+
+    Returns:
+        (kind, week start as YYYY-MM-DD or None, run timestamp YYYYMMDD_HHMMSS or None)
+    """
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    tokens = stem.split('_')
+    kind_tokens, week, run = [], None, None
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        next_token = tokens[i + 1] if i + 1 < len(tokens) else ''
+        if re.fullmatch(r'\d{8}', token) and re.fullmatch(r'\d{6}', next_token):
+            run = f"{token}_{next_token}"
+            i += 2
+            continue
+        if re.fullmatch(r'\d{4}-\d{2}-\d{2}', token):
+            week = week or token
+        elif re.fullmatch(r'\d{8}', token):
+            week = week or f"{token[:4]}-{token[4:6]}-{token[6:]}"
+        elif not token.isdigit():
+            kind_tokens.append(token)
+        i += 1
+    return '_'.join(kind_tokens) or stem, week, run
+
+
+def is_artifact_name(filename: str) -> bool:
+    """Whether a file in the output directory is an artifact rather than bookkeeping or a partial write"""
+    return (filename not in UNTRACKED_FILES and not filename.startswith(UNTRACKED_PREFIXES)
+            and not filename.endswith(UNTRACKED_SUFFIXES))
+
+
+def file_sha256(path: str) -> str:
+    """Hex SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactManifest:
+    """Append-only index of an output directory's artifacts by kind, week and path"""
+
+    def __init__(self, output_dir: str, load: bool = True):
+        """
+        Initialize the manifest, loading the lines written so far
+
+        Args:
+            output_dir: Directory the artifacts (and manifest.jsonl) are in
+            load: Read the existing manifest; False only appends (what a save needs)
+        """
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, MANIFEST_FILENAME)
+        self._loaded = load
+        self._by_path: Dict[str, Dict] = {}
+        self._by_kind: Dict[str, List[str]] = {}
+        self._by_week: Dict[str, Dict[str, Dict]] = {}
+
+        if load and os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        self._apply(json.loads(line))
+                    except ValueError:
+                        logger.warning(f"⚠️ Skipping malformed manifest line {line_number} in {self.path}")
+
+    @property
+    def exists(self) -> bool:
+        """Whether the manifest file has been written"""
+        return os.path.exists(self.path)
+
+    def record(self, path: str, kind: Optional[str] = None, week_start: Optional[str] = None,
+               run: Optional[str] = None) -> Dict:
+        """
+        Append an artifact to the manifest
+
+        Args:
+            path: Path of the written file
+            kind: Artifact kind (default: parsed from the file name, e.g. 'nmf_data' or 'tracklist')
+            week_start: Week start (YYYY-MM-DD) the artifact belongs to (default: parsed from the file name)
+            run: Run timestamp (default: parsed from the file name)
+
+        Returns:
+            The manifest entry
+        """
+        parsed_kind, parsed_week, parsed_run = parse_artifact_name(path)
+        entry = {
+            'path': os.path.relpath(path, self.output_dir),
+            'kind': kind or parsed_kind,
+            'week_start': week_start or parsed_week,
+            'run': run or parsed_run,
+            'sha256': file_sha256(path),
+            'bytes': os.path.getsize(path),
+            'recorded_at': datetime.now().isoformat()
+        }
+        self._append(entry)
+        return entry
+
+    def remove(self, path: str) -> None:
+        """Record that an artifact was deleted"""
+        self._append({'path': os.path.relpath(path, self.output_dir), 'removed': True,
+                      'recorded_at': datetime.now().isoformat()})
+
+    def latest(self, kind: str, week_start: Optional[str] = None) -> Optional[Dict]:
+        """
+        Most recently recorded artifact of a kind that is still on disk
+
+        Files of the kind added since the manifest was last written are indexed
+        first, so a save that was not recorded is still found.
+
+        Args:
+            kind: Artifact kind, e.g. 'enhanced_data'
+            week_start: Only consider this week's artifacts
+
+        Returns:
+            The manifest entry (with 'path' resolved against the output directory), or None
+        """
+        self._index_unrecorded(kind)
+        for relative_path in reversed(self._by_kind.get(kind, [])):
+            entry = self._by_path[relative_path]
+            if week_start and entry['week_start'] != week_start:
+                continue
+            resolved = self._resolve(entry)
+            if os.path.exists(resolved['path']):
+                return resolved
+        return None
+
+    def for_week(self, week_start: str) -> List[Dict]:
+        """Artifacts recorded for a week, oldest first"""
+        return [self._resolve(entry) for entry in self._by_week.get(week_start, {}).values()]
+
+    def entries(self) -> List[Dict]:
+        """Every artifact in the manifest, oldest first"""
+        return [self._resolve(entry) for entry in self._by_path.values()]
+
+    def rebuild(self) -> int:
+        """
+        Record files in the output directory that the manifest does not know about
+
+        Files are recorded oldest first so latest() matches what a modification-time
+        scan would have picked.
+
+        Returns:
+            Number of files added
+        """
+        return self._record_unknown(os.listdir(self.output_dir))
+
+    def _record_unknown(self, names: List[str]) -> int:
+        names = [
+            name for name in names
+            if is_artifact_name(name) and name not in self._by_path
+            and os.path.isfile(os.path.join(self.output_dir, name))
+        ]
+        names.sort(key=lambda name: os.path.getmtime(os.path.join(self.output_dir, name)))
+        for name in names:
+            self.record(os.path.join(self.output_dir, name))
+        return len(names)
+
+    def _index_unrecorded(self, kind: str) -> None:
+        # Creating a file updates the directory's mtime while recording one only appends
+        # to the manifest, so an unchanged directory cannot hold unrecorded files. When
+        # it has changed (bookkeeping files are rewritten often), only the names are
+        # compared, and just the unrecorded files of this kind are stat'ed and hashed
+        if not self._loaded:
+            return
+        try:
+            directory_mtime = os.stat(self.output_dir).st_mtime_ns
+            if self.exists and directory_mtime < os.stat(self.path).st_mtime_ns:
+                return
+            names = os.listdir(self.output_dir)
+        except OSError:
+            return
+        self._record_unknown([
+            name for name in names
+            if name not in self._by_path and parse_artifact_name(name)[0] == kind
+        ])
+
+    def _resolve(self, entry: Dict) -> Dict:
+        return dict(entry, path=os.path.join(self.output_dir, entry['path']))
+
+    def _append(self, entry: Dict) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        with _append_lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._apply(entry)
+
+    def _apply(self, entry: Dict) -> None:
+        path = entry['path']
+        previous = self._by_path.pop(path, None)
+        if previous:
+            self._by_kind[previous['kind']].remove(path)
+            self._by_week.get(previous['week_start'], {}).pop(path, None)
+        if entry.get('removed'):
+            return
+        self._by_path[path] = entry
+        self._by_kind.setdefault(entry['kind'], []).append(path)
+        if entry['week_start']:
+            self._by_week.setdefault(entry['week_start'], {})[path] = entry
+
+
+def record_artifact(path: str, kind: Optional[str] = None, week_start: Optional[str] = None,
+                    run: Optional[str] = None) -> Optional[Dict]:
+    """
+    Record a file the pipeline just wrote in its directory's manifest
+
+    Failures are logged rather than raised so bookkeeping never fails a run.
+
+    Args:
+        path: Path of the written file
+        kind: Artifact kind (default: parsed from the file name)
+        week_start: Week start (YYYY-MM-DD) (default: parsed from the file name)
+        run: Run timestamp (default: parsed from the file name)
+
+    Returns:
+        The manifest entry, or None if it could not be recorded
+    """
+    try:
+        return ArtifactManifest(os.path.dirname(path) or '.', load=False).record(path, kind, week_start, run)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not record {path} in the artifact manifest: {e}")
+        return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Inspect or rebuild the output directory's artifact manifest")
+    parser.add_argument('--output-dir', default='output', help="Output directory (default: output)")
+    parser.add_argument('--rebuild', action='store_true', help="Record files the manifest does not know about")
+    parser.add_argument('--week', help="List the artifacts of a week (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    manifest = ArtifactManifest(args.output_dir)
+    if args.rebuild:
+        print(f"🗂️ Added {manifest.rebuild()} files to {manifest.path}")
+    if args.week:
+        for entry in manifest.for_week(args.week):
+            print(f"   {entry['kind']:<20} {entry['path']} ({entry['bytes'] / 1024:.0f}KB)")
+    if not args.rebuild and not args.week:
+        kinds = sorted({entry['kind'] for entry in manifest.entries()})
+        print(f"🗂️ {len(manifest.entries())} artifacts of {len(kinds)} kinds: {', '.join(kinds)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Backfill covers and tracklists for past weeks
+Loads each week's tracks from Supabase or the nmf_data_*.json files and renders
+the weeks in parallel worker processes, skipping weeks whose artifacts are up to date
+
+Usage:
+    python backfill.py --from 2025-09-12 --to 2025-10-10
+    python backfill.py --from 2025-09-12 --to 2025-10-10 --source files --workers 2 --max-memory-mb 1024
+    python backfill.py --from 2025-10-10 --to 2025-10-10 --force --upload
+"""
+
+import argparse
+import glob
+import logging
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+from config import SpotifyConfig
+from cover_batch import load_tracks_from_file, load_tracks_from_supabase, preferred_first
+from fingerprints import FingerprintStore, compute_fingerprint, track_set_fingerprint
+from instrumentation import peak_rss_mb
+
+logger = logging.getLogger(__name__)
+
+# Each worker process builds its own automation once and reuses it for every week it renders
+_automation = None
+
+
+def fridays_between(start: date, end: date) -> List[str]:
+    """Week start dates (Fridays, YYYY-MM-DD) from start to end inclusive"""
+    first = start + timedelta(days=(4 - start.weekday()) % 7)
+    weeks = []
+    while first <= end:
+        weeks.append(first.isoformat())
+        first += timedelta(days=7)
+    return weeks
+
+
+def week_of_data_file(path: str) -> Optional[str]:
+    """
+    Week start a saved nmf_data_*.json belongs to
+
+    The enhanced automation names files nmf_data_<run timestamp>.json and its
+    week starts on the Friday on or before the run; main.py's own runs put the
+    week first (nmf_data_<week>_<timestamp>.json).
+    """
+    name = os.path.basename(path)
+    match = re.match(r'nmf_data_(\d{8})_(\d{8})_\d{6}\.json$', name)
+    if match:
+        return datetime.strptime(match.group(1), '%Y%m%d').date().isoformat()
+    match = re.match(r'nmf_data_(\d{8})_\d{6}\.json$', name)
+    if match:
+        run_date = datetime.strptime(match.group(1), '%Y%m%d').date()
+        return (run_date - timedelta(days=(run_date.weekday() - 4) % 7)).isoformat()
+    return None
+
+
+def data_files_by_week(output_dir: str) -> Dict[str, str]:
+    """Latest nmf_data_*.json per week start"""
+    by_week = {}
+    for path in sorted(glob.glob(os.path.join(output_dir, 'nmf_data_*.json'))):
+        week = week_of_data_file(path)
+        if week and (week not in by_week or os.path.basename(path) > os.path.basename(by_week[week])):
+            by_week[week] = path
+    return by_week
+
+
+def load_week_preferences(week_start: str) -> Dict:
+    """Preferred track, tracklist title and custom cover of a week from the images table"""
+    from supabase import create_client
+
+    supabase = create_client(os.getenv('NEXT_PUBLIC_SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_KEY'))
+    rows = supabase.table('images').select(
+        'preferred_track_id, tracklist_title, custom_image_url'
+    ).eq('week_start', week_start).execute().data
+    return rows[0] if rows else {}
+
+
+def plan_weeks(weeks: List[str], source: str, output_dir: str) -> Tuple[List[Dict], List[str]]:
+    """
+    Load the tracks and preferences of each week
+
+    Preferences come from the images table whatever the track source, and
+    the preferred track is moved to the front as in the weekly run.
+
+    Args:
+        weeks: Week start dates
+        source: 'supabase', 'files' or 'auto' (files first, then Supabase)
+        output_dir: Directory holding the nmf_data_*.json files
+
+    Returns:
+        (jobs, weeks without tracks)
+    """
+    files = data_files_by_week(output_dir) if source in ('files', 'auto') else {}
+    jobs, missing = [], []
+    for week in weeks:
+        tracks, preferences = [], {}
+        if week in files:
+            tracks = load_tracks_from_file(files[week])
+        if not tracks and source in ('supabase', 'auto'):
+            try:
+                tracks = load_tracks_from_supabase(week)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not load week {week} from Supabase: {e}")
+        if tracks:
+            try:
+                preferences = load_week_preferences(week)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not load the preferences of week {week}: {e}")
+            tracks, _ = preferred_first(tracks, preferences.get('preferred_track_id'))
+            jobs.append({'week_start': week, 'tracks': tracks, 'tracklist_title': preferences.get('tracklist_title'),
+                         'custom_cover': bool(preferences.get('custom_image_url'))})
+        else:
+            missing.append(week)
+    return jobs, missing
+
+
+def _init_worker(max_memory_mb: Optional[int]) -> None:
+    """Process pool initializer: cap the worker's memory and build its automation"""
+    global _automation
+    if max_memory_mb and resource is not None:
+        # Address-space cap: a week that needs more fails with MemoryError instead of exhausting the host
+        limit = max_memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    logging.getLogger().setLevel(logging.WARNING)
+    from main import SpotifyNewMusicAutomation
+    _automation = SpotifyNewMusicAutomation(os.getenv('SPOTIFY_CLIENT_ID'), os.getenv('SPOTIFY_CLIENT_SECRET'))
+
+
+def render_week(job: Dict, force: bool = False, upload: bool = False) -> Dict:
+    """
+    Render one week's artifacts in a worker process
+
+    Artifacts whose inputs match the fingerprints recorded by the last
+    backfill of the week are skipped, so an interrupted backfill can be rerun.
+
+    Args:
+        job: Week start, tracks, tracklist title and whether the week has a custom cover
+        force: Render even if the artifacts are up to date
+        upload: Upload the rendered artifacts and save their URLs
+
+    Returns:
+        Per-artifact outcome ('rendered', 'skipped', 'failed' or 'custom'), paths and peak memory
+    """
+    started = time.perf_counter()
+    week = job['week_start']
+    tracks = job['tracks']
+    store = FingerprintStore.for_week(_automation.config.OUTPUT_DIR, week)
+    template = {'template_version': SpotifyConfig.TEMPLATE_VERSION}
+
+    artifacts = {
+        'cover': (
+            {**template, 'output_format': SpotifyConfig.OUTPUT_FORMATS['cover'],
+             'cover_track': track_set_fingerprint(tracks[:1])},
+            lambda: _automation.create_single_artist_image(
+                tracks[0], _automation.spotify, f"{week}_artist_collage_backfill.png")
+        ),
+        'tracklist': (
+            {**template, 'output_format': SpotifyConfig.OUTPUT_FORMATS['tracklist'],
+             'tracks': track_set_fingerprint(tracks), 'title': job.get('tracklist_title')},
+            lambda: _automation.create_tracklist_image(
+                tracks, f"{week}_tracklist_backfill.png", custom_title=job.get('tracklist_title'))
+        ),
+    }
+
+    outcome = {'week_start': week, 'artifacts': {}, 'paths': {}}
+    for artifact, (inputs, render) in artifacts.items():
+        if artifact == 'cover' and job.get('custom_cover'):
+            # The week's cover is a user upload; there is nothing to re-render
+            outcome['artifacts'][artifact] = 'custom'
+            continue
+
+        stage = f"backfill_{artifact}"
+        fingerprint = compute_fingerprint(inputs)
+        hit, path = store.lookup(stage, fingerprint)
+        if hit and not force and path and os.path.exists(path):
+            outcome['artifacts'][artifact] = 'skipped'
+            outcome['paths'][artifact] = path
+            continue
+
+        try:
+            path = render()
+        except MemoryError:
+            path = None
+            logger.error(f"❌ {week} {artifact}: worker memory cap reached")
+        if not path:
+            outcome['artifacts'][artifact] = 'failed'
+            continue
+        store.record(stage, fingerprint, path)
+        outcome['artifacts'][artifact] = 'rendered'
+        outcome['paths'][artifact] = path
+
+    if upload and 'rendered' in outcome['artifacts'].values():
+        # save_image_metadata overwrites both URLs, so the row is only updated when both artifacts exist
+        if set(outcome['paths']) == {'cover', 'tracklist'}:
+            cover_url = _automation.upload_image_to_supabase(outcome['paths']['cover'], week, 'cover')
+            tracklist_url = _automation.upload_image_to_supabase(outcome['paths']['tracklist'], week, 'tracklist')
+            if cover_url and tracklist_url:
+                _automation.save_image_metadata(week, cover_url, tracklist_url)
+        else:
+            logger.warning(f"⚠️ {week}: not uploading, the images row needs both a cover and a tracklist")
+
+    outcome['duration_s'] = round(time.perf_counter() - started, 2)
+    outcome['peak_rss_mb'] = peak_rss_mb()
+    return outcome
+
+
+def run_backfill(jobs: List[Dict], workers: int, max_memory_mb: Optional[int] = None,
+                 force: bool = False, upload: bool = False) -> List[Dict]:
+    """
+    Render the planned weeks in a process pool, reporting progress as weeks finish
+
+    Returns:
+        One outcome per week, in completion order
+    """
+    outcomes = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(max_memory_mb,)) as pool:
+        futures = {pool.submit(render_week, job, force, upload): job['week_start'] for job in jobs}
+        for done, future in enumerate(as_completed(futures), start=1):
+            week = futures[future]
+            try:
+                outcome = future.result()
+            except Exception as e:
+                outcome = {'week_start': week, 'artifacts': {}, 'error': str(e)}
+            outcomes.append(outcome)
+
+            if outcome.get('error'):
+                print(f"   [{done}/{len(jobs)}] ❌ {week}: {outcome['error']}")
+                continue
+            summary = ', '.join(f"{artifact} {status}" for artifact, status in outcome['artifacts'].items())
+            icon = '⚠️' if 'failed' in outcome['artifacts'].values() else '✅'
+            rss = f", peak RSS {outcome['peak_rss_mb']:.0f}MB" if outcome.get('peak_rss_mb') else ''
+            print(f"   [{done}/{len(jobs)}] {icon} {week}: {summary} ({outcome['duration_s']:.1f}s{rss})")
+    return outcomes
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Re-render covers and tracklists for a range of past weeks")
+    parser.add_argument('--from', dest='start', required=True, help="First week (YYYY-MM-DD)")
+    parser.add_argument('--to', dest='end', default=None, help="Last week (YYYY-MM-DD, default: today)")
+    parser.add_argument('--source', choices=['auto', 'supabase', 'files'], default='auto',
+                        help="Where to load each week's tracks from (default: files, then Supabase)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument('--max-memory-mb', type=int, default=None, help="Memory cap per worker process")
+    parser.add_argument('--force', action='store_true', help="Re-render weeks whose artifacts are up to date")
+    parser.add_argument('--upload', action='store_true', help="Upload re-rendered artifacts and update the images table")
+    args = parser.parse_args()
+
+    start = date.fromisoformat(args.start)
+    end = date.fromisoformat(args.end) if args.end else date.today()
+    weeks = fridays_between(start, end)
+    if not weeks:
+        print(f"❌ No Fridays between {start} and {end}")
+        return 1
+
+    # Importing main loads the .env file before Supabase is queried
+    import main as _  # noqa: F401
+
+    jobs, missing = plan_weeks(weeks, args.source, SpotifyConfig.OUTPUT_DIR)
+    print(f"🏭 Backfilling {len(jobs)} of {len(weeks)} weeks with {args.workers} worker(s)")
+    if missing:
+        print(f"   ⚠️ No tracks found for: {', '.join(missing)}")
+    if not jobs:
+        return 1
+
+    started = time.perf_counter()
+    outcomes = run_backfill(jobs, args.workers, args.max_memory_mb, args.force, args.upload)
+
+    statuses = [status for outcome in outcomes for status in outcome['artifacts'].values()]
+    failed = [outcome['week_start'] for outcome in outcomes
+              if outcome.get('error') or 'failed' in outcome['artifacts'].values()]
+    print(f"\n🏁 Done in {time.perf_counter() - started:.1f}s: {statuses.count('rendered')} rendered, "
+          f"{statuses.count('skipped')} up to date, {len(failed)} week(s) with failures")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
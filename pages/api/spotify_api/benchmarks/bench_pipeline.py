@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end benchmark of run_enhanced_automation
+Replays a saved playlist page and recorded Spotify responses, and serves
+artwork, Supabase, OpenAI and SendGrid from local stand-ins, so a full weekly
+run can be timed without Chrome or network access
+
+Usage:
+    python benchmarks/bench_pipeline.py             # time one run per repeat and compare with history
+    python benchmarks/bench_pipeline.py --record    # also append the result to pipeline_history.jsonl
+    python benchmarks/bench_pipeline.py --latency-ms 40 --verbose
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+from typing import Dict, List, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SPOTIFY_API_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.append(SPOTIFY_API_DIR)
+sys.path.append(BENCHMARK_DIR)
+
+import py_scraper
+import spotipy
+from instrumentation import metrics
+from offline_services import OfflineServices
+from selenium_scraper import SpotifySeleniumScraper
+
+HISTORY_FILE = os.path.join(BENCHMARK_DIR, 'pipeline_history.jsonl')
+
+SPOTIFY_SCOPE = "playlist-read-private playlist-read-collaborative user-library-read"
+
+
+class SavedPage:
+    """The part of a WebDriver the track extraction reads"""
+
+    def __init__(self, page_source: str):
+        self.page_source = page_source
+
+    def find_elements(self, *args, **kwargs) -> list:
+        return []
+
+    def quit(self) -> None:
+        pass
+
+
+class SavedPageScraper(SpotifySeleniumScraper):
+    """Selenium scraper that loads saved playlist pages instead of starting Chrome"""
+
+    def __init__(self, base_url: str, headless: bool = True):
+        self.base_url = base_url
+        self.headless = headless
+        self.driver = None
+
+    def scrape_playlist(self, playlist_url: str) -> List[Dict]:
+        playlist_id = playlist_url.split('?')[0].rstrip('/').rsplit('/', 1)[-1]
+        with urllib.request.urlopen(f"{self.base_url}/playlist/{playlist_id}") as response:
+            self.driver = SavedPage(response.read().decode('utf-8'))
+        return self._extract_tracks()
+
+
+@contextlib.contextmanager
+def offline_automation(services: OfflineServices, work_dir: str):
+    """
+    Point the automation at the stand-ins for the duration of a run
+
+    Environment variables cover Supabase, OpenAI and SendGrid. Spotify's API
+    base URL and the browser scraper have no such setting, so they are patched.
+    """
+    previous_cwd = os.getcwd()
+    previous_env = {key: os.environ.get(key) for key in services.environment()}
+    original_spotify_init = spotipy.Spotify.__init__
+    original_scraper = py_scraper.SpotifySeleniumScraper
+
+    def spotify_init(self, *args, **kwargs):
+        original_spotify_init(self, *args, **kwargs)
+        self.prefix = f"{services.base_url}/spotify/v1/"
+
+    os.chdir(work_dir)
+    os.environ.update(services.environment())
+    spotipy.Spotify.__init__ = spotify_init
+    py_scraper.SpotifySeleniumScraper = lambda headless=True: SavedPageScraper(services.base_url, headless)
+
+    # A cached token keeps SpotifyOAuth from opening a browser
+    with open('.spotify_cache', 'w', encoding='utf-8') as f:
+        json.dump({'access_token': 'offline-token', 'token_type': 'Bearer', 'expires_in': 3600,
+                   'scope': SPOTIFY_SCOPE, 'expires_at': int(time.time()) + 365 * 24 * 3600,
+                   'refresh_token': 'offline-refresh-token'}, f)
+    try:
+        yield py_scraper.EnhancedSpotifyAutomation('offline-client-id', 'offline-client-secret')
+    finally:
+        os.chdir(previous_cwd)
+        for key, value in previous_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        spotipy.Spotify.__init__ = original_spotify_init
+        py_scraper.SpotifySeleniumScraper = original_scraper
+
+
+def run_once(services: OfflineServices, verbose: bool = False) -> Dict:
+    """
+    Run one complete weekly automation in a fresh working directory
+
+    Returns:
+        Wall-clock time, per-stage durations, counters and stand-in request counts
+    """
+    services.requests.clear()
+    services.uploads.clear()
+
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with tempfile.TemporaryDirectory(prefix='nmf_pipeline_bench_') as work_dir, output:
+        with offline_automation(services, work_dir) as automation:
+            started = time.perf_counter()
+            results = automation.run_enhanced_automation(use_cached=False, incremental=False)
+            wall_time = time.perf_counter() - started
+
+    summary = metrics.summary()
+    if not results:
+        raise RuntimeError("The offline run produced no results; rerun with --verbose to see why")
+
+    return {
+        'wall_time_s': round(wall_time, 3),
+        'track_count': results['track_count'],
+        'peak_rss_mb': summary['peak_rss_mb'],
+        'stages': {name: stage['duration_s'] for name, stage in summary['stages'].items()},
+        'counters': summary['counters'],
+        'requests': dict(services.requests),
+        'uploaded_bytes': sum(services.uploads.values())
+    }
+
+
+def current_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCHMARK_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path: str) -> List[Dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize(runs: List[Dict], latency_ms: float) -> Dict:
+    """Median of each timing across the repeated runs"""
+    stage_names = list(runs[0]['stages'])
+    return {
+        'commit': current_commit(),
+        'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        'latency_ms': latency_ms,
+        'runs': len(runs),
+        'wall_time_s': round(statistics.median(run['wall_time_s'] for run in runs), 3),
+        'peak_rss_mb': max(run['peak_rss_mb'] or 0 for run in runs),
+        'stages': {name: round(statistics.median(run['stages'].get(name, 0.0) for run in runs), 4)
+                   for name in stage_names},
+        'counters': runs[-1]['counters'],
+        'requests': runs[-1]['requests'],
+        'uploaded_bytes': runs[-1]['uploaded_bytes']
+    }
+
+
+def print_report(result: Dict, previous: Optional[Dict]) -> None:
+    print(f"\n⏱️ End-to-end: {result['wall_time_s']:.2f}s (median of {result['runs']}, "
+          f"{result['latency_ms']:g}ms simulated latency, peak RSS {result['peak_rss_mb']}MB)")
+    if previous:
+        print(f"   Compared with {previous.get('commit') or '?'} from {previous.get('recorded_at', '?')}")
+
+    print(f"   {'stage':<22}{'duration':>10}{'previous':>10}{'change':>9}")
+    for name, duration in result['stages'].items():
+        line = f"   {name:<22}{duration:9.3f}s"
+        before = (previous or {}).get('stages', {}).get(name)
+        if before is not None:
+            change = f"{(duration - before) / before:+.0%}" if before >= 0.001 else '-'
+            line += f"{before:9.3f}s{change:>9}"
+        print(line)
+
+    if previous:
+        before = previous['wall_time_s']
+        print(f"   {'wall time':<22}{result['wall_time_s']:9.3f}s{before:9.3f}s{(result['wall_time_s'] - before) / before:+9.0%}")
+    print(f"   Requests: {', '.join(f'{service} {count}' for service, count in sorted(result['requests'].items()))}")
+    print(f"   Uploaded: {result['uploaded_bytes'] / 1024:.0f}KB")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Time a full weekly run against local stand-ins")
+    parser.add_argument('--repeat', type=int, default=3, help="Number of runs (default 3)")
+    parser.add_argument('--latency-ms', type=float, default=0.0,
+                        help="Delay added to every stand-in response to mimic network round trips")
+    parser.add_argument('--record', action='store_true', help="Append the result to the history file")
+    parser.add_argument('--history', default=HISTORY_FILE, help="History file (one JSON result per line)")
+    parser.add_argument('--verbose', action='store_true', help="Show the automation's own output")
+    args = parser.parse_args()
+
+    # Configured before main.py is imported by the run, so its basicConfig doesn't reset the level
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    runs = []
+    with OfflineServices(latency_ms=args.latency_ms) as services:
+        print(f"🏁 Offline pipeline benchmark against {services.base_url}")
+        for i in range(args.repeat):
+            run = run_once(services, args.verbose)
+            runs.append(run)
+            print(f"   Run {i + 1}/{args.repeat}: {run['wall_time_s']:.2f}s ({run['track_count']} tracks)")
+
+    result = summarize(runs, args.latency_ms)
+    history = [entry for entry in load_history(args.history) if entry.get('latency_ms') == args.latency_ms]
+    print_report(result, history[-1] if history else None)
+
+    if args.record:
+        with open(args.history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(result) + '\n')
+        print(f"\n💾 Recorded in {args.history}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the rendering hot paths
+Renders each artifact from local fixtures (no network) and compares time and
+peak memory against a stored baseline
+
+Usage:
+    python benchmarks/bench_rendering.py                   # run and compare with the baseline
+    python benchmarks/bench_rendering.py --save-baseline   # record a new baseline
+    python benchmarks/bench_rendering.py --only tracklist  # run matching cases only
+    python benchmarks/bench_rendering.py --encoders        # also compare output encoders per artifact
+    python benchmarks/bench_rendering.py --decode          # also compare full vs reduced source decoding
+"""
+
+import argparse
+import ctypes
+import gc
+import importlib.util
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SPOTIFY_API_DIR = os.path.dirname(BENCHMARK_DIR)
+API_DIR = os.path.dirname(SPOTIFY_API_DIR)
+sys.path.append(SPOTIFY_API_DIR)
+sys.path.append(BENCHMARK_DIR)
+
+import PIL
+import PIL.Image
+from fixtures import NAME_CASES, make_artwork, make_tracks
+from image_encoding import compare_encoders, print_encoder_report
+from image_loading import load_image
+from instrumentation import current_rss_mb, peak_rss_mb, reset_peak_rss
+from main import SpotifyConfig, SpotifyNewMusicAutomation
+
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, 'rendering_baseline.json')
+
+# Source images for the decode comparison: (name, size, format)
+DECODE_SOURCES = [
+    ('artwork_640.jpg', 640, 'JPEG'),
+    ('upload_2000.jpg', 2000, 'JPEG'),
+    ('upload_4000.jpg', 4000, 'JPEG'),
+    ('upload_6000.jpg', 6000, 'JPEG'),
+    ('upload_4000.png', 4000, 'PNG'),
+]
+
+# Slowdowns below this are treated as noise
+DEFAULT_THRESHOLD = 0.20
+
+
+def release_free_memory() -> None:
+    """
+    Return freed memory to the OS so a measurement's RSS growth isn't hidden
+    by blocks left over from the previous case
+    """
+    gc.collect()
+    PIL.Image.core.clear_cache()
+    try:
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+class FixtureSpotifyClient:
+    """Answers the artist lookups the renderers make with fixture URLs"""
+
+    def artist(self, artist_id: str) -> Dict:
+        return {'id': artist_id, 'images': [{'url': f"fixture://{artist_id}", 'width': 640, 'height': 640}]}
+
+    def search(self, q: str, type: str = 'artist', limit: int = 1, **kwargs) -> Dict:
+        return {'artists': {'items': [{'id': 'artist0000'}]}}
+
+
+class FixtureResponse:
+    """Minimal requests.Response stand-in serving a fixture file"""
+
+    def __init__(self, content: bytes):
+        self.content = content
+        self.status_code = 200
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+class RenderingBenchmark:
+    """Builds the renderers against local fixtures and times them"""
+
+    def __init__(self, work_dir: str, repeat: int = 5):
+        self.work_dir = work_dir
+        self.repeat = repeat
+        self.fixture_dir = os.path.join(work_dir, 'fixtures')
+        self.output_dir = os.path.join(work_dir, 'output')
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        self.artwork = {
+            f"artist{i:04d}": make_artwork(os.path.join(self.fixture_dir, f"artist{i:04d}.jpg"), seed=i)
+            for i in range(20)
+        }
+        self.automation = self._build_automation()
+        self.custom_image = self._load_custom_image_module()
+
+    def _build_automation(self) -> SpotifyNewMusicAutomation:
+        # Skip __init__, which authenticates with Spotify
+        automation = SpotifyNewMusicAutomation.__new__(SpotifyNewMusicAutomation)
+        automation.client_id = automation.client_secret = 'benchmark'
+        automation.spotify = FixtureSpotifyClient()
+        automation.config = SpotifyConfig()
+        automation.config.OUTPUT_DIR = self.output_dir
+
+        def download_artist_image(url: str, filename: str) -> Optional[str]:
+            # The renderers delete the downloaded file, so hand out a fresh copy each time
+            path = os.path.join(self.output_dir, filename)
+            shutil.copyfile(self.artwork[url.split('://', 1)[1]], path)
+            return path
+
+        automation.download_artist_image = download_artist_image
+        automation.get_artist_image_url = lambda artist_id, spotify_client=None: f"fixture://{artist_id}"
+        return automation
+
+    def _load_custom_image_module(self):
+        # process-custom-image.py is not importable by name because of the hyphens
+        spec = importlib.util.spec_from_file_location('process_custom_image', os.path.join(API_DIR, 'process-custom-image.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        with open(self.artwork['artist0000'], 'rb') as f:
+            content = f.read()
+        module.requests = type('FixtureRequests', (), {'get': staticmethod(lambda url, **kwargs: FixtureResponse(content))})
+        return module
+
+    def cases(self) -> Dict[str, Callable[[], object]]:
+        """Every benchmark case, keyed by name"""
+        automation = self.automation
+        spotify_client = automation.spotify
+        cases = {}
+
+        for case in NAME_CASES:
+            tracks = make_tracks(10, case)
+            artist, track_name = NAME_CASES[case]
+            cases[f"cover_{case}"] = (
+                lambda tracks=tracks: automation.create_single_artist_image(tracks[0], spotify_client, 'bench_cover.png'))
+            cases[f"tracklist_{case}"] = (
+                lambda tracks=tracks: automation.create_tracklist_image(tracks, 'bench_tracklist.png'))
+            cases[f"custom_image_{case}"] = (
+                lambda artist=artist, track_name=track_name: self.custom_image.process_custom_image(
+                    'fixture://artist0000', track_name, artist))
+
+        collage_tracks = make_tracks(20, 'short')
+        cases['collage_20'] = lambda: automation.create_collage(collage_tracks, 'bench_collage.png')
+        return cases
+
+    def measure(self, func: Callable[[], object]) -> Dict:
+        """
+        Time a render and measure its peak memory
+
+        Returns:
+            min/median seconds over the repeats, the peak RSS growth and the
+            peak Python allocations of a single call
+        """
+        func()  # Warm-up: font and module caches
+
+        durations = []
+        for _ in range(self.repeat):
+            gc.collect()
+            started = time.perf_counter()
+            func()
+            durations.append(time.perf_counter() - started)
+
+        # Memory is measured on a separate call so tracing doesn't skew the timings
+        release_free_memory()
+        rss_before = current_rss_mb()
+        peak_reset = reset_peak_rss()
+        tracemalloc.start()
+        func()
+        _, python_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak = peak_rss_mb()
+
+        return {
+            'min_s': round(min(durations), 4),
+            'median_s': round(statistics.median(durations), 4),
+            'peak_rss_delta_mb': round(peak - rss_before, 1) if peak_reset and None not in (peak, rss_before) else None,
+            'python_peak_mb': round(python_peak / (1024 * 1024), 2)
+        }
+
+    def encoder_report(self) -> Dict[str, Dict]:
+        """
+        Compare the output encoders on each artifact type
+
+        Artifacts are rendered losslessly first so every encoder starts from the same pixels.
+        """
+        automation = self.automation
+        formats = automation.config.OUTPUT_FORMATS
+        automation.config.OUTPUT_FORMATS = {artifact: 'png' for artifact in formats}
+        try:
+            rendered = {
+                'cover': automation.create_single_artist_image(make_tracks(10)[0], automation.spotify, 'encode_cover.png'),
+                'collage': automation.create_collage(make_tracks(20), 'encode_collage.png'),
+                'tracklist': automation.create_tracklist_image(make_tracks(10), 'encode_tracklist.png'),
+            }
+        finally:
+            automation.config.OUTPUT_FORMATS = formats
+
+        reports = {}
+        for artifact, path in rendered.items():
+            with PIL.Image.open(path) as image:
+                image.load()
+                reports[artifact] = compare_encoders(image)
+            print_encoder_report(f"{artifact} (configured: {formats[artifact]})", reports[artifact])
+        return reports
+
+    def decode_report(self) -> Dict[str, Dict]:
+        """
+        Compare a full-resolution decode and LANCZOS resize with load_image
+
+        Each source is loaded at the cover size (1080) and the collage tile size (200).
+        """
+        def full_decode(path: str, size: int):
+            with PIL.Image.open(path) as image:
+                return image.convert('RGB').resize((size, size), PIL.Image.Resampling.LANCZOS)
+
+        reports = {}
+        for name, source_size, image_format in DECODE_SOURCES:
+            path = make_artwork(os.path.join(self.fixture_dir, name), seed=source_size, size=source_size,
+                                image_format=image_format)
+            for target in (1080, 200):
+                before = self.measure(lambda: full_decode(path, target))
+                after = self.measure(lambda: load_image(path, (target, target)))
+                reports[f"{name}->{target}"] = {'before': before, 'after': after}
+                print(f"   {name + ' -> ' + str(target):<26}{before['min_s'] * 1000:9.1f}ms{after['min_s'] * 1000:9.1f}ms"
+                      f"{self._format_rss(before):>12}{self._format_rss(after):>11}")
+        return reports
+
+    @staticmethod
+    def _format_rss(result: Dict) -> str:
+        return f"{result['peak_rss_delta_mb']:.1f}MB" if result['peak_rss_delta_mb'] is not None else '-'
+
+    def run(self, only: Optional[str] = None) -> Dict[str, Dict]:
+        results = {}
+        for name, func in self.cases().items():
+            if only and only not in name:
+                continue
+            results[name] = self.measure(func)
+            result = results[name]
+            rss = f"{result['peak_rss_delta_mb']:7.1f}MB" if result['peak_rss_delta_mb'] is not None else f"{'-':>9}"
+            print(f"   {name:<26}{result['median_s'] * 1000:9.1f}ms{result['min_s'] * 1000:9.1f}ms{rss}"
+                  f"{result['python_peak_mb']:8.2f}MB")
+        return results
+
+
+def compare_with_baseline(results: Dict[str, Dict], baseline: Dict, threshold: float) -> List[str]:
+    """
+    Print changes against the baseline
+
+    Returns:
+        Names of the cases that regressed by more than threshold
+    """
+    regressions = []
+    print(f"\n📊 Compared with baseline from {baseline.get('recorded_at', '?')} ({baseline.get('machine', '?')})")
+    for name, result in results.items():
+        previous = baseline.get('cases', {}).get(name)
+        if not previous:
+            print(f"   {name:<26} new case")
+            continue
+
+        # The fastest call is the least noisy estimate of the render cost
+        time_change = (result['min_s'] - previous['min_s']) / previous['min_s'] if previous['min_s'] else 0.0
+        line = f"   {name:<26}{time_change:+8.0%} time"
+        if result['peak_rss_delta_mb'] is not None and previous.get('peak_rss_delta_mb'):
+            memory_change = (result['peak_rss_delta_mb'] - previous['peak_rss_delta_mb']) / previous['peak_rss_delta_mb']
+            line += f"{memory_change:+8.0%} memory"
+        else:
+            memory_change = 0.0
+
+        if time_change > threshold or memory_change > threshold:
+            regressions.append(name)
+            line += "  ⚠️ regression"
+        print(line)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Instagram artifact renderers")
+    parser.add_argument('--repeat', type=int, default=5, help="Timed calls per case (default 5)")
+    parser.add_argument('--only', help="Only run cases whose name contains this text")
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="Baseline file to compare against")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown reported as a regression (default 0.20)")
+    parser.add_argument('--encoders', action='store_true', help="Also compare encode time and size per output format")
+    parser.add_argument('--decode', action='store_true',
+                        help="Also compare full-resolution and reduced decoding of large source images")
+    args = parser.parse_args()
+
+    # The renderers log every file they write
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory(prefix='nmf_bench_') as work_dir:
+        benchmark = RenderingBenchmark(work_dir, repeat=args.repeat)
+        print(f"🏁 Rendering benchmarks ({args.repeat} timed calls per case, Pillow {PIL.__version__})")
+        print(f"   {'case':<26}{'median':>11}{'min':>11}{'peak RSS':>9}{'py peak':>10}")
+        results = benchmark.run(args.only)
+        if args.encoders:
+            print("\n🗜️ Output encoders (fastest of 3 encodes)")
+            benchmark.encoder_report()
+        if args.decode:
+            print("\n🖼️ Source decoding: full decode + resize vs load_image")
+            print(f"   {'source -> target':<26}{'before':>11}{'after':>11}{'RSS before':>12}{'RSS after':>11}")
+            benchmark.decode_report()
+
+    if args.save_baseline:
+        baseline = {
+            'recorded_at': datetime.now().isoformat(),
+            'machine': f"{platform.system()} {platform.machine()}, Python {platform.python_version()}, Pillow {PIL.__version__}",
+            'repeat': args.repeat,
+            'cases': results
+        }
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\n💾 Baseline saved to: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("\n⚠️ No baseline yet; run with --save-baseline to record one")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare_with_baseline(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} case(s) regressed: {', '.join(regressions)}")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Deterministic local fixtures for the benchmarks
+Artwork is generated from a fixed seed so every run renders identical inputs without network access
+"""
+
+import os
+import random
+from typing import Dict, List
+
+from PIL import Image, ImageDraw
+
+# Artist/track name shapes that exercise the different text layout paths
+NAME_CASES = {
+    'short': ("SZA", "Saturn"),
+    'long': ("Megan Thee Stallion", "Where Them Girls At (Remix) [feat. Nicki Minaj]"),
+    'multiline': ("Kendrick Lamar, SZA, Future, Metro Boomin & The Weeknd",
+                  "All The Stars From The Black Panther Soundtrack Deluxe Edition"),
+}
+
+ARTISTS = [
+    "Taylor Swift", "Bad Bunny", "SZA", "Drake", "Olivia Rodrigo", "Doja Cat", "Tyler, The Creator",
+    "Billie Eilish", "Peso Pluma", "Megan Thee Stallion", "Travis Scott", "Karol G", "Sabrina Carpenter",
+    "Chappell Roan", "Kendrick Lamar", "Tems", "Zach Bryan", "Jung Kook", "Burna Boy", "Noah Kahan",
+]
+
+
+def make_artwork(path, seed: int, size: int = 640, image_format: str = 'JPEG'):
+    """
+    Write a deterministic photo-like image (gradient, shapes and noise)
+
+    Args:
+        path: File path or binary file object to save the image to
+        seed: Seed that fully determines the image
+        size: Width and height in pixels
+        image_format: PIL format name
+
+    Returns:
+        The path (or file object) written
+    """
+    rng = random.Random(seed)
+    top = tuple(rng.randrange(256) for _ in range(3))
+    bottom = tuple(rng.randrange(256) for _ in range(3))
+
+    gradient = Image.linear_gradient('L').resize((size, size))
+    image = Image.composite(Image.new('RGB', (size, size), bottom), Image.new('RGB', (size, size), top), gradient)
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.randrange(size), rng.randrange(size)
+        radius = rng.randrange(size // 16, size // 4)
+        draw.ellipse([x - radius, y - radius, x + radius, y + radius],
+                     fill=tuple(rng.randrange(256) for _ in range(3)))
+
+    # Grain keeps the encoders honest; flat shapes compress unrealistically well
+    noise = Image.frombytes('L', (size, size), rng.randbytes(size * size)).convert('RGB')
+    image = Image.blend(image, noise, 0.15)
+
+    if isinstance(path, str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    image.save(path, image_format, quality=90)
+    return path
+
+
+def make_tracks(count: int = 10, name_case: str = 'short', week_start: str = '2025-10-10') -> List[Dict]:
+    """
+    Build a track list shaped like the scraper's output
+
+    The first track uses the requested name case; the rest cycle through ARTISTS.
+    """
+    tracks = []
+    for i in range(count):
+        if i == 0:
+            artist, name = NAME_CASES[name_case]
+        else:
+            artist, name = ARTISTS[i % len(ARTISTS)], f"Track {i:02d}"
+        if name_case != 'short':
+            name = f"{name} (Extended Version)" if i else name
+        tracks.append({
+            'id': f"track{i:04d}",
+            'name': name,
+            'artist': artist,
+            'artist_ids': [f"artist{i:04d}"],
+            'album': f"Album {i:02d}",
+            'album_art_url': f"fixture://album{i:04d}",
+            'popularity': 100 - i * 3,
+            'playlist_source': 'New Music Friday' if i % 2 == 0 else 'Release Radar',
+            'week_start': week_start,
+        })
+    return tracks
@@ -0,0 +1,236 @@
+"""
+Local stand-ins for every external service the weekly automation talks to
+One threaded HTTP server answers Spotify Web API, playlist page, artwork,
+Supabase (PostgREST + storage), OpenAI and SendGrid requests from recordings
+"""
+
+import io
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, unquote, urlparse
+
+from fixtures import make_artwork
+
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recordings')
+
+CANNED_CAPTION = ("New Music Friday is here and it's stacked. Our top pick this week is on repeat, "
+                  "and the rest of the list isn't far behind. Which one are you playing first?")
+CANNED_HASHTAGS = "\n".join([
+    "#NewMusicFriday", "#NewMusic", "#MusicDiscovery", "#FreshTracks", "#NowPlaying",
+    "#Playlist", "#PopMusic", "#HipHop", "#RnB", "#MusicLovers",
+])
+
+
+class OfflineServices:
+    """Threaded local HTTP server standing in for the external APIs"""
+
+    def __init__(self, latency_ms: float = 0.0, artwork_size: int = 640):
+        """
+        Initialize the stand-ins
+
+        Args:
+            latency_ms: Delay added to every response to mimic network round trips
+            artwork_size: Width and height of the served artwork
+        """
+        self.latency = latency_ms / 1000
+        self.artwork_size = artwork_size
+        self.requests = Counter()
+        self.uploads: Dict[str, int] = {}
+        self._artwork_cache: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+        with open(os.path.join(RECORDINGS_DIR, 'spotify_recordings.json'), 'r', encoding='utf-8') as f:
+            self._spotify_template = f.read()
+        self.spotify: Dict = {}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'OfflineServices':
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self._server.daemon_threads = True
+        # Recorded artwork URLs point at whichever port the server was given
+        self.spotify = json.loads(self._spotify_template.replace('{base_url}', self.base_url))
+        threading.Thread(target=self._server.serve_forever, name='offline-services', daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> 'OfflineServices':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def environment(self) -> Dict[str, str]:
+        """Environment variables that point the automation at the stand-ins"""
+        return {
+            'NEXT_PUBLIC_SUPABASE_URL': f"{self.base_url}/supabase",
+            'SUPABASE_SERVICE_KEY': 'offline-service-key',
+            'OPENAI_API_KEY': 'offline-openai-key',
+            'OPENAI_BASE_URL': f"{self.base_url}/openai/v1",
+            'SENDGRID_API_KEY': 'offline-sendgrid-key',
+            'SENDGRID_API_URL': f"{self.base_url}/sendgrid/v3/mail/send",
+            'CLIENT_EMAIL_ADDRESS': 'benchmark@example.com',
+        }
+
+    def artwork(self, name: str) -> bytes:
+        """Deterministic JPEG artwork for a name, generated once"""
+        with self._lock:
+            cached = self._artwork_cache.get(name)
+        if cached is not None:
+            return cached
+
+        buffer = io.BytesIO()
+        make_artwork(buffer, seed=zlib.crc32(name.encode('utf-8')), size=self.artwork_size)
+        with self._lock:
+            self._artwork_cache[name] = buffer.getvalue()
+        return self._artwork_cache[name]
+
+    # Route handlers return (status, content type, body)
+
+    def handle_spotify(self, path: str, query: Dict) -> tuple:
+        if path == '/me':
+            return 200, 'application/json', {'id': 'offline', 'display_name': 'Offline Benchmark'}
+
+        match = re.match(r'^/(tracks|artists)/([^/]+)$', path)
+        if match:
+            item = self.spotify[match.group(1)].get(match.group(2))
+            if item is None:
+                return 404, 'application/json', {'error': {'status': 404, 'message': 'non existing id'}}
+            return 200, 'application/json', item
+
+        if path == '/search':
+            return 200, 'application/json', self._search(query.get('q', [''])[0], query.get('type', ['track'])[0],
+                                                         int(query.get('limit', ['10'])[0]))
+
+        return 404, 'application/json', {'error': {'status': 404, 'message': f"no recording for {path}"}}
+
+    def _search(self, q: str, search_type: str, limit: int) -> Dict:
+        terms = [term.lower() for term in re.findall(r'"([^"]+)"', q)] or [q.lower()]
+        if search_type == 'artist':
+            items = [artist for artist in self.spotify['artists'].values() if artist['name'].lower() in terms]
+            return {'artists': {'items': items[:limit], 'total': len(items)}}
+
+        items = [track for track in self.spotify['tracks'].values() if track['name'].lower() in terms]
+        return {'tracks': {'items': items[:limit], 'total': len(items)}}
+
+    def handle_supabase(self, method: str, path: str, body: bytes) -> tuple:
+        upload = re.match(r'^/storage/v1/object/([^/]+)/(.+)$', path)
+        if upload and method in ('POST', 'PUT'):
+            key = f"{upload.group(1)}/{unquote(upload.group(2))}"
+            with self._lock:
+                self.uploads[key] = len(body)
+            return 200, 'application/json', {'Key': key, 'Id': f"offline-{zlib.crc32(key.encode())}"}
+
+        if path.startswith('/rest/v1/'):
+            if method == 'GET':
+                # No stored preferences or rows: every week looks like a fresh one
+                return 200, 'application/json', []
+            if method in ('POST', 'PATCH'):
+                rows = json.loads(body or b'[]')
+                return 201, 'application/json', rows if isinstance(rows, list) else [rows]
+            if method == 'DELETE':
+                return 200, 'application/json', []
+
+        return 404, 'application/json', {'message': f"no stand-in for {method} {path}"}
+
+    def handle_openai(self, path: str, body: bytes) -> tuple:
+        if path != '/v1/chat/completions':
+            return 404, 'application/json', {'error': {'message': f"no stand-in for {path}"}}
+
+        request = json.loads(body or b'{}')
+        prompt = ' '.join(str(message.get('content', '')) for message in request.get('messages', []))
+        content = CANNED_HASHTAGS if 'return only the hashtags' in prompt.lower() else CANNED_CAPTION
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(content) // 4
+        return 200, 'application/json', {
+            'id': 'chatcmpl-offline',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'gpt-4'),
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                      'total_tokens': prompt_tokens + completion_tokens}
+        }
+
+    def _handler_class(self):
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _read_body(self) -> bytes:
+                if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+                    chunks = []
+                    while True:
+                        size = int(self.rfile.readline().strip() or b'0', 16)
+                        if size == 0:
+                            self.rfile.readline()
+                            return b''.join(chunks)
+                        chunks.append(self.rfile.read(size))
+                        self.rfile.readline()
+                return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+            def _respond(self, status: int, content_type: str, payload) -> None:
+                body = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _dispatch(self) -> None:
+                body = self._read_body()
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                service, _, rest = url.path.lstrip('/').partition('/')
+                rest = '/' + rest
+
+                with services._lock:
+                    services.requests[service] += 1
+                if services.latency:
+                    time.sleep(services.latency)
+
+                if service == 'spotify':
+                    response = services.handle_spotify(rest[len('/v1'):].rstrip('/'), query)
+                elif service == 'supabase':
+                    response = services.handle_supabase(self.command, rest, body)
+                elif service == 'openai':
+                    response = services.handle_openai(rest, body)
+                elif service == 'sendgrid':
+                    response = (202, 'application/json', b'')
+                elif service == 'artwork':
+                    response = (200, 'image/jpeg', services.artwork(rest.strip('/')))
+                elif service == 'playlist':
+                    page = os.path.join(RECORDINGS_DIR, f"playlist_{rest.strip('/')}.html")
+                    if os.path.exists(page):
+                        with open(page, 'rb') as f:
+                            response = (200, 'text/html; charset=utf-8', f.read())
+                    else:
+                        response = (404, 'text/html', b'')
+                else:
+                    response = (404, 'application/json', {'error': f"unknown service {service}"})
+
+                self._respond(*response)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _dispatch
+
+        return Handler
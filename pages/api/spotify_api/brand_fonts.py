@@ -0,0 +1,65 @@
+"""
+Brand font loading shared by the renderers
+Fonts are looked up and loaded once per size, then reused by every render in the process
+"""
+
+import os
+from functools import lru_cache
+
+from PIL import ImageFont
+
+# Helvetica Neue Bold where available, then the closest bold sans-serif per platform
+FONT_CANDIDATES = [
+    # macOS fonts
+    ("/System/Library/Fonts/HelveticaNeue.ttc", [0, 1, 2, 3, 4, 5, 6, 7, 8]),
+    ("/System/Library/Fonts/Helvetica.ttc", [0, 1, 2, 3, 4, 5]),
+    ("/Library/Fonts/HelveticaNeue.ttc", [0, 1, 2, 3, 4, 5, 6]),
+    ("/System/Library/Fonts/Supplemental/HelveticaNeue.ttc", [0, 1, 2, 3, 4, 5, 6]),
+    # Windows fonts
+    ("C:/Windows/Fonts/arialbd.ttf", [0]),  # Arial Bold
+    ("C:/Windows/Fonts/arial.ttf", [0]),    # Arial Regular
+    ("C:/Windows/Fonts/calibrib.ttf", [0]), # Calibri Bold
+    ("C:/Windows/Fonts/calibri.ttf", [0]),  # Calibri Regular
+    ("C:/Windows/Fonts/segoeuib.ttf", [0]), # Segoe UI Bold
+    ("C:/Windows/Fonts/segoeui.ttf", [0]),  # Segoe UI Regular
+    # Linux fonts (GitHub Actions)
+    ("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", [0]),
+    ("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", [0]),
+    ("/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf", [0]),
+    ("/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf", [0]),
+    ("/usr/share/fonts/truetype/noto/NotoSans-Bold.ttf", [0]),
+    ("/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf", [0]),
+    # Fallback
+    ("Arial.ttf", [0])
+]
+
+# For TTC collections: prioritize Bold (index 2), then Heavy (index 3), then Medium (index 1);
+# italic faces typically sit at higher indexes like 6, 7, 8
+INDEX_ORDER = [2, 3, 1, 4, 5, 0]
+
+
+@lru_cache(maxsize=None)
+def load_font_prefer_helvetica(size: int, condensed: bool = False):
+    """
+    Load the brand font at a size, preferring Helvetica Neue Bold
+
+    Args:
+        size: Font size in pixels
+        condensed: Prefer a condensed face (currently the same faces are tried)
+
+    Returns:
+        FreeType font, or Pillow's default font if no candidate could be loaded
+    """
+    for path, idxs in FONT_CANDIDATES:
+        if os.path.exists(path):
+            for idx in INDEX_ORDER:
+                if idx in idxs:
+                    try:
+                        return ImageFont.truetype(path, size=size, index=idx)
+                    except Exception:
+                        continue
+            try:
+                return ImageFont.truetype(path, size=size)
+            except Exception:
+                continue
+    return ImageFont.load_default()
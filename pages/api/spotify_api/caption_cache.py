@@ -0,0 +1,133 @@
+"""
+Persistent cache of generated captions
+Stores OpenAI caption results per week, keyed by a hash of everything the
+completion depends on, so regenerating an unchanged week costs no API call
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from fingerprints import compute_fingerprint
+from instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def caption_cache_key(track_ids: list, week_start: str, prompt: str, model: str, style: str) -> str:
+    """
+    Key of a caption result
+
+    Args:
+        track_ids: IDs (or names) of the week's tracks, in order
+        week_start: Week start date (YYYY-MM-DD)
+        prompt: Prompt template version and rendered prompts sent to the model
+        model: Model name(s) used
+        style: Caption style
+
+    Returns:
+        Hex digest identifying the result
+    """
+    return compute_fingerprint({
+        'tracks': track_ids,
+        'week_start': week_start,
+        'prompt': prompt,
+        'model': model,
+        'style': style
+    })
+
+
+class CaptionCache:
+    """Per-week store of caption results with hit and token-savings statistics"""
+
+    def __init__(self, path: str):
+        """
+        Initialize the cache, loading any results saved by earlier runs
+
+        Args:
+            path: JSON file the cache is kept in
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        self._stats = {'hits': 0, 'misses': 0, 'tokens_saved': 0}
+        # Lookups only update the statistics in memory; put() and flush() write them
+        self._dirty = False
+
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self._entries = data.get('entries', {})
+                self._stats.update(data.get('stats', {}))
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Ignoring unreadable caption cache {path}: {e}")
+
+    @classmethod
+    def for_week(cls, output_dir: str, week_start: str) -> 'CaptionCache':
+        """Open the caption cache of a week"""
+        return cls(os.path.join(output_dir, f"caption_cache_{week_start}.json"))
+
+    def get(self, key: str, ttl: Optional[float] = None) -> Optional[Dict]:
+        """
+        Look up a cached result, counting the hit or miss
+
+        The count is kept in memory until the next put() or flush().
+
+        Args:
+            key: Key from caption_cache_key
+            ttl: Maximum age in seconds; None accepts any age
+
+        Returns:
+            The cached result, or None if absent or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            fresh = entry is not None and (ttl is None or time.time() - entry['stored_at'] <= ttl)
+            if fresh:
+                self._stats['hits'] += 1
+                self._stats['tokens_saved'] += entry.get('tokens', 0)
+            else:
+                self._stats['misses'] += 1
+            self._dirty = True
+        metrics.count('caption_cache_hits' if fresh else 'caption_cache_misses')
+        return dict(entry['result']) if fresh else None
+
+    def put(self, key: str, result: Dict, tokens: int = 0) -> None:
+        """
+        Store a result, writing the cache and its statistics
+
+        Args:
+            key: Key from caption_cache_key
+            result: Caption result to return on later hits
+            tokens: Tokens the result cost, credited as saved on every hit
+        """
+        with self._lock:
+            self._entries[key] = {'result': result, 'tokens': tokens, 'stored_at': time.time()}
+            self._save()
+
+    def flush(self) -> None:
+        """Write the statistics counted since the last write"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hits, misses, hit rate and tokens saved for the week"""
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        stats['entries'] = len(self._entries)
+        return stats
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'entries': self._entries, 'stats': self._stats}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
@@ -0,0 +1,179 @@
+"""
+Offline caption engine
+Builds captions from a bank of templates filled in with track metadata and
+picks hashtags from a precompiled genre index, without any network access,
+so a usable caption is always available when OpenAI is not
+"""
+
+import re
+import string
+import zlib
+from typing import Dict, List, Optional
+
+BASE_HASHTAGS = ['#NewMusicFriday', '#MusicDiscovery', '#FreshTracks', '#NewMusic', '#MusicFriday']
+MAX_HASHTAGS = 12
+
+# Genre keyword -> hashtag; keywords match whole words of the tracks' genres
+GENRE_HASHTAGS = {
+    'pop': '#PopMusic',
+    'k-pop': '#KPop',
+    'hip hop': '#HipHop',
+    'hip-hop': '#HipHop',
+    'rap': '#HipHop',
+    'trap': '#HipHop',
+    'drill': '#HipHop',
+    'r&b': '#RnB',
+    'rnb': '#RnB',
+    'soul': '#RnB',
+    'rock': '#RockMusic',
+    'punk': '#RockMusic',
+    'metal': '#MetalMusic',
+    'alternative': '#AlternativeMusic',
+    'indie': '#IndieMusic',
+    'electronic': '#ElectronicMusic',
+    'edm': '#ElectronicMusic',
+    'house': '#HouseMusic',
+    'techno': '#Techno',
+    'dance': '#DanceMusic',
+    'country': '#CountryMusic',
+    'latin': '#LatinMusic',
+    'reggaeton': '#Reggaeton',
+    'afrobeats': '#Afrobeats',
+    'jazz': '#Jazz',
+    'folk': '#FolkMusic',
+}
+
+PLAYLIST_HASHTAGS = {
+    'Release Radar': '#ReleaseRadar',
+}
+
+# One pass over a genre string finds every keyword; longer keywords first so "k-pop" wins over "pop"
+GENRE_PATTERN = re.compile(
+    r'(?<![\w&-])(' + '|'.join(re.escape(keyword) for keyword in sorted(GENRE_HASHTAGS, key=len, reverse=True))
+    + r')(?![\w&-])'
+)
+
+# Template bank per style. Slots: {week}, {artist}, {title}, {artist2}, {title2}, {artist3},
+# {artists} (top three), {count} (tracks), {playlist} (source of the top track)
+TEMPLATES = {
+    'reviewer': [
+        "New Music Friday Review - {week}\n\nThis week's standout: {artist} delivers with '{title}' - a track that showcases their signature style.\n\nPlus more fresh releases from the week's top artists. Solid lineup overall.",
+        "New Music Friday - {week}\n\n{artist}'s '{title}' leads the week, with {artist2}'s '{title2}' close behind.\n\n{count} new tracks in the recap. Which one are you running back?",
+        "Week of {week}: '{title}' by {artist} is the one to start with.\n\nDon't sleep on {artist2} and {artist3} either. Full tracklist in the post.",
+        "New Music Friday - {week}\n\nTop pick from {playlist}: {artist} - '{title}'.\n\nAlso worth your time: '{title2}' by {artist2}. {count} tracks total this week.",
+    ],
+    'emoji_heavy': [
+        "🎵 NEW MUSIC FRIDAY - Week of {week} 🎵\n\n🔥 This week's fire tracks from {artists} and more! 🔥\n\n💯 Fresh sounds hitting different! What's your favorite? 💯",
+        "🚨 NMF {week} 🚨\n\n🎧 {artist} - '{title}' 🔥🔥\n🎧 {artist2} - '{title2}' ✨\n\n👀 {count} new tracks this week! Drop your fave below 👇",
+        "✨ New Music Friday ✨ {week}\n\n🥇 '{title}' by {artist}\n🎶 Plus {artist2}, {artist3} & more 🎶\n\n💬 Which one's on repeat? 🔁",
+    ],
+    'minimal': [
+        "New Music Friday - {week}\n\nFeaturing {artist} & {artist2} and more fresh tracks.\n\nWhat are you listening to this week?",
+        "New Music Friday - {week}\n\n{artist} - {title}\n{artist2} - {title2}\n\n+ {count} more.",
+        "{week}\n\nStart with '{title}' by {artist}.",
+    ],
+    'review_style': [
+        "New Music Friday Review - {week}\n\nThis week's standout: {artist} delivers with '{title}' - a track that showcases their signature style.\n\nPlus more fresh releases from the week's top artists. Solid lineup overall.",
+        "Review - {week}\n\n'{title}' puts {artist} at the top of the week. {artist2}'s '{title2}' makes a strong case for second.\n\n{count} tracks reviewed. Full list in the post.",
+        "The verdict for {week}: {artist} - '{title}' is the pick.\n\nHonourable mentions to {artist2} and {artist3}. A deep week overall.",
+    ],
+    'balanced': [
+        "🎵 New Music Friday - {week}\n\nThis week's highlights include fresh tracks from {artists} and more!\n\nAlways excited to discover new sounds. What caught your ear? 🎧",
+        "🎶 New Music Friday - {week}\n\n'{title}' by {artist} is leading the week, and {artist2} isn't far behind.\n\n{count} new tracks to get through. Where are you starting? 🎧",
+        "New Music Friday - {week} 🎵\n\nOn rotation: {artist}, {artist2}, {artist3}.\n\nWhich one's your pick this week?",
+    ],
+}
+
+
+# Slots that need more than one track -> tracks needed; templates using a slot the week
+# cannot fill are not picked
+MULTI_TRACK_SLOTS = {'artist2': 2, 'title2': 2, 'artist3': 3}
+
+TEMPLATE_SLOTS = {
+    template: {field for _, field, _, _ in string.Formatter().parse(template) if field}
+    for bank in TEMPLATES.values() for template in bank
+}
+
+
+def _slots(tracks: List[Dict], week_start: str) -> Dict[str, str]:
+    """Template slot values from the first tracks (the pipeline passes them in display order)"""
+    ranked = list(tracks[:3]) + [{}] * (3 - len(tracks[:3]))
+    artists = [track.get('artist') or 'Unknown Artist' for track in ranked]
+    titles = [track.get('name') or 'Unknown Track' for track in ranked]
+    named = [artist for artist, track in zip(artists, ranked) if track]
+    return {
+        'week': week_start,
+        'artist': artists[0],
+        'title': titles[0],
+        'artist2': artists[1] if ranked[1] else 'more artists',
+        'title2': titles[1] if ranked[1] else titles[0],
+        'artist3': artists[2] if ranked[2] else 'more',
+        'artists': ", ".join(named) or 'new artists',
+        'count': str(len(tracks)),
+        'playlist': ranked[0].get('playlist_source') or 'New Music Friday',
+    }
+
+
+def pick_template(style: str, tracks: List[Dict], week_start: str, max_length: Optional[int] = None,
+                  slots: Optional[Dict[str, str]] = None) -> str:
+    """
+    Fill in one of a style's templates
+
+    The template is chosen from a checksum of the week and tracks, so the same week
+    always gets the same caption and different weeks vary. Weeks with fewer than
+    three tracks skip templates naming more tracks than they have.
+
+    Args:
+        style: Style name (a key of TEMPLATES; unknown styles use 'reviewer')
+        tracks: Track dictionaries, top track first
+        week_start: Week start date (YYYY-MM-DD)
+        max_length: Longest acceptable caption; later templates are tried if the pick is longer
+        slots: Precomputed slot values
+
+    Returns:
+        The caption
+    """
+    bank = TEMPLATES.get(style, TEMPLATES['reviewer'])
+    missing = {slot for slot, needed in MULTI_TRACK_SLOTS.items() if len(tracks) < needed}
+    if missing:
+        bank = [template for template in bank if not TEMPLATE_SLOTS[template] & missing] or bank
+    slots = slots or _slots(tracks, week_start)
+    seed = zlib.crc32(f"{week_start}|{slots['artist']}|{slots['title']}|{style}".encode('utf-8'))
+    captions = [bank[(seed + offset) % len(bank)].format(**slots) for offset in range(len(bank))]
+    if max_length:
+        fitting = [caption for caption in captions if len(caption) <= max_length]
+        return fitting[0] if fitting else min(captions, key=len)
+    return captions[0]
+
+
+def caption_hashtags(tracks: List[Dict], week_start: str) -> List[str]:
+    """
+    Hashtags for the week's tracks
+
+    Args:
+        tracks: Track dictionaries ('genre' or 'genres' and 'playlist_source' are used)
+        week_start: Week start date (YYYY-MM-DD)
+
+    Returns:
+        The base hashtags, genre and playlist hashtags in order of first appearance,
+        and the year, up to MAX_HASHTAGS
+    """
+    hashtags = list(BASE_HASHTAGS)
+    seen = set(hashtags)
+    for track in tracks:
+        genres = track.get('genres') or []
+        if track.get('genre'):
+            genres = [track['genre'], *genres]
+        for genre in genres:
+            for keyword in GENRE_PATTERN.findall(genre.lower()):
+                tag = GENRE_HASHTAGS[keyword]
+                if tag not in seen:
+                    seen.add(tag)
+                    hashtags.append(tag)
+        tag = PLAYLIST_HASHTAGS.get(track.get('playlist_source'))
+        if tag and tag not in seen:
+            seen.add(tag)
+            hashtags.append(tag)
+
+    year_tag = f"#{week_start.split('-')[0]}Music"
+    return hashtags[:MAX_HASHTAGS - 1] + [year_tag]
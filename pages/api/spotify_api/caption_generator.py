@@ -4,12 +4,21 @@ OpenAI Caption Generator for Instagram posts
 Generates captions and hashtags based on track metadata
 """
 
+import asyncio
 import json
 import logging
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from caption_cache import CaptionCache, caption_cache_key
+from caption_engine import caption_hashtags, pick_template
+from config import SpotifyConfig
+from instrumentation import metrics
 
 try:
     import openai
@@ -31,6 +40,19 @@ class CaptionStyle:
 class CaptionGenerator:
     """OpenAI-powered caption generator for Instagram posts"""
     
+    # Seconds the caption and hashtag requests may take before the templates are used instead
+    REQUEST_TIMEOUT = 20.0
+    
+    CAPTION_MODEL = "gpt-4"
+    HASHTAG_MODEL = "gpt-3.5-turbo"
+    # All style variants come from one JSON-mode completion, which needs a model that supports it
+    VARIANTS_MODEL = "gpt-4o-mini"
+    CAPTION_SYSTEM_PROMPT = "You're a music curator creating short, punchy Instagram captions for New Music Friday. Keep it concise, authentic, and engaging. Write like you're texting a friend about great music - casual but knowledgeable."
+    # Bump when the prompts change in ways the rendered prompt text does not show, so cached captions are not reused
+    PROMPT_VERSION = 1
+    # Seconds a cached caption is reused for (None: until the tracks or prompts change)
+    CACHE_TTL = 7 * 24 * 3600
+    
     # Predefined caption styles
     STYLES = {
         'emoji_heavy': CaptionStyle(
@@ -58,34 +80,74 @@ class CaptionGenerator:
         )
     }
     
-    def __init__(self, api_key: str = None):
-        """Initialize the caption generator"""
+    def __init__(self, api_key: str = None, request_timeout: float = None, cache_dir: str = None):
+        """
+        Initialize the caption generator
+        
+        Args:
+            api_key: OpenAI API key (default: OPENAI_API_KEY)
+            request_timeout: Deadline in seconds for the OpenAI requests (default: REQUEST_TIMEOUT)
+            cache_dir: Directory of the per-week caption caches (default: OUTPUT_DIR)
+        """
         # Get API key from environment variables only
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        self.request_timeout = request_timeout or self.REQUEST_TIMEOUT
+        self.cache_dir = cache_dir or SpotifyConfig.OUTPUT_DIR
+        self._client = None
+        self._async_client = None
+        self._client_lock = threading.Lock()
+        # One cache per week for the generator's lifetime, so lookups are counted without rewriting the file
+        self._caches: Dict[str, CaptionCache] = {}
+        # Caption and hashtags are requested side by side on these workers
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='caption')
         
         if not self.api_key:
             logger.warning("OpenAI API key not found, will use fallback templates")
             self.openai_available = False
         else:
             if openai:
-                openai.api_key = self.api_key
                 self.openai_available = True
                 logger.info("✅ OpenAI client initialized with environment variable")
             else:
                 logger.warning("OpenAI package not installed, will use fallback templates")
                 self.openai_available = False
     
+    def close(self) -> None:
+        """Cancel queued OpenAI requests, stop the worker threads, close the shared client and flush the caches"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._client_lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+            caches, self._caches = list(self._caches.values()), {}
+        for cache in caches:
+            cache.flush()
+    
+    def __enter__(self) -> 'CaptionGenerator':
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
+    
     def generate_caption(self, 
                         tracks: List[Dict], 
                         week_start: str,
-                        include_hashtags: bool = True) -> Dict:
+                        include_hashtags: bool = True,
+                        use_cache: bool = True,
+                        cache_ttl: Optional[float] = CACHE_TTL) -> Dict:
         """
         Generate caption and hashtags for a week's tracks in reviewer style
         
+        OpenAI results are cached per week; a repeat request for the same tracks,
+        prompts and models returns the cached result without calling the API.
+        
         Args:
             tracks: List of track dictionaries
             week_start: Week start date (YYYY-MM-DD)
             include_hashtags: Whether to generate hashtags
+            use_cache: Return a cached result if there is one; False always calls
+                OpenAI (the fresh result still replaces the cached one)
+            cache_ttl: Maximum age in seconds of a cached result (None: any age)
             
         Returns:
             Dictionary with caption, hashtags, and metadata
@@ -93,7 +155,18 @@ class CaptionGenerator:
         try:
             
             if self.openai_available:
-                return self._generate_openai_caption(tracks, week_start, include_hashtags)
+                cache = self._cache(week_start)
+                key = self._cache_key(tracks, week_start, include_hashtags, 'reviewer')
+                if use_cache:
+                    cached = cache.get(key, cache_ttl)
+                    if cached:
+                        logger.info(f"✅ Using cached caption for week {week_start}")
+                        return dict(cached, cached=True)
+                
+                result = self._generate_openai_caption(tracks, week_start, include_hashtags)
+                if result['method'] == 'openai':
+                    cache.put(key, result, result.get('tokens_used', 0))
+                return result
             else:
                 return self._generate_fallback_caption(tracks, week_start, include_hashtags)
                 
@@ -101,67 +174,353 @@ class CaptionGenerator:
             logger.error(f"Error generating caption: {e}")
             return self._generate_fallback_caption(tracks, week_start, include_hashtags)
     
+    def generate_variants(self,
+                          tracks: List[Dict],
+                          week_start: str,
+                          styles: List[str] = None,
+                          use_cache: bool = True,
+                          cache_ttl: Optional[float] = CACHE_TTL) -> Dict:
+        """
+        Generate a caption in every style, plus shared hashtags, with one OpenAI call
+        
+        The styles are requested together as a single JSON object. Each variant is
+        checked against its style's max_length; a variant that is missing or empty is
+        replaced by that style's template, and one that is too long is cut to fit.
+        
+        Args:
+            tracks: List of track dictionaries
+            week_start: Week start date (YYYY-MM-DD)
+            styles: Style names from STYLES (default: all of them)
+            use_cache: Return a cached result if there is one
+            cache_ttl: Maximum age in seconds of a cached result (None: any age)
+            
+        Returns:
+            Dictionary with 'variants' ({style: {caption, character_count, method}}),
+            'hashtags' and metadata
+        """
+        styles = [style for style in (styles or list(self.STYLES)) if style in self.STYLES]
+        if not self.openai_available:
+            return self._fallback_variants(tracks, week_start, styles)
+        
+        prompt = self._create_variants_prompt(tracks, week_start, styles)
+        cache = self._cache(week_start)
+        key = caption_cache_key(
+            [track.get('id') or f"{track.get('artist')} - {track.get('name')}" for track in tracks],
+            week_start, f"v{self.PROMPT_VERSION}\n{self.CAPTION_SYSTEM_PROMPT}\n{prompt}",
+            self.VARIANTS_MODEL, 'variants:' + ','.join(styles))
+        if use_cache:
+            cached = cache.get(key, cache_ttl)
+            if cached:
+                logger.info(f"✅ Using cached caption variants for week {week_start}")
+                return dict(cached, cached=True)
+        
+        try:
+            metrics.count('openai_calls')
+            response = self.client.chat.completions.create(
+                model=self.VARIANTS_MODEL,
+                messages=[
+                    {"role": "system", "content": self.CAPTION_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                response_format={"type": "json_object"},
+                max_tokens=200 * len(styles) + 100,
+                temperature=0.7
+            )
+            tokens = getattr(response.usage, 'total_tokens', 0) or 0
+            metrics.count('openai_tokens', tokens)
+            payload = json.loads(response.choices[0].message.content)
+        except Exception as e:
+            logger.error(f"OpenAI variants error: {type(e).__name__}: {e}")
+            metrics.count('openai_fallbacks')
+            return self._fallback_variants(tracks, week_start, styles)
+        
+        generated = payload.get('variants') if isinstance(payload.get('variants'), dict) else {}
+        variants = {}
+        for style in styles:
+            text = generated.get(style)
+            if isinstance(text, str) and text.strip():
+                caption = self._fit_length(text, self.STYLES[style].max_length)
+                variants[style] = {'caption': caption, 'character_count': len(caption), 'method': 'openai'}
+            else:
+                logger.warning(f"⚠️ No usable {style} variant in the response, using its template")
+                variants[style] = self._template_variant(tracks, week_start, style)
+        
+        hashtags = [tag.strip() for tag in payload.get('hashtags', []) if isinstance(tag, str) and tag.strip()]
+        hashtags = [tag if tag.startswith('#') else f"#{tag}" for tag in hashtags][:15]
+        result = {
+            'variants': variants,
+            'hashtags': hashtags or self._generate_fallback_hashtags(tracks, week_start),
+            'generated_at': datetime.now().isoformat(),
+            'method': 'openai',
+            'model': self.VARIANTS_MODEL,
+            'tokens_used': tokens
+        }
+        cache.put(key, result, tokens)
+        return result
+    
+    def _create_variants_prompt(self, tracks: List[Dict], week_start: str, styles: List[str]) -> str:
+        """Create OpenAI prompt asking for every style variant as one JSON object"""
+        style_lines = "\n".join(
+            f'- "{style}": {self.STYLES[style].description}, at most {self.STYLES[style].max_length} characters'
+            for style in styles
+        )
+        return f"""Write Instagram captions for New Music Friday (week of {week_start}), one per style.
+
+Tracks this week:
+{self._prepare_track_data(tracks)}
+
+Styles:
+{style_lines}
+
+Mention 1-2 standout tracks. Don't put hashtags in the captions.
+Also suggest 10-15 relevant hashtags for the post, including #NewMusicFriday.
+
+Respond with a JSON object of the form:
+{{"variants": {{"<style>": "<caption>", ...}}, "hashtags": ["#...", ...]}}"""
+    
+    @staticmethod
+    def _fit_length(text: str, max_length: int) -> str:
+        """Trim a caption to max_length, preferring to end at a sentence, then at a word"""
+        text = text.strip().strip('"').strip()
+        if len(text) <= max_length:
+            return text
+        truncated = text[:max_length - 3]
+        last_sentence = truncated.rfind('.')
+        last_space = truncated.rfind(' ')
+        if last_sentence > max_length * 0.7:
+            return truncated[:last_sentence + 1]
+        if last_space > max_length * 0.8:
+            return truncated[:last_space] + '...'
+        return truncated + '...'
+    
+    def _template_variant(self, tracks: List[Dict], week_start: str, style: str) -> Dict:
+        """A style's template caption, shaped like a generated variant"""
+        caption = self._template_caption(tracks, week_start, style)
+        return {'caption': caption, 'character_count': len(caption), 'method': 'fallback'}
+    
+    def _fallback_variants(self, tracks: List[Dict], week_start: str, styles: List[str]) -> Dict:
+        """Every style from its template, for when OpenAI is unavailable"""
+        return {
+            'variants': {style: self._template_variant(tracks, week_start, style) for style in styles},
+            'hashtags': self._generate_fallback_hashtags(tracks, week_start),
+            'generated_at': datetime.now().isoformat(),
+            'method': 'fallback'
+        }
+    
+    def _cache_key(self, tracks: List[Dict], week_start: str, include_hashtags: bool, style: str) -> str:
+        """Cache key covering the tracks, week, prompts and models of a request"""
+        track_ids = [track.get('id') or f"{track.get('artist')} - {track.get('name')}" for track in tracks]
+        prompts = [f"v{self.PROMPT_VERSION}", self.CAPTION_SYSTEM_PROMPT,
+                   self._create_prompt(self._prepare_track_data(tracks), week_start)]
+        models = [self.CAPTION_MODEL]
+        if include_hashtags:
+            prompts.append(self._create_hashtag_prompt(tracks, week_start))
+            models.append(self.HASHTAG_MODEL)
+        return caption_cache_key(track_ids, week_start, "\n".join(prompts), "+".join(models), style)
+    
+    def _cache(self, week_start: str) -> CaptionCache:
+        """Caption cache of a week, opened once per generator"""
+        with self._client_lock:
+            if week_start not in self._caches:
+                self._caches[week_start] = CaptionCache.for_week(self.cache_dir, week_start)
+            return self._caches[week_start]
+    
+    @property
+    def client(self):
+        """OpenAI client shared by every request of this generator, so they reuse one connection pool"""
+        with self._client_lock:
+            if self._client is None:
+                self._client = openai.OpenAI(api_key=self.api_key, timeout=self.request_timeout, max_retries=1)
+            return self._client
+    
     def _generate_openai_caption(self, 
                                 tracks: List[Dict], 
                                 week_start: str,
                                 include_hashtags: bool) -> Dict:
-        """Generate caption using OpenAI API"""
+        """
+        Generate caption using OpenAI API
+        
+        The caption and hashtag requests run concurrently under one deadline, so this
+        takes about as long as the slower of the two. Whichever misses the deadline or
+        fails is cancelled if it has not started and replaced by its template.
+        """
+        deadline = time.monotonic() + self.request_timeout
+        caption_job = self._executor.submit(self._request_caption, tracks, week_start)
+        hashtag_job = self._executor.submit(self._request_hashtags, tracks, week_start) if include_hashtags else None
+        
+        method = 'openai'
+        tokens_used = 0
         try:
-            # Prepare track data for OpenAI
-            track_info = self._prepare_track_data(tracks)
-            
-            # Create prompt in reviewer style
-            prompt = self._create_prompt(track_info, week_start)
+            caption_text, tokens = caption_job.result(timeout=max(0.0, deadline - time.monotonic()))
+            tokens_used += tokens
+        except Exception as e:
+            caption_job.cancel()
+            logger.error(f"OpenAI caption error: {type(e).__name__}: {e}")
+            metrics.count('openai_fallbacks')
+            caption_text = self._template_caption(tracks, week_start)
+            method = 'fallback'
+        
+        hashtags = []
+        if hashtag_job:
+            try:
+                hashtags, tokens = hashtag_job.result(timeout=max(0.0, deadline - time.monotonic()))
+                tokens_used += tokens
+            except Exception as e:
+                hashtag_job.cancel()
+                logger.error(f"Hashtag generation error: {type(e).__name__}: {e}")
+                metrics.count('openai_fallbacks')
+                hashtags = self._generate_fallback_hashtags(tracks, week_start)
+        
+        return {
+            'caption': caption_text,
+            'hashtags': hashtags,
+            'style': 'reviewer',
+            'generated_at': datetime.now().isoformat(),
+            'method': method,
+            'character_count': len(caption_text),
+            'tokens_used': tokens_used
+        }
+    
+    def _request_caption(self, tracks: List[Dict], week_start: str) -> Tuple[str, int]:
+        """Ask OpenAI for the reviewer-style caption; returns (caption, tokens used)"""
+        # Create prompt in reviewer style
+        prompt = self._create_prompt(self._prepare_track_data(tracks), week_start)
+        
+        metrics.count('openai_calls')
+        response = self.client.chat.completions.create(
+            model=self.CAPTION_MODEL,
+            messages=self._caption_messages(prompt),
+            max_tokens=150,
+            temperature=0.7
+        )
+        
+        tokens = getattr(response.usage, 'total_tokens', 0) or 0
+        metrics.count('openai_tokens', tokens)
+        return response.choices[0].message.content.strip(), tokens
+    
+    def _caption_messages(self, prompt: str) -> List[Dict]:
+        """Chat messages of the reviewer-style caption request"""
+        return [
+            {
+                "role": "system",
+                "content": self.CAPTION_SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+    
+    @property
+    def async_client(self):
+        """Async OpenAI client used for streaming, created once per generator"""
+        with self._client_lock:
+            if self._async_client is None:
+                self._async_client = openai.AsyncOpenAI(api_key=self.api_key, timeout=self.request_timeout,
+                                                        max_retries=1)
+            return self._async_client
+    
+    async def stream_caption(self,
+                             tracks: List[Dict],
+                             week_start: str,
+                             use_cache: bool = True,
+                             cache_ttl: Optional[float] = CACHE_TTL) -> AsyncIterator[Dict]:
+        """
+        Stream a reviewer-style caption as the model writes it
+        
+        Hashtags are requested alongside and sent with the final event. A cached
+        caption is sent as a single token; if OpenAI fails before the first token,
+        the template caption is sent instead.
+        
+        Args:
+            tracks: List of track dictionaries
+            week_start: Week start date (YYYY-MM-DD)
+            use_cache: Send a cached caption if there is one
+            cache_ttl: Maximum age in seconds of a cached caption (None: any age)
             
-            # Call OpenAI API (new v1.0+ syntax)
-            client = openai.OpenAI(api_key=self.api_key)
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You're a music curator creating short, punchy Instagram captions for New Music Friday. Keep it concise, authentic, and engaging. Write like you're texting a friend about great music - casual but knowledgeable."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
+        Yields:
+            {'type': 'token', 'text': ...} as text arrives, then {'type': 'done', ...}
+            with the same fields generate_caption returns
+        """
+        if not self.openai_available:
+            result = self._generate_fallback_caption(tracks, week_start, True)
+            yield {'type': 'token', 'text': result['caption']}
+            yield {'type': 'done', **result}
+            return
+        
+        cache = self._cache(week_start)
+        key = self._cache_key(tracks, week_start, True, 'reviewer')
+        cached = cache.get(key, cache_ttl) if use_cache else None
+        if cached:
+            yield {'type': 'token', 'text': cached['caption']}
+            yield {'type': 'done', **cached, 'cached': True}
+            return
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.request_timeout
+        hashtag_job = loop.run_in_executor(self._executor, self._request_hashtags, tracks, week_start)
+        
+        parts = []
+        tokens_used = 0
+        complete = False
+        try:
+            metrics.count('openai_calls')
+            stream = await self.async_client.chat.completions.create(
+                model=self.CAPTION_MODEL,
+                messages=self._caption_messages(self._create_prompt(self._prepare_track_data(tracks), week_start)),
                 max_tokens=150,
-                temperature=0.7
+                temperature=0.7,
+                stream=True,
+                stream_options={"include_usage": True}
             )
-            
-            caption_text = response.choices[0].message.content.strip()
-            
-            # Generate hashtags if requested
-            hashtags = []
-            if include_hashtags:
-                hashtags = self._generate_hashtags(tracks, week_start)
-            
-            return {
-                'caption': caption_text,
-                'hashtags': hashtags,
-                'style': 'reviewer',
-                'generated_at': datetime.now().isoformat(),
-                'method': 'openai',
-                'character_count': len(caption_text)
-            }
-            
+            async for chunk in stream:
+                if chunk.usage:
+                    tokens_used += chunk.usage.total_tokens or 0
+                text = chunk.choices[0].delta.content if chunk.choices else None
+                if text:
+                    parts.append(text)
+                    yield {'type': 'token', 'text': text}
+            complete = True
         except Exception as e:
-            logger.error(f"OpenAI API error: {e}")
-            return self._generate_fallback_caption(tracks, week_start, include_hashtags)
+            logger.error(f"OpenAI streaming error: {type(e).__name__}: {e}")
+            metrics.count('openai_fallbacks')
+        metrics.count('openai_tokens', tokens_used)
+        
+        method = 'openai'
+        caption_text = ''.join(parts).strip()
+        if not caption_text:
+            method = 'fallback'
+            caption_text = self._template_caption(tracks, week_start)
+            yield {'type': 'token', 'text': caption_text}
+        
+        try:
+            hashtags, tokens = await asyncio.wait_for(hashtag_job, timeout=max(0.0, deadline - loop.time()))
+            tokens_used += tokens
+        except Exception as e:
+            logger.error(f"Hashtag generation error: {type(e).__name__}: {e}")
+            hashtags = self._generate_fallback_hashtags(tracks, week_start)
+        
+        result = {
+            'caption': caption_text,
+            'hashtags': hashtags,
+            'style': 'reviewer',
+            'generated_at': datetime.now().isoformat(),
+            'method': method,
+            'character_count': len(caption_text),
+            'tokens_used': tokens_used
+        }
+        if complete and method == 'openai':
+            cache.put(key, result, tokens_used)
+        yield {'type': 'done', **result}
     
     def _generate_fallback_caption(self, 
                                   tracks: List[Dict], 
                                   week_start: str,
                                   include_hashtags: bool) -> Dict:
-        """Generate fallback caption using templates"""
+        """Generate fallback caption with the offline caption engine"""
         try:
-            # Get top tracks (up to 3 for caption)
-            top_tracks = tracks[:3]
-            
             # Create reviewer-style caption
-            caption = self._create_review_caption(top_tracks, week_start)
+            caption = self._template_caption(tracks, week_start)
             
             # Generate hashtags if requested
             hashtags = []
@@ -204,34 +563,10 @@ Tracks this week:
 
 Keep it under 200 characters. Write like you're recommending music to a friend - casual, enthusiastic, and to the point. Mention 1-2 standout tracks briefly. Use a few relevant emojis. Don't include hashtags."""
     
-    def _create_emoji_heavy_caption(self, tracks: List[Dict], week_start: str) -> str:
-        """Create emoji-heavy fallback caption"""
-        top_artists = [track.get('artist', 'Unknown') for track in tracks[:3]]
-        artists_text = ", ".join(top_artists)
-        
-        return f"🎵 NEW MUSIC FRIDAY - Week of {week_start} 🎵\n\n🔥 This week's fire tracks from {artists_text} and more! 🔥\n\n💯 Fresh sounds hitting different! What's your favorite? 💯\n\n#NewMusicFriday #FreshTracks #MusicDiscovery"
-    
-    def _create_minimal_caption(self, tracks: List[Dict], week_start: str) -> str:
-        """Create minimal fallback caption"""
-        top_artists = [track.get('artist', 'Unknown') for track in tracks[:2]]
-        artists_text = " & ".join(top_artists)
-        
-        return f"New Music Friday - {week_start}\n\nFeaturing {artists_text} and more fresh tracks.\n\nWhat are you listening to this week?"
-    
-    def _create_review_caption(self, tracks: List[Dict], week_start: str) -> str:
-        """Create review-style fallback caption"""
-        top_track = tracks[0] if tracks else {}
-        artist = top_track.get('artist', 'Unknown Artist')
-        track_name = top_track.get('name', 'Unknown Track')
-        
-        return f"New Music Friday Review - {week_start}\n\nThis week's standout: {artist} delivers with '{track_name}' - a track that showcases their signature style.\n\nPlus more fresh releases from the week's top artists. Solid lineup overall."
-    
-    def _create_balanced_caption(self, tracks: List[Dict], week_start: str) -> str:
-        """Create balanced fallback caption"""
-        top_artists = [track.get('artist', 'Unknown') for track in tracks[:3]]
-        artists_text = ", ".join(top_artists)
-        
-        return f"🎵 New Music Friday - {week_start}\n\nThis week's highlights include fresh tracks from {artists_text} and more!\n\nAlways excited to discover new sounds. What caught your ear? 🎧"
+    def _template_caption(self, tracks: List[Dict], week_start: str, style: str = 'reviewer') -> str:
+        """Caption from the offline engine's templates, within the style's length limit"""
+        max_length = self.STYLES[style].max_length if style in self.STYLES else None
+        return pick_template(style, tracks, week_start, max_length)
     
     def _create_emergency_caption(self, week_start: str) -> Dict:
         """Create emergency fallback caption"""
@@ -251,12 +586,34 @@ Keep it under 200 characters. Write like you're recommending music to a friend -
         try:
             if not self.openai_available:
                 return self._generate_fallback_hashtags(tracks, week_start)
+            return self._request_hashtags(tracks, week_start)[0]
             
-            # Get genres and moods from tracks
-            genres = list(set([track.get('genre', '') for track in tracks if track.get('genre')]))
-            moods = list(set([track.get('mood', '') for track in tracks if track.get('mood')]))
-            
-            prompt = f"""Generate 10-15 relevant Instagram hashtags for a New Music Friday post.
+        except Exception as e:
+            logger.error(f"Hashtag generation error: {e}")
+            return self._generate_fallback_hashtags(tracks, week_start)
+    
+    def _request_hashtags(self, tracks: List[Dict], week_start: str) -> Tuple[List[str], int]:
+        """Ask OpenAI for the post's hashtags; returns (hashtags, tokens used)"""
+        metrics.count('openai_calls')
+        response = self.client.chat.completions.create(
+            model=self.HASHTAG_MODEL,
+            messages=[{"role": "user", "content": self._create_hashtag_prompt(tracks, week_start)}],
+            max_tokens=100,
+            temperature=0.5
+        )
+        
+        hashtags = [line.strip() for line in response.choices[0].message.content.split('\n') if line.strip()]
+        tokens = getattr(response.usage, 'total_tokens', 0) or 0
+        metrics.count('openai_tokens', tokens)
+        return hashtags[:15], tokens  # Limit to 15 hashtags
+    
+    def _create_hashtag_prompt(self, tracks: List[Dict], week_start: str) -> str:
+        """Create OpenAI prompt for the hashtags"""
+        # Get genres and moods from tracks
+        genres = sorted(set(track.get('genre', '') for track in tracks if track.get('genre')))
+        moods = sorted(set(track.get('mood', '') for track in tracks if track.get('mood')))
+        
+        return f"""Generate 10-15 relevant Instagram hashtags for a New Music Friday post.
 
 Week: {week_start}
 Genres: {', '.join(genres[:3])}
@@ -269,97 +626,114 @@ Include:
 - Discovery hashtags
 
 Return only the hashtags, one per line, no other text."""
-
-            client = openai.OpenAI(api_key=self.api_key)
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=100,
-                temperature=0.5
-            )
-            
-            hashtags = [line.strip() for line in response.choices[0].message.content.split('\n') if line.strip()]
-            return hashtags[:15]  # Limit to 15 hashtags
-            
-        except Exception as e:
-            logger.error(f"Hashtag generation error: {e}")
-            return self._generate_fallback_hashtags(tracks, week_start)
     
     def _generate_fallback_hashtags(self, tracks: List[Dict], week_start: str) -> List[str]:
-        """Generate fallback hashtags"""
-        hashtags = [
-            '#NewMusicFriday',
-            '#MusicDiscovery',
-            '#FreshTracks',
-            '#NewMusic',
-            '#MusicFriday'
-        ]
-        
-        # Add genre-based hashtags
-        genres = [track.get('genre', '').lower() for track in tracks if track.get('genre')]
-        if 'pop' in ' '.join(genres):
-            hashtags.append('#PopMusic')
-        if 'hip hop' in ' '.join(genres) or 'rap' in ' '.join(genres):
-            hashtags.append('#HipHop')
-        if 'rock' in ' '.join(genres):
-            hashtags.append('#RockMusic')
-        if 'electronic' in ' '.join(genres) or 'edm' in ' '.join(genres):
-            hashtags.append('#ElectronicMusic')
-        
-        # Add year hashtag
-        year = week_start.split('-')[0]
-        hashtags.append(f'#{year}Music')
-        
-        return hashtags[:12]  # Limit to 12 hashtags
+        """Generate fallback hashtags from the offline engine's genre index"""
+        return caption_hashtags(tracks, week_start)
     
     def regenerate_caption(self, 
                           tracks: List[Dict], 
                           week_start: str,
                           new_style: str = None) -> Dict:
-        """Regenerate caption with optional new style"""
-        style = new_style or 'balanced'
-        return self.generate_caption(tracks, week_start, style, include_hashtags=True)
+        """Regenerate caption, bypassing the cache, in reviewer style or one of STYLES"""
+        if new_style not in self.STYLES:
+            return self.generate_caption(tracks, week_start, include_hashtags=True, use_cache=False)
+        
+        result = self.generate_variants(tracks, week_start, styles=[new_style], use_cache=False)
+        variant = result['variants'][new_style]
+        return {
+            'caption': variant['caption'],
+            'hashtags': result['hashtags'],
+            'style': new_style,
+            'generated_at': result['generated_at'],
+            'method': variant['method'],
+            'character_count': variant['character_count']
+        }
 
-def main():
-    """Test the caption generator"""
-    # Sample track data
-    sample_tracks = [
-        {
-            'artist': 'Drake',
-            'name': 'DOG HOUSE',
-            'genre': 'Hip Hop',
-            'mood': 'Energetic',
-            'popularity': 79
-        },
-        {
-            'artist': 'Twenty One Pilots',
-            'name': 'City Walls',
-            'genre': 'Alternative Rock',
-            'mood': 'Melancholic',
-            'popularity': 78
+def save_caption_variants(week_start: str, result: Dict) -> bool:
+    """Store a week's caption variants together in the images table (caption_variants column)"""
+    try:
+        from supabase import create_client
+        
+        supabase = create_client(os.getenv('NEXT_PUBLIC_SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_KEY'))
+        variants = {
+            'variants': result['variants'],
+            'hashtags': result['hashtags'],
+            'generated_at': result['generated_at'],
+            'method': result['method']
         }
-    ]
+        metrics.count('db_round_trips')
+        response = supabase.table('images').update(
+            {'caption_variants': variants, 'updated_at': datetime.now().isoformat()}
+        ).eq('week_start', week_start).execute()
+        if not response.data:
+            logger.warning(f"⚠️ No images row for week {week_start}, caption variants not saved")
+        return bool(response.data)
+    except Exception as e:
+        logger.error(f"Error saving caption variants: {e}")
+        return False
+
+async def print_caption_stream(generator: CaptionGenerator, tracks: List[Dict], week_start: str,
+                               use_cache: bool = True) -> None:
+    """Write stream_caption events to stdout as JSON lines, flushing each so the caller can relay it at once"""
+    async for event in generator.stream_caption(tracks, week_start, use_cache=use_cache):
+        print(json.dumps(event, ensure_ascii=False), flush=True)
+
+def main():
+    """Generate every caption style for sample tracks, or for a week's tracks with --week"""
+    import argparse
     
-    generator = CaptionGenerator()
+    parser = argparse.ArgumentParser(description="Generate caption variants in every style with one OpenAI call")
+    parser.add_argument('--week', help="Week start date (YYYY-MM-DD) whose tracks to caption (default: sample tracks)")
+    parser.add_argument('--save', action='store_true', help="Store the variants in the week's images row")
+    parser.add_argument('--no-cache', action='store_true', help="Ignore cached variants")
+    parser.add_argument('--stream', action='store_true',
+                        help="Stream the reviewer caption as JSON lines ({type: token|done, ...}) instead")
+    args = parser.parse_args()
     
-    print("Testing caption generation...")
-    print("=" * 50)
+    week_start = args.week or '2025-09-12'
+    if args.week:
+        from cover_batch import load_tracks_from_supabase
+        # Captions feature the first tracks, so lead with the most popular like the pipeline does
+        tracks = sorted(load_tracks_from_supabase(args.week), key=lambda x: x.get('popularity') or 0, reverse=True)
+    else:
+        # Sample track data
+        tracks = [
+            {
+                'artist': 'Drake',
+                'name': 'DOG HOUSE',
+                'genre': 'Hip Hop',
+                'mood': 'Energetic',
+                'popularity': 79
+            },
+            {
+                'artist': 'Twenty One Pilots',
+                'name': 'City Walls',
+                'genre': 'Alternative Rock',
+                'mood': 'Melancholic',
+                'popularity': 78
+            }
+        ]
     
-    for style_name in ['emoji_heavy', 'minimal', 'review_style', 'balanced']:
-        print(f"\n{style_name.upper()} STYLE:")
-        print("-" * 30)
+    with CaptionGenerator() as generator:
+        if args.stream:
+            asyncio.run(print_caption_stream(generator, tracks, week_start, use_cache=not args.no_cache))
+            return
         
-        result = generator.generate_caption(
-            tracks=sample_tracks,
-            week_start='2025-09-12',
-            style=style_name,
-            include_hashtags=True
-        )
+        print("Testing caption generation...")
+        print("=" * 50)
         
-        print(f"Caption: {result['caption']}")
-        print(f"Hashtags: {' '.join(result['hashtags'])}")
-        print(f"Method: {result['method']}")
-        print(f"Characters: {result['character_count']}")
+        result = generator.generate_variants(tracks, week_start, use_cache=not args.no_cache)
+    for style_name, variant in result['variants'].items():
+        print(f"\n{style_name.upper()} STYLE:")
+        print("-" * 30)
+        print(f"Caption: {variant['caption']}")
+        print(f"Method: {variant['method']}")
+        print(f"Characters: {variant['character_count']}")
+    print(f"\nHashtags: {' '.join(result['hashtags'])}")
+    
+    if args.week and args.save:
+        save_caption_variants(args.week, result)
 
 if __name__ == "__main__":
     main()
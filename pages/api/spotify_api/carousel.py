@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Streaming carousel generator for multi-slide Instagram posts
+Turns a week's full track list into a cover, tracklist pages and per-artist
+cards, rendering one slide at a time so memory stays flat however many slides
+the post has; each slide can be uploaded as soon as it is saved
+
+Usage:
+    python carousel.py --week 2025-10-10 --data output/nmf_data_20251010_101500.json
+    python carousel.py --week 2025-10-10 --upload
+"""
+
+import argparse
+import logging
+import os
+import sys
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from config import SpotifyConfig
+from cover_batch import cover_key, find_cover, load_tracks_from_file, load_tracks_from_supabase, preferred_first
+from image_encoding import encode_image
+from instrumentation import metrics
+from tracklist_template import get_tracklist_template, week_subtitle
+
+logger = logging.getLogger(__name__)
+
+
+class Slide(NamedTuple):
+    """A rendered carousel slide"""
+    index: int
+    kind: str  # 'cover', 'tracklist' or 'artist'
+    path: str
+
+
+def unique_tracks(tracks: List[Dict]) -> List[Dict]:
+    """Tracks without duplicates (same Spotify track), most popular first"""
+    seen = set()
+    unique = []
+    for track in sorted(tracks, key=lambda x: x.get('popularity', 0), reverse=True):
+        key = cover_key(track)
+        if key not in seen:
+            seen.add(key)
+            unique.append(track)
+    return unique
+
+
+def primary_artist(track: Dict) -> str:
+    """First credited artist of a track, as shown on its artist card"""
+    return (track.get('artist') or '').split(',')[0].strip()
+
+
+class CarouselGenerator:
+    """Renders a week's carousel slides lazily, one at a time"""
+
+    def __init__(self, automation, max_slides: int = SpotifyConfig.CAROUSEL_MAX_SLIDES):
+        """
+        Initialize the carousel generator
+
+        Args:
+            automation: SpotifyNewMusicAutomation used for rendering and uploads
+            max_slides: Most slides to produce (Instagram carousels hold up to 20)
+        """
+        self.automation = automation
+        self.max_slides = max_slides
+
+    def plan(self, tracks: List[Dict], preferences: Optional[Dict] = None) -> List[Dict]:
+        """
+        Slides the carousel will have, without rendering them
+
+        The week's preferred track leads the carousel and its custom image, if
+        any, is the cover, as in the weekly run.
+
+        Args:
+            tracks: The week's full track list
+            preferences: The week's images-table preferences (preferred_track_id, custom_image_url)
+
+        Returns:
+            One entry per slide: {'kind', 'tracks', 'first_number', 'custom_image_url'}
+        """
+        preferences = preferences or {}
+        tracks, _ = preferred_first(unique_tracks(tracks), preferences.get('preferred_track_id'))
+        if not tracks:
+            return []
+        page_size = SpotifyConfig.TRACKLIST_PAGE_SIZE
+        custom_image_url = preferences.get('custom_image_url')
+
+        slides = [{'kind': 'cover', 'tracks': tracks[:1], 'custom_image_url': custom_image_url}]
+        for start in range(0, len(tracks), page_size):
+            slides.append({'kind': 'tracklist', 'tracks': tracks[start:start + page_size], 'first_number': start + 1})
+
+        # One card per artist, for their most popular track; a generated cover already shows the lead artist
+        featured = set() if custom_image_url else {primary_artist(tracks[0]).lower()}
+        for track in tracks[0 if custom_image_url else 1:]:
+            artist = primary_artist(track).lower()
+            if artist and artist not in featured:
+                featured.add(artist)
+                slides.append({'kind': 'artist', 'tracks': [track]})
+
+        return slides[:self.max_slides]
+
+    def slides(self, tracks: List[Dict], week_start: str, preferences: Optional[Dict] = None) -> Iterator[Slide]:
+        """
+        Render the carousel one slide at a time
+
+        Each slide is rendered only when the caller asks for it, and no image is
+        kept once its file is written. Slides that fail to render are skipped.
+
+        Args:
+            tracks: The week's full track list
+            week_start: Week start date (YYYY-MM-DD)
+            preferences: The week's images-table preferences
+
+        Yields:
+            Slides in posting order
+        """
+        index = 0
+        for planned in self.plan(tracks, preferences):
+            filename = f"carousel_{week_start}_{index + 1:02d}_{planned['kind']}.png"
+            try:
+                with metrics.timer(f"carousel_{planned['kind']}"):
+                    path = self._render(planned, week_start, filename)
+            except Exception as e:
+                logger.error(f"❌ Error rendering {planned['kind']} slide: {e}")
+                path = None
+            if not path:
+                continue
+            index += 1
+            metrics.count('carousel_slides')
+            yield Slide(index, planned['kind'], path)
+
+    def publish(self, tracks: List[Dict], week_start: str, upload: bool = False,
+                preferences: Optional[Dict] = None) -> List[str]:
+        """
+        Render the carousel, uploading each slide as soon as it is ready
+
+        Args:
+            tracks: The week's full track list
+            week_start: Week start date (YYYY-MM-DD)
+            upload: Upload the slides and save their URLs to the images table
+            preferences: The week's images-table preferences
+
+        Returns:
+            Slide URLs if uploading, local paths otherwise, in posting order
+        """
+        results = []
+        for slide in self.slides(tracks, week_start, preferences):
+            print(f"   🖼️ Slide {slide.index} ({slide.kind}): {slide.path}")
+            if not upload:
+                results.append(slide.path)
+                continue
+            url = self.automation.upload_image_to_supabase(slide.path, week_start, f"carousel_{slide.index:02d}")
+            if url:
+                results.append(url)
+            else:
+                logger.warning(f"⚠️ Could not upload slide {slide.index}, leaving it out of the carousel")
+
+        if upload and results:
+            self.automation.save_carousel(week_start, results)
+        return results
+
+    def _render(self, planned: Dict, week_start: str, filename: str) -> Optional[str]:
+        if planned['kind'] == 'tracklist':
+            return self._render_tracklist_page(planned['tracks'], planned['first_number'], week_start, filename)
+        if planned['kind'] == 'cover':
+            if planned.get('custom_image_url'):
+                # A custom upload already has its overlay, so it is used as is
+                extension = os.path.splitext(planned['custom_image_url'].split('?')[0])[1] or '.png'
+                return self.automation.download_artist_image(
+                    planned['custom_image_url'], f"{os.path.splitext(filename)[0]}{extension}")
+            # A cover pre-rendered by the batch renderer (cover_batch.py) only needs a lookup
+            pre_rendered = find_cover(self.automation.config.OUTPUT_DIR, week_start, planned['tracks'][0])
+            if pre_rendered:
+                return pre_rendered
+        track = dict(planned['tracks'][0], week_start=week_start)
+        return self.automation.create_single_artist_image(track, self.automation.spotify, filename)
+
+    def _render_tracklist_page(self, tracks: List[Dict], first_number: int, week_start: str, filename: str) -> str:
+        """One page of the tracklist, numbered on from the previous pages"""
+        template = get_tracklist_template(week_subtitle(week_start))
+        canvas = template.new_canvas()
+        template.draw_rows(canvas, template.layout_rows(tracks, first_number))
+        canvas = template.finish(canvas)
+        output_path = os.path.join(self.automation.config.OUTPUT_DIR, filename)
+        return encode_image(canvas, output_path, SpotifyConfig.OUTPUT_FORMATS['tracklist'])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Render a week's multi-slide Instagram carousel")
+    parser.add_argument('--week', required=True, help="Week start date (YYYY-MM-DD)")
+    parser.add_argument('--data', help="nmf_data_*.json to read the tracks from (default: the Supabase tracks table)")
+    parser.add_argument('--max-slides', type=int, default=SpotifyConfig.CAROUSEL_MAX_SLIDES,
+                        help=f"Most slides to render (default {SpotifyConfig.CAROUSEL_MAX_SLIDES})")
+    parser.add_argument('--upload', action='store_true', help="Upload each slide as it is rendered and save the URLs")
+    args = parser.parse_args()
+
+    # Importing main also loads the .env file
+    from backfill import load_week_preferences
+    from main import SpotifyNewMusicAutomation
+
+    tracks = load_tracks_from_file(args.data) if args.data else load_tracks_from_supabase(args.week)
+    if not tracks:
+        print(f"❌ No tracks found for week {args.week}")
+        return 1
+    try:
+        preferences = load_week_preferences(args.week)
+    except Exception as e:
+        print(f"⚠️ Could not fetch preferences: {e}")
+        preferences = {}
+
+    automation = SpotifyNewMusicAutomation(os.getenv('SPOTIFY_CLIENT_ID'), os.getenv('SPOTIFY_CLIENT_SECRET'))
+    metrics.reset('carousel')
+    print(f"🎠 Carousel for {args.week}: {len(unique_tracks(tracks))} unique tracks")
+    results = CarouselGenerator(automation, max_slides=args.max_slides).publish(
+        tracks, args.week, upload=args.upload, preferences=preferences)
+    print(f"✅ {len(results)} slides {'uploaded' if args.upload else 'rendered'}")
+    return 0 if results else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Tile-based collage renderer
+Artist tiles are fetched and rendered concurrently, composited with one shared
+"New Music Friday" strip and pasted into a preallocated canvas as they finish;
+at most a fixed window of tiles is in memory at once, whatever the grid size
+"""
+
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from image_compositing import dim_and_composite
+from image_encoding import encode_image
+from image_loading import load_image
+from instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+STRIP_TEXT = "New Music Friday"
+STRIP_HEIGHT = 40
+TITLE_BAR_HEIGHT = 60
+
+
+@lru_cache(maxsize=None)
+def collage_font(size: int):
+    """Font of the collage labels: Arial on Windows, Pillow's default font elsewhere"""
+    try:
+        return ImageFont.truetype("Arial.ttf", size) if os.name == 'nt' else ImageFont.load_default()
+    except Exception:
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=None)
+def tile_strip(tile_size: int) -> Image.Image:
+    """Transparent tile-sized overlay with the "New Music Friday" strip along the bottom, built once per size"""
+    overlay = Image.new('RGBA', (tile_size, tile_size), (0, 0, 0, 0))
+    overlay.paste(Image.new('RGBA', (tile_size, STRIP_HEIGHT), (0, 0, 0, 150)), (0, tile_size - STRIP_HEIGHT))
+    draw = ImageDraw.Draw(overlay)
+    font = collage_font(12)
+    text_bbox = draw.textbbox((0, 0), STRIP_TEXT, font=font)
+    text_x = (tile_size - (text_bbox[2] - text_bbox[0])) // 2
+    draw.text((text_x, tile_size - 35), STRIP_TEXT, fill=(255, 255, 255, 255), font=font)
+    return overlay
+
+
+@lru_cache(maxsize=None)
+def placeholder_tile(tile_size: int, background: str, foreground: str) -> Image.Image:
+    """Tile shown when a track has no artist image"""
+    placeholder = Image.new('RGB', (tile_size, tile_size), background)
+    ImageDraw.Draw(placeholder).text((tile_size // 2, tile_size // 2), "?", fill=foreground,
+                                     anchor="mm", font=collage_font(12))
+    return placeholder
+
+
+class CollageRenderer:
+    """Renders the artist collage with a worker pool"""
+
+    def __init__(self, automation, max_workers: int = 4):
+        """
+        Initialize the collage renderer
+
+        Args:
+            automation: SpotifyNewMusicAutomation used for artist lookups and downloads
+            max_workers: Size of the worker pool for lookups, downloads and tile renders
+        """
+        self.automation = automation
+        self.config = automation.config
+        self.max_workers = max_workers
+
+    def layout(self) -> Tuple[int, int, int, int, int]:
+        """
+        Tile size and grid placement on the canvas
+
+        Tiles are ALBUM_ART_SIZE where the grid fits the canvas and shrink to fit otherwise.
+
+        Returns:
+            (cols, rows, tile_size, margin_x, margin_y)
+        """
+        cols, rows = self.config.COLLAGE_GRID
+        canvas_width, canvas_height = self.config.CANVAS_SIZE
+        tile_size = min(self.config.ALBUM_ART_SIZE, canvas_width // cols, canvas_height // rows)
+        return cols, rows, tile_size, (canvas_width - cols * tile_size) // 2, (canvas_height - rows * tile_size) // 2
+
+    def render(self, tracks: List[Dict], output_filename: str) -> str:
+        """
+        Render the collage of the first COLLAGE_GRID tracks
+
+        Args:
+            tracks: Track dictionaries
+            output_filename: Output filename, relative to OUTPUT_DIR
+
+        Returns:
+            Path of the saved collage
+        """
+        cols, rows, tile_size, margin_x, margin_y = self.layout()
+        canvas_width, canvas_height = self.config.CANVAS_SIZE
+        canvas = Image.new('RGB', (canvas_width, canvas_height), self.config.SPOTIFY_BLACK)
+        placeholder = placeholder_tile(tile_size, self.config.SPOTIFY_GRAY, self.config.SPOTIFY_WHITE)
+        tracks_to_use = tracks[:cols * rows]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='collage') as pool:
+            spotify = self.automation.spotify
+            artist_ids = list(pool.map(lambda track: self.automation.resolve_cover_artist_id(track, spotify),
+                                       tracks_to_use))
+
+            # Tracks by the same artist share one tile; a bounded window of tile renders keeps memory flat
+            positions: Dict[str, List[Tuple[int, int]]] = {}
+            for i, artist_id in enumerate(artist_ids):
+                x = margin_x + (i % cols) * tile_size
+                y = margin_y + (i // cols) * tile_size
+                if artist_id:
+                    positions.setdefault(artist_id, []).append((x, y))
+                else:
+                    canvas.paste(placeholder, (x, y))
+
+            window = 2 * self.max_workers
+            pending = {}
+            queue = list(positions)
+            while queue or pending:
+                while queue and len(pending) < window:
+                    artist_id = queue.pop(0)
+                    pending[pool.submit(self._render_tile, artist_id, tile_size)] = artist_id
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    tile = future.result() or placeholder
+                    for position in positions[pending.pop(future)]:
+                        canvas.paste(tile, position)
+
+        self._draw_title(canvas)
+
+        output_path = os.path.join(self.config.OUTPUT_DIR, output_filename)
+        return encode_image(canvas, output_path, self.config.OUTPUT_FORMATS['collage'])
+
+    def _render_tile(self, artist_id: str, tile_size: int) -> Optional[Image.Image]:
+        """Download an artist's image and render it as a collage tile"""
+        url = self.automation.get_artist_image_url(artist_id, self.automation.spotify)
+        if not url:
+            return None
+        art_path = self.automation.download_artist_image(url, f"collage_artist_{artist_id}.jpg")
+        if not art_path:
+            return None
+        try:
+            with metrics.timer('collage_tile'):
+                return dim_and_composite(load_image(art_path, (tile_size, tile_size)), tile_strip(tile_size))
+        except Exception as e:
+            logger.warning(f"⚠️ Error processing artist image {artist_id}: {e}")
+            return None
+        finally:
+            if os.path.exists(art_path):
+                os.remove(art_path)
+
+    def _draw_title(self, canvas: Image.Image) -> None:
+        """Green title bar with the date across the top of the collage"""
+        draw = ImageDraw.Draw(canvas)
+        title_font = collage_font(36)
+        title = f"New Music Friday - {datetime.now().strftime('%B %d, %Y')}"
+        title_bbox = draw.textbbox((0, 0), title, font=title_font)
+        title_x = (canvas.width - (title_bbox[2] - title_bbox[0])) // 2
+        draw.rectangle([0, 0, canvas.width, TITLE_BAR_HEIGHT], fill=self.config.SPOTIFY_GREEN)
+        draw.text((title_x, 15), title, fill=self.config.SPOTIFY_WHITE, font=title_font)
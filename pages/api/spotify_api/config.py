@@ -16,6 +16,11 @@ class SpotifyConfig:
     COLLAGE_GRID = (4, 5)  # 4 columns, 5 rows = 20 tracks
     ALBUM_ART_SIZE = 200
     CANVAS_SIZE = (1080, 1080)
+    # Largest source image (width * height) decoded; bigger uploads are rejected
+    MAX_SOURCE_PIXELS = 64_000_000
+    
+    # Bump whenever cover/tracklist rendering changes so incremental runs re-render
+    TEMPLATE_VERSION = 2
     
     # Colors (Spotify brand colors)
     SPOTIFY_GREEN = "#1DB954"
@@ -25,7 +30,28 @@ class SpotifyConfig:
     
     # Output Settings
     OUTPUT_DIR = "output"
+    # Encoder per artifact type ('png', 'jpeg' or 'webp', see image_encoding.py).
+    # Instagram only accepts JPEG posts, so photographic artifacts default to JPEG.
+    OUTPUT_FORMATS = {
+        'cover': 'jpeg',
+        'collage': 'jpeg',
+        'tracklist': 'png',
+    }
     TRACK_LIMIT = 20
+    # Multi-slide posts: tracks per tracklist page and most slides per carousel (Instagram's limit)
+    TRACKLIST_PAGE_SIZE = 10
+    CAROUSEL_MAX_SLIDES = 20
+    # Output retention (retention.py): newest artifacts of each kind kept per week,
+    # and the age in weeks after which an uploaded week's artifacts are deleted.
+    # Off by default; preview with `python retention.py --dry-run` before enabling
+    RETENTION_ENABLED = False
+    RETENTION_KEEP_PER_WEEK = 2
+    RETENTION_MAX_AGE_WEEKS = 12
+    # Per-week state files runs resume from; never deleted
+    RETENTION_PROTECTED_KINDS = ('run_state', 'fingerprints', 'caption_cache')
+    # Track data is the only copy of a week's tracks; it never expires and only
+    # re-runs beyond the newest RETENTION_KEEP_PER_WEEK are deleted
+    RETENTION_DATA_KINDS = ('nmf_data', 'enhanced_data')
     
     # API Settings
     REQUEST_TIMEOUT = 10
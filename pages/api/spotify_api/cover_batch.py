@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Batch cover rendering for every candidate track of a week
+Renders all covers in one process and stores them as a set keyed by Spotify
+track ID, so choosing a different cover track is a lookup instead of a new run
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from config import SpotifyConfig
+from fingerprints import compute_fingerprint
+from instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+COVER_SET_INDEX = 'index.json'
+
+
+def cover_key(track: Dict) -> str:
+    """
+    Key of a track in the cover set: its Spotify track ID
+
+    Tracks without an ID (e.g. rows loaded from the tracks table) fall back to
+    the ID in their spotify_url, then to a hash of artist and name.
+    """
+    if track.get('id') and not str(track['id']).isdigit():
+        return str(track['id'])
+    match = re.search(r'/track/([A-Za-z0-9]+)', track.get('spotify_url') or '')
+    if match:
+        return match.group(1)
+    return compute_fingerprint([track.get('artist'), track.get('name')])[:22]
+
+
+def cover_fingerprint(track: Dict) -> str:
+    """Fingerprint of everything a rendered cover depends on"""
+    return compute_fingerprint({
+        'template_version': SpotifyConfig.TEMPLATE_VERSION,
+        'output_format': SpotifyConfig.OUTPUT_FORMATS['cover'],
+        'name': track.get('name'),
+        'artist': track.get('artist'),
+        'artist_ids': track.get('artist_ids')
+    })
+
+
+def cover_set_dir(output_dir: str, week_start: str) -> str:
+    """Directory holding a week's cover set"""
+    return os.path.join(output_dir, f"covers_{week_start}")
+
+
+def load_cover_set(output_dir: str, week_start: str) -> Dict[str, Dict]:
+    """Read a week's cover set index ({key: entry}); empty if none was rendered"""
+    path = os.path.join(cover_set_dir(output_dir, week_start), COVER_SET_INDEX)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Could not read cover set {path}: {e}")
+        return {}
+
+
+def find_cover(output_dir: str, week_start: str, track: Dict) -> Optional[str]:
+    """
+    Look up a pre-rendered cover for a track
+
+    Args:
+        output_dir: Output directory
+        week_start: Week start date (YYYY-MM-DD)
+        track: Track the cover is wanted for
+
+    Returns:
+        Path of the cover if it was rendered from the same inputs and still exists, None otherwise
+    """
+    entry = load_cover_set(output_dir, week_start).get(cover_key(track))
+    if not entry or entry.get('fingerprint') != cover_fingerprint(track):
+        return None
+    path = entry.get('path')
+    return path if path and os.path.exists(path) else None
+
+
+def preferred_first(tracks: List[Dict], preferred_track_id: Optional[str]) -> Tuple[List[Dict], Optional[Dict]]:
+    """
+    Move the week's preferred track to the front, as the weekly run orders its tracks
+
+    The images table stores the chosen track's tracks-table row ID, carried as
+    track_id by load_tracks_from_supabase; the track's own or Spotify ID also matches.
+
+    Args:
+        tracks: The week's tracks in display order
+        preferred_track_id: ID of the track chosen for the cover, if any
+
+    Returns:
+        (reordered tracks, the preferred track or None if it was not found)
+    """
+    tracks = list(tracks)
+    if not preferred_track_id:
+        return tracks, None
+    for track in tracks:
+        track_ids = (track.get('track_id'), track.get('id'), cover_key(track))
+        if str(preferred_track_id) in {str(track_id) for track_id in track_ids if track_id is not None}:
+            tracks.remove(track)
+            tracks.insert(0, track)
+            return tracks, track
+    return tracks, None
+
+
+class CoverBatchRenderer:
+    """Renders the covers of all candidate tracks of a week with a worker pool"""
+
+    def __init__(self, automation, max_workers: int = 4):
+        """
+        Initialize the batch renderer
+
+        Args:
+            automation: SpotifyNewMusicAutomation used for artist lookups, rendering and uploads
+            max_workers: Size of the worker pool for downloads, renders and uploads
+        """
+        self.automation = automation
+        self.max_workers = max_workers
+
+    def render_week(self, tracks: List[Dict], week_start: str, upload: bool = False) -> Dict[str, Dict]:
+        """
+        Render a cover for every track of the week
+
+        Covers already rendered from the same inputs are kept. Artist images are
+        downloaded once per artist, concurrently, and shared by that artist's tracks.
+
+        Args:
+            tracks: Candidate tracks of the week
+            week_start: Week start date (YYYY-MM-DD)
+            upload: Also upload the covers and save their URLs to the images table
+
+        Returns:
+            The week's cover set index ({key: entry})
+        """
+        output_dir = self.automation.config.OUTPUT_DIR
+        set_dir = cover_set_dir(output_dir, week_start)
+        os.makedirs(set_dir, exist_ok=True)
+        index = load_cover_set(output_dir, week_start)
+
+        pending = {}
+        for track in tracks:
+            key = cover_key(track)
+            if key in pending:
+                continue
+            entry = index.get(key)
+            if entry and entry.get('fingerprint') == cover_fingerprint(track) and os.path.exists(entry.get('path', '')):
+                continue
+            pending[key] = track
+
+        print(f"🎨 Cover set for {week_start}: {len(tracks)} tracks, {len(pending)} to render")
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='cover-batch') as pool:
+            # Resolve artists, then download each artist's image once
+            spotify = self.automation.spotify
+            artist_ids = dict(zip(pending, pool.map(
+                lambda track: self.automation.resolve_cover_artist_id(track, spotify), pending.values())))
+            unique_artists = sorted({artist_id for artist_id in artist_ids.values() if artist_id})
+            artwork = dict(zip(unique_artists, pool.map(self._fetch_artist_image, unique_artists)))
+
+            jobs = {key: pool.submit(self._render, key, track, artwork.get(artist_ids[key]), set_dir)
+                    for key, track in pending.items()}
+            rendered = 0
+            for key, job in jobs.items():
+                entry = job.result()
+                if entry:
+                    index[key] = entry
+                    rendered += 1
+
+            if upload:
+                uploads = {key: pool.submit(self.automation.upload_image_to_supabase, entry['path'], week_start,
+                                            f"cover_{key}")
+                           for key, entry in index.items() if not entry.get('url') or key in pending}
+                for key, job in uploads.items():
+                    url = job.result()
+                    if url:
+                        index[key]['url'] = url
+
+        self._save_index(os.path.join(set_dir, COVER_SET_INDEX), index)
+        if upload:
+            cover_urls = {key: entry['url'] for key, entry in index.items() if entry.get('url')}
+            self.automation.save_cover_set(week_start, cover_urls)
+
+        print(f"✅ Cover set ready: {len(index)} covers ({rendered} rendered this run) in {set_dir}")
+        return index
+
+    def _fetch_artist_image(self, artist_id: str) -> Optional[bytes]:
+        """Download an artist's image into memory"""
+        url = self.automation.get_artist_image_url(artist_id, self.automation.spotify)
+        if not url:
+            return None
+        path = self.automation.download_artist_image(url, f"cover_batch_artist_{artist_id}.jpg")
+        if not path:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        finally:
+            os.remove(path)
+
+    def _render(self, key: str, track: Dict, artwork: Optional[bytes], set_dir: str) -> Optional[Dict]:
+        """Render one cover from its artist's downloaded image"""
+        if not artwork:
+            logger.warning(f"⚠️ No artist image for {track.get('name', 'Unknown')}, skipping its cover")
+            return None
+        try:
+            with metrics.timer('cover_batch_render'):
+                # render_single_artist_image writes under OUTPUT_DIR; the set lives in a subdirectory of it
+                filename = os.path.relpath(os.path.join(set_dir, f"{key}.png"), self.automation.config.OUTPUT_DIR)
+                path = self.automation.render_single_artist_image(track, artwork, filename)
+        except Exception as e:
+            logger.error(f"❌ Error rendering cover for {track.get('name', 'Unknown')}: {e}")
+            return None
+        metrics.count('covers_rendered')
+        return {
+            'track_name': track.get('name'),
+            'artist': track.get('artist'),
+            'spotify_url': track.get('spotify_url'),
+            'path': path,
+            'fingerprint': cover_fingerprint(track),
+            'rendered_at': datetime.now().isoformat()
+        }
+
+    def _save_index(self, path: str, index: Dict[str, Dict]) -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def load_tracks_from_file(path: str) -> List[Dict]:
+    """Tracks saved by save_track_data (nmf_data_*.json)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('tracks', [])
+
+
+def load_tracks_from_supabase(week_start: str) -> List[Dict]:
+    """A week's rows from the Supabase tracks table, shaped like the automation's track dicts"""
+    from supabase import create_client
+
+    supabase = create_client(os.getenv('NEXT_PUBLIC_SUPABASE_URL'), os.getenv('SUPABASE_SERVICE_KEY'))
+    metrics.count('db_round_trips')
+    rows = supabase.table('tracks').select('*').eq('week_start', week_start).execute().data or []
+    return [{
+        'track_id': row.get('id'),
+        'name': row.get('track_name'),
+        'artist': row.get('artists'),
+        'album': row.get('album'),
+        'spotify_url': row.get('spotify_url'),
+        'album_art_url': row.get('album_art_url'),
+        'popularity': row.get('popularity', 0),
+        'playlist_source': row.get('playlist_name'),
+        'week_start': week_start
+    } for row in rows]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Render covers for every candidate track of a week")
+    parser.add_argument('--week', required=True, help="Week start date (YYYY-MM-DD)")
+    parser.add_argument('--data', help="nmf_data_*.json to read the tracks from (default: the Supabase tracks table)")
+    parser.add_argument('--workers', type=int, default=4, help="Worker pool size (default 4)")
+    parser.add_argument('--upload', action='store_true', help="Upload the covers and save their URLs")
+    args = parser.parse_args()
+
+    # Importing main also loads the .env file
+    from main import SpotifyNewMusicAutomation
+
+    tracks = load_tracks_from_file(args.data) if args.data else load_tracks_from_supabase(args.week)
+    if not tracks:
+        print(f"❌ No tracks found for week {args.week}")
+        return 1
+
+    automation = SpotifyNewMusicAutomation(os.getenv('SPOTIFY_CLIENT_ID'), os.getenv('SPOTIFY_CLIENT_SECRET'))
+    metrics.reset('cover_batch')
+    CoverBatchRenderer(automation, max_workers=args.workers).render_week(tracks, args.week, upload=args.upload)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Local cache of generated DALL-E images
+Keeps each generated image with its request metadata, keyed by the request
+parameters and a hash of the prompt, so an identical request is served from
+disk instead of paying for a new generation
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from fingerprints import compute_fingerprint
+from instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def dalle_cache_key(model: str, size: str, quality: str, style: str, prompt: str) -> str:
+    """
+    Key of a generated image
+
+    Args:
+        model: Image model, e.g. 'dall-e-3'
+        size: Image size, e.g. '1024x1024'
+        quality: Image quality, e.g. 'hd'
+        style: Image style, e.g. 'natural'
+        prompt: Prompt sent to the model
+
+    Returns:
+        Hex digest identifying the image
+    """
+    return compute_fingerprint({
+        'model': model,
+        'size': size,
+        'quality': quality,
+        'style': style,
+        'prompt_sha256': hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    })
+
+
+class DalleImageCache:
+    """Directory of generated images with an index, evicted by age and total size"""
+
+    MAX_AGE = 30 * 24 * 3600
+    MAX_BYTES = 500 * 1024 * 1024
+
+    def __init__(self, cache_dir: str, max_age: Optional[float] = MAX_AGE, max_bytes: Optional[int] = MAX_BYTES):
+        """
+        Initialize the cache, loading the index left by earlier runs
+
+        Args:
+            cache_dir: Directory the images and index.json are kept in
+            max_age: Seconds an image is kept after it was generated; None keeps it indefinitely
+            max_bytes: Most bytes of images to keep, dropping the least recently used first; None for no limit
+        """
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f).get('entries', {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Ignoring unreadable DALL-E cache index {self.index_path}: {e}")
+
+    def get(self, key: str, output_path: str) -> Optional[Dict]:
+        """
+        Copy a cached image to output_path, counting the hit or miss
+
+        Args:
+            key: Key from dalle_cache_key
+            output_path: Where to write the image
+
+        Returns:
+            The image's metadata, or None if it is not cached (or has expired)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            path = os.path.join(self.cache_dir, entry['file']) if entry else None
+            fresh = entry is not None and not self._expired(entry) and os.path.exists(path)
+            if fresh:
+                shutil.copyfile(path, output_path)
+                entry['last_used'] = time.time()
+                entry['hits'] = entry.get('hits', 0) + 1
+                self._save()
+        metrics.count('dalle_cache_hits' if fresh else 'dalle_cache_misses')
+        return dict(entry['metadata']) if fresh else None
+
+    def put(self, key: str, image_path: str, metadata: Dict[str, Any]) -> None:
+        """
+        Store a copy of a generated image, then evict to stay within the limits
+
+        Args:
+            key: Key from dalle_cache_key
+            image_path: The generated image
+            metadata: Request parameters and response details to keep with it
+        """
+        filename = f"{key}{os.path.splitext(image_path)[1] or '.png'}"
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = os.path.join(self.cache_dir, f"{filename}.tmp")
+            shutil.copyfile(image_path, tmp_path)
+            os.replace(tmp_path, os.path.join(self.cache_dir, filename))
+            now = time.time()
+            self._entries[key] = {
+                'file': filename,
+                'bytes': os.path.getsize(image_path),
+                'stored_at': now,
+                'last_used': now,
+                'metadata': metadata
+            }
+            self._evict()
+            self._save()
+
+    def evict(self) -> int:
+        """Drop expired images, then the least recently used until under max_bytes; returns how many were dropped"""
+        with self._lock:
+            removed = self._evict()
+            self._save()
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Number of images, total bytes and hits of the cache"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': sum(entry['bytes'] for entry in self._entries.values()),
+                'hits': sum(entry.get('hits', 0) for entry in self._entries.values())
+            }
+
+    def _expired(self, entry: Dict) -> bool:
+        return self.max_age is not None and time.time() - entry['stored_at'] > self.max_age
+
+    def _evict(self) -> int:
+        doomed = [key for key, entry in self._entries.items() if self._expired(entry)]
+        if self.max_bytes is not None:
+            kept = sorted((key for key in self._entries if key not in doomed),
+                          key=lambda key: self._entries[key]['last_used'], reverse=True)
+            total = 0
+            for key in kept:
+                total += self._entries[key]['bytes']
+                if total > self.max_bytes:
+                    doomed.append(key)
+
+        for key in doomed:
+            entry = self._entries.pop(key)
+            try:
+                os.remove(os.path.join(self.cache_dir, entry['file']))
+            except FileNotFoundError:
+                pass
+        if doomed:
+            metrics.count('dalle_cache_evictions', len(doomed))
+            logger.info(f"🧹 Evicted {len(doomed)} cached DALL-E images")
+        return len(doomed)
+
+    def _save(self) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'entries': self._entries}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
@@ -4,16 +4,22 @@ Instagram Image Generator using OpenAI DALL-E API
 Actually generates real images, not just prompts
 """
 
-import glob
+import argparse
 import json
 import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import requests
+from artifact_manifest import ArtifactManifest, record_artifact
+from dalle_cache import DalleImageCache, dalle_cache_key
 from dotenv import load_dotenv
+from instrumentation import metrics
 from PIL import Image, ImageDraw, ImageFont
+from requests.adapters import HTTPAdapter
 
 # Load environment variables from .env file
 load_dotenv('../../../.env')
@@ -25,47 +31,85 @@ logger = logging.getLogger(__name__)
 class DALLEImageGenerator:
     """Generate Instagram-ready images using OpenAI DALL-E API"""
     
-    def __init__(self, openai_api_key: str):
-        """Initialize the OpenAI API client"""
+    # (connect, read) timeouts in seconds; an HD generation routinely takes 30-60s
+    GENERATION_TIMEOUT = (10, 120)
+    DOWNLOAD_TIMEOUT = (10, 60)
+    DOWNLOAD_CHUNK_SIZE = 64 * 1024
+    MAX_WORKERS = 3
+    IMAGE_PARAMS = {
+        "model": "dall-e-3",
+        "n": 1,
+        "size": "1024x1024",  # Square format for Instagram
+        "quality": "hd",
+        "style": "natural"
+    }
+    
+    def __init__(self, openai_api_key: str, session: Optional[requests.Session] = None,
+                 cache_dir: Optional[str] = os.path.join("output", "dalle_cache"), use_cache: bool = True):
+        """
+        Initialize the OpenAI API client
+        
+        Args:
+            openai_api_key: OpenAI API key
+            session: HTTP session to use (default: a pooled session sized for MAX_WORKERS)
+            cache_dir: Directory of the generated image cache; None disables caching
+            use_cache: Serve repeated prompts from the cache; False always generates (results are still cached)
+        """
         self.openai_api_key = openai_api_key
         self.api_url = "https://api.openai.com/v1/images/generations"
+        self.session = session or self._create_session()
+        self.cache = DalleImageCache(cache_dir) if cache_dir else None
+        self.use_cache = use_cache
+        
+    def _create_session(self) -> requests.Session:
+        """Session whose connection pools can serve every concurrent generation"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.MAX_WORKERS, pool_maxsize=self.MAX_WORKERS)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
         
     def generate_image_with_dalle(self, prompt: str, output_path: str) -> bool:
         """Generate image using DALL-E API and save to file"""
         try:
+            params = self.IMAGE_PARAMS
+            key = dalle_cache_key(params['model'], params['size'], params['quality'], params['style'], prompt)
+            if self.cache and self.use_cache and self.cache.get(key, output_path):
+                record_artifact(output_path)
+                logger.info(f"♻️ Reused cached image for an identical prompt: {output_path}")
+                return True
+            
             logger.info(f"Generating image with DALL-E...")
             
+            # The key is sent per request so it never reaches the image download host
             headers = {
                 "Authorization": f"Bearer {self.openai_api_key}",
                 "Content-Type": "application/json"
             }
             
-            data = {
-                "model": "dall-e-3",
-                "prompt": prompt,
-                "n": 1,
-                "size": "1024x1024",  # Square format for Instagram
-                "quality": "hd",
-                "style": "natural"
-            }
+            data = dict(params, prompt=prompt)
             
-            response = requests.post(self.api_url, headers=headers, json=data)
+            metrics.count('openai_calls')
+            with metrics.timer('dalle_generation'):
+                response = self.session.post(self.api_url, headers=headers, json=data,
+                                             timeout=self.GENERATION_TIMEOUT)
             
             if response.status_code == 200:
                 result = response.json()
                 image_url = result['data'][0]['url']
                 
                 # Download and save the image
-                img_response = requests.get(image_url)
-                if img_response.status_code == 200:
-                    with open(output_path, 'wb') as f:
-                        f.write(img_response.content)
-                    
-                    logger.info(f"✅ Image saved to: {output_path}")
-                    return True
-                else:
-                    logger.error(f"Failed to download image: {img_response.status_code}")
-                    return False
+                with metrics.timer('dalle_download'):
+                    if not self._download_image(image_url, output_path):
+                        return False
+                
+                if self.cache:
+                    self.cache.put(key, output_path, {
+                        **data,
+                        'revised_prompt': result['data'][0].get('revised_prompt'),
+                        'created': result.get('created')
+                    })
+                return True
             else:
                 logger.error(f"DALL-E API error: {response.status_code} - {response.text}")
                 return False
@@ -74,18 +118,48 @@ class DALLEImageGenerator:
             logger.error(f"Error generating image: {e}")
             return False
     
+    def _download_image(self, image_url: str, output_path: str) -> bool:
+        """Stream a generated image to disk in chunks, so a partial download never replaces a file"""
+        tmp_path = f"{output_path}.part"
+        try:
+            with self.session.get(image_url, stream=True, timeout=self.DOWNLOAD_TIMEOUT) as img_response:
+                metrics.count('http_downloads')
+                if img_response.status_code != 200:
+                    logger.error(f"Failed to download image: {img_response.status_code}")
+                    return False
+                
+                size = 0
+                with open(tmp_path, 'wb') as f:
+                    for chunk in img_response.iter_content(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+                        size += len(chunk)
+            
+            os.replace(tmp_path, output_path)
+            record_artifact(output_path)
+            metrics.count('bytes_downloaded', size)
+            logger.info(f"✅ Image saved to: {output_path}")
+            return True
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def _generate_timed(self, prompt: str, output_path: str) -> Tuple[bool, float]:
+        """Generate one image, returning whether it succeeded and how long it took"""
+        started = time.perf_counter()
+        success = self.generate_image_with_dalle(prompt, output_path)
+        return success, time.perf_counter() - started
+    
     def find_latest_tracks_data(self, output_dir: str = "output") -> Optional[Dict]:
         """Find the most recent enhanced_data JSON file"""
         try:
-            pattern = os.path.join(output_dir, "enhanced_data_*.json")
-            json_files = glob.glob(pattern)
-            
-            if not json_files:
+            # The pipeline records every save in the manifest; latest() indexes any
+            # file written without being recorded
+            entry = ArtifactManifest(output_dir).latest('enhanced_data')
+            if not entry:
                 logger.error(f"No enhanced_data JSON files found in {output_dir}")
                 return None
             
-            # Sort by modification time, get the most recent
-            latest_file = max(json_files, key=os.path.getmtime)
+            latest_file = entry['path']
             logger.info(f"Found latest tracks data: {latest_file}")
             
             with open(latest_file, 'r', encoding='utf-8') as f:
@@ -206,37 +280,49 @@ Style: Modern, premium design, dark gradient background, professional typography
         # Generate timestamp for filenames
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        # 1. Artist Collage
-        logger.info("🎨 Generating artist collage...")
-        artist_prompt = self.generate_artist_collage_prompt(top_artists, tracks)
-        artist_path = os.path.join(output_dir, f"dalle_artist_collage_{timestamp}.png")
-        
-        if self.generate_image_with_dalle(artist_prompt, artist_path):
-            results['artist_collage'] = artist_path
-            logger.info(f"✅ Artist collage: {artist_path}")
+        jobs = {
+            'artist_collage': ("Artist collage", self.generate_artist_collage_prompt(top_artists, tracks),
+                               os.path.join(output_dir, f"dalle_artist_collage_{timestamp}.png")),
+            'tracklist': ("Tracklist", self.generate_tracklist_prompt(tracks),
+                          os.path.join(output_dir, f"dalle_tracklist_{timestamp}.png")),
+            'weekly_update': ("Weekly update", self.generate_weekly_update_prompt(tracks, top_artists),
+                              os.path.join(output_dir, f"dalle_weekly_update_{timestamp}.png")),
+        }
         
-        # 2. Tracklist Image
-        logger.info("📱 Generating tracklist image...")
-        tracklist_prompt = self.generate_tracklist_prompt(tracks)
-        tracklist_path = os.path.join(output_dir, f"dalle_tracklist_{timestamp}.png")
-        
-        if self.generate_image_with_dalle(tracklist_prompt, tracklist_path):
-            results['tracklist'] = tracklist_path
-            logger.info(f"✅ Tracklist: {tracklist_path}")
-        
-        # 3. Weekly Update
-        logger.info("🎵 Generating weekly update...")
-        weekly_prompt = self.generate_weekly_update_prompt(tracks, top_artists)
-        weekly_path = os.path.join(output_dir, f"dalle_weekly_update_{timestamp}.png")
+        # The generations are independent, so run them together; each image is
+        # written as soon as its own download finishes
+        logger.info(f"🚀 Generating {len(jobs)} images concurrently...")
+        latencies = {}
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            futures = {
+                executor.submit(self._generate_timed, prompt, path): name
+                for name, (_, prompt, path) in jobs.items()
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                label, _, path = jobs[name]
+                success, latencies[name] = future.result()
+                if success:
+                    results[name] = path
+                    logger.info(f"✅ {label} ready in {latencies[name]:.1f}s: {path}")
+                else:
+                    logger.error(f"❌ {label} failed after {latencies[name]:.1f}s")
         
-        if self.generate_image_with_dalle(weekly_prompt, weekly_path):
-            results['weekly_update'] = weekly_path
-            logger.info(f"✅ Weekly update: {weekly_path}")
+        logger.info(f"⏱️ Image latency (total {time.perf_counter() - started:.1f}s):")
+        for name in jobs:
+            status = "ok" if name in results else "failed"
+            logger.info(f"   {name}: {latencies[name]:.1f}s ({status})")
         
-        return results
+        # Keep the usual image order regardless of which finished first
+        return {name: results[name] for name in jobs if name in results}
 
 def main():
     """Main function to run the image generator"""
+    parser = argparse.ArgumentParser(description="Generate Instagram images with DALL-E from the latest tracks data")
+    parser.add_argument('--no-cache', action='store_true', help="Generate every image even if an identical prompt is cached")
+    args = parser.parse_args()
+    
     # Get API key from environment
     openai_api_key = os.getenv('OPENAI_API_KEY')
     if not openai_api_key:
@@ -246,7 +332,7 @@ def main():
         return False
     
     # Initialize generator
-    generator = DALLEImageGenerator(openai_api_key)
+    generator = DALLEImageGenerator(openai_api_key, use_cache=not args.no_cache)
     
     # Generate all images
     logger.info("🚀 Starting DALL-E image generation...")
@@ -235,7 +235,8 @@ class EmailNotifier:
     def _send_email(self, subject: str, html_content: str) -> bool:
         """Send email via SendGrid API"""
         try:
-            url = "https://api.sendgrid.com/v3/mail/send"
+            # Overridable so the offline benchmark can point it at a local stand-in
+            url = os.getenv('SENDGRID_API_URL', "https://api.sendgrid.com/v3/mail/send")
             
             # Debug the API key before using it
             logger.info(f"🔍 Using API key type: {type(self.api_key)}")
@@ -0,0 +1,107 @@
+"""
+Input fingerprints for incremental re-runs
+Stores a hash of each artifact's inputs next to the week's outputs
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Tuple
+
+from run_journal import find_artifacts
+
+logger = logging.getLogger(__name__)
+
+
+def compute_fingerprint(inputs: Any) -> str:
+    """
+    Hash a JSON-serializable description of a stage's inputs
+
+    Args:
+        inputs: Values the stage output depends on
+
+    Returns:
+        Hex SHA-256 digest of the canonical JSON encoding
+    """
+    encoded = json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def track_set_fingerprint(tracks: list) -> list:
+    """Reduce tracks to the fields that affect generated artifacts, in order"""
+    return [
+        [track.get('id'), track.get('name'), track.get('artist'), track.get('popularity'), track.get('playlist_source')]
+        for track in tracks
+    ]
+
+
+class FingerprintStore:
+    """Per-week record of the fingerprint and result of every completed stage"""
+
+    def __init__(self, path: str):
+        """
+        Initialize the store, loading any fingerprints from a previous run
+
+        Args:
+            path: JSON file the fingerprints are kept in
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f).get('stages', {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Ignoring unreadable fingerprint file {path}: {e}")
+
+    @classmethod
+    def for_week(cls, output_dir: str, week_start: str) -> 'FingerprintStore':
+        """Open the fingerprint store for a week's outputs"""
+        return cls(os.path.join(output_dir, f"fingerprints_{week_start}.json"))
+
+    def lookup(self, stage: str, fingerprint: str) -> Tuple[bool, Any]:
+        """
+        Look up a stage's stored result
+
+        A stored result is only usable while all of its recorded artifacts still exist.
+
+        Args:
+            stage: Stage name
+            fingerprint: Fingerprint of the stage's current inputs
+
+        Returns:
+            (hit, result) where hit is True if the inputs are unchanged and the artifacts exist
+        """
+        with self._lock:
+            entry = self._entries.get(stage)
+        if not entry or entry.get('fingerprint') != fingerprint:
+            return False, None
+
+        missing = [path for path in entry.get('artifacts', []) if not os.path.exists(path)]
+        if missing:
+            logger.warning(f"⚠️ Stored result for stage '{stage}' is missing artifacts {missing}, rerunning it")
+            return False, None
+        return True, entry.get('result')
+
+    def record(self, stage: str, fingerprint: str, result: Any) -> None:
+        """Record a stage's fingerprint, result and artifact paths, then persist the store"""
+        with self._lock:
+            self._entries[stage] = {
+                'fingerprint': fingerprint,
+                'artifacts': find_artifacts(result),
+                'result': result,
+                'updated_at': datetime.now().isoformat()
+            }
+            self._save()
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'stages': self._entries}, f, indent=2, ensure_ascii=False, default=str)
+        os.replace(tmp_path, self.path)
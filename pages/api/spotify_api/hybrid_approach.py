@@ -8,6 +8,7 @@ import random
 from typing import Dict, List
 
 import spotipy
+from instrumentation import metrics
 from spotipy.oauth2 import SpotifyOAuth
 
 
@@ -37,6 +38,7 @@ class HybridSpotifyFetcher:
         print(f"🎵 Getting Release Radar tracks from your playlist...")
         
         try:
+            metrics.count('spotify_api_calls')
             tracks = self.spotify.playlist_tracks(playlist_id, limit=50)
             result_tracks = []
             
@@ -94,6 +96,7 @@ class HybridSpotifyFetcher:
             
             for search_term in search_terms:
                 try:
+                    metrics.count('spotify_api_calls')
                     results = self.spotify.search(q=search_term, type='track', limit=10, market='US')
                     
                     for track in results['tracks']['items']:
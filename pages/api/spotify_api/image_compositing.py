@@ -0,0 +1,74 @@
+"""
+Dim-and-composite step shared by the cover renderers
+Darkens an RGB image and lays the RGBA text overlay on it, matching the
+previous convert/alpha_composite/convert sequence pixel for pixel without
+full-size RGBA copies of the image
+"""
+
+from typing import List, Optional
+
+from PIL import Image
+
+# Pillow's alpha_composite works in fixed point with 7 extra bits of precision
+PRECISION_BITS = 7
+
+# Opacity of the black layer that darkens covers behind the text (60/255 = ~24%)
+COVER_DIM_ALPHA = 60
+
+# Height of the horizontal strips the overlay is composited in
+STRIP_HEIGHT = 64
+
+
+def _div255(value: int) -> int:
+    """Pillow's rounded fixed-point division by 255 (SHIFTFORDIV255)"""
+    value += 0x80 << PRECISION_BITS
+    return (((value >> 8) + value) >> 8) >> PRECISION_BITS
+
+
+def dim_lut(dim_alpha: int) -> List[int]:
+    """
+    Lookup table equivalent to alpha compositing black at dim_alpha over an opaque pixel
+
+    Args:
+        dim_alpha: Opacity (0-255) of the black layer
+
+    Returns:
+        256-entry table for Image.point, repeated for the R, G and B bands
+    """
+    return [_div255((value * (255 - dim_alpha)) << PRECISION_BITS) for value in range(256)] * 3
+
+
+def dim_and_composite(image: Image.Image, overlay: Optional[Image.Image] = None, dim_alpha: int = 0) -> Image.Image:
+    """
+    Darken an image and composite a transparent overlay onto it
+
+    Produces the same pixels as converting to RGBA, alpha-compositing a black
+    layer of dim_alpha opacity and then the overlay, and converting back to RGB.
+    The darkening is a point LUT on the RGB bands, and the overlay is blended
+    only where it has visible pixels, one strip at a time.
+
+    Args:
+        image: Opaque source image (converted to RGB if needed)
+        overlay: RGBA overlay the size of image, e.g. the text layer
+        dim_alpha: Opacity (0-255) of the black darkening layer; 0 leaves the image as is
+
+    Returns:
+        Composited RGB image
+    """
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    image = image.point(dim_lut(dim_alpha)) if dim_alpha else image.copy()
+    if overlay is None:
+        return image
+
+    alpha = overlay.getchannel('A')
+    width, height = image.size
+    for top in range(0, height, STRIP_HEIGHT):
+        strip = (0, top, width, min(top + STRIP_HEIGHT, height))
+        box = alpha.crop(strip).getbbox()
+        if box is None:
+            continue
+        box = (box[0], top + box[1], box[2], top + box[3])
+        region = Image.alpha_composite(image.crop(box).convert('RGBA'), overlay.crop(box))
+        image.paste(region.convert('RGB'), box[:2])
+    return image
@@ -0,0 +1,157 @@
+"""
+Output encoders for the rendered Instagram artifacts
+Covers are photographic and encode far smaller as JPEG/WebP; the flat tracklist stays PNG
+"""
+
+import io
+import logging
+import os
+import sys
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from PIL import Image
+
+from artifact_manifest import record_artifact
+from instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class EncoderPreset(NamedTuple):
+    """Pillow save settings for one output format"""
+    pil_format: str
+    extension: str
+    content_type: str
+    options: Dict
+
+
+ENCODERS: Dict[str, EncoderPreset] = {
+    # Level 4 writes the same size as Pillow's default level 6 on flat graphics, with less CPU
+    'png': EncoderPreset('PNG', '.png', 'image/png', {'compress_level': 4}),
+    'jpeg': EncoderPreset('JPEG', '.jpg', 'image/jpeg', {'quality': 90, 'optimize': True, 'progressive': True}),
+    'webp': EncoderPreset('WEBP', '.webp', 'image/webp', {'quality': 85, 'method': 4}),
+}
+
+# Modes each format can store directly; anything else is converted to RGB first
+SUPPORTED_MODES = {
+    'png': ('RGB', 'RGBA', 'L', 'P'),
+    'jpeg': ('RGB', 'L'),
+    'webp': ('RGB', 'RGBA'),
+}
+
+
+def get_encoder(image_format: str) -> EncoderPreset:
+    """Look up an encoder preset by name ('png', 'jpeg' or 'webp')"""
+    try:
+        return ENCODERS[image_format.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown output format '{image_format}', expected one of: {', '.join(ENCODERS)}")
+
+
+def with_extension(path: str, image_format: str) -> str:
+    """Replace the file extension of path with the one used by image_format"""
+    return os.path.splitext(path)[0] + get_encoder(image_format).extension
+
+
+def content_type_for(path: str) -> str:
+    """MIME type of an encoded artifact, from its file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    for preset in ENCODERS.values():
+        if extension == preset.extension or (extension == '.jpeg' and preset.pil_format == 'JPEG'):
+            return preset.content_type
+    return 'application/octet-stream'
+
+
+def encode_to_bytes(image: Image.Image, image_format: str) -> bytes:
+    """
+    Encode an image in memory with the named preset
+
+    Encode time and size are recorded in the run metrics as encode_<format>
+    and encoded_bytes_<format>.
+
+    Args:
+        image: Rendered image
+        image_format: Encoder preset name
+
+    Returns:
+        Encoded bytes
+    """
+    preset = get_encoder(image_format)
+    name = image_format.lower()
+    if image.mode not in SUPPORTED_MODES[name]:
+        image = image.convert('RGB')
+
+    output = io.BytesIO()
+    with metrics.timer(f"encode_{name}"):
+        image.save(output, preset.pil_format, **preset.options)
+    data = output.getvalue()
+    metrics.count(f"encoded_bytes_{name}", len(data))
+    return data
+
+
+def encode_image(image: Image.Image, output_path: str, image_format: str) -> str:
+    """
+    Encode an image to disk with the named preset
+
+    Args:
+        image: Rendered image
+        output_path: Requested path; its extension is replaced to match the format
+        image_format: Encoder preset name
+
+    Returns:
+        Path of the written file
+    """
+    output_path = with_extension(output_path, image_format)
+    data = encode_to_bytes(image, image_format)
+    with open(output_path, 'wb') as f:
+        f.write(data)
+    record_artifact(output_path)
+    logger.info(f"🗜️ Encoded {os.path.basename(output_path)} as {image_format.upper()} ({len(data) / 1024:.0f}KB)")
+    return output_path
+
+
+def compare_encoders(image: Image.Image, formats: Optional[List[str]] = None, repeat: int = 3) -> Dict[str, Dict]:
+    """
+    Encode an image with each preset and report time and size
+
+    Args:
+        image: Image to encode
+        formats: Preset names to compare (default: all)
+        repeat: Encodes per format; the fastest is reported
+
+    Returns:
+        {format: {'encode_ms': ..., 'bytes': ...}}
+    """
+    report = {}
+    for image_format in formats or list(ENCODERS):
+        preset = get_encoder(image_format)
+        source = image if image.mode in SUPPORTED_MODES[image_format] else image.convert('RGB')
+        durations = []
+        for _ in range(repeat):
+            output = io.BytesIO()
+            started = time.perf_counter()
+            source.save(output, preset.pil_format, **preset.options)
+            durations.append(time.perf_counter() - started)
+        report[image_format] = {'encode_ms': round(min(durations) * 1000, 1), 'bytes': len(output.getvalue())}
+    return report
+
+
+def print_encoder_report(name: str, report: Dict[str, Dict]) -> None:
+    """Print a compare_encoders report as a table"""
+    print(f"   {name}")
+    for image_format, entry in report.items():
+        print(f"      {image_format:<8}{entry['encode_ms']:9.1f}ms{entry['bytes'] / 1024:9.0f}KB")
+
+
+if __name__ == "__main__":
+    # Compare encoders on rendered images: python image_encoding.py output/nmf_tracklist_2025-10-10.png ...
+    if len(sys.argv) < 2:
+        print("Usage: python image_encoding.py <image> [<image> ...]")
+        sys.exit(1)
+
+    print(f"🗜️ Encoder comparison ({', '.join(f'{name}: {preset.options}' for name, preset in ENCODERS.items())})")
+    for image_path in sys.argv[1:]:
+        with Image.open(image_path) as source_image:
+            source_image.load()
+            print_encoder_report(os.path.basename(image_path), compare_encoders(source_image))
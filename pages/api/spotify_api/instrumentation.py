@@ -0,0 +1,257 @@
+"""
+Lightweight run instrumentation: stage timers, counters and peak memory
+Each run's metrics are saved as JSON next to its nmf_data_*.json so weeks can be compared
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from artifact_manifest import record_artifact
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+def current_rss_mb() -> Optional[float]:
+    """Current resident set size of this process in MB (Linux only)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process (since the last reset_peak_rss) in MB"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def reset_peak_rss() -> bool:
+    """
+    Reset the peak RSS high-water mark so the next peak_rss_mb covers only what follows
+
+    Only supported on Linux; returns False where the peak cannot be reset.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+class RunMetrics:
+    """Thread-safe timers and counters for one automation run"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self, run_name: str = 'run') -> None:
+        """Start collecting metrics for a new run"""
+        with self._lock:
+            self.run_name = run_name
+            self.started_at = datetime.now().isoformat()
+            self._started = time.perf_counter()
+            self.counters: Dict[str, float] = {}
+            self.timers: Dict[str, Dict[str, float]] = {}
+            self.stages: Dict[str, Dict[str, Any]] = {}
+            self._running: set = set()
+            self._overlapped: set = set()
+            # Highest peak seen before the high-water mark was last reset
+            self._run_peak: Optional[float] = None
+
+    def count(self, name: str, value: float = 1) -> None:
+        """
+        Increment a counter for the run and for the stage running on this thread
+
+        Args:
+            name: Counter name, e.g. 'spotify_api_calls' or 'bytes_downloaded'
+            value: Amount to add
+        """
+        stage = self._current_stage()
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+            if stage in self.stages:
+                stage_counters = self.stages[stage]['counters']
+                stage_counters[name] = stage_counters.get(name, 0) + value
+
+    @contextmanager
+    def timer(self, name: str):
+        """Time a block of code; repeated timings of the same name are aggregated"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                entry = self.timers.setdefault(name, {'count': 0, 'total_s': 0.0, 'max_s': 0.0})
+                entry['count'] += 1
+                entry['total_s'] += elapsed
+                entry['max_s'] = max(entry['max_s'], elapsed)
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Measure a pipeline stage: duration, outcome, memory and the counters it incremented
+
+        Counters incremented on this thread while the stage runs are attributed to it.
+        A stage that starts while no other stage is running resets the peak RSS
+        high-water mark, so its peak_rss_mb is its own; stages that overlap
+        another instead report process_peak_rss_mb, the process-wide mark when
+        they finished.
+        """
+        stack = self._stage_stack()
+        rss_before = current_rss_mb()
+        started = time.perf_counter()
+        with self._lock:
+            self.stages[name] = {'status': 'running', 'duration_s': 0.0, 'counters': {}}
+            if self._running:
+                self._overlapped.update(self._running | {name})
+            else:
+                self._run_peak = max(filter(None, [self._run_peak, peak_rss_mb()]), default=None)
+                reset_peak_rss()
+            self._running.add(name)
+        stack.append(name)
+        status = 'done'
+        try:
+            yield
+        except Exception:
+            status = 'failed'
+            raise
+        finally:
+            stack.pop()
+            rss_after = current_rss_mb()
+            peak = peak_rss_mb()
+            with self._lock:
+                self._running.discard(name)
+                peak_field = 'process_peak_rss_mb' if name in self._overlapped else 'peak_rss_mb'
+                self._overlapped.discard(name)
+                self.stages[name].update({
+                    'status': status,
+                    'duration_s': round(time.perf_counter() - started, 4),
+                    'rss_mb': round(rss_after, 1) if rss_after is not None else None,
+                    'rss_delta_mb': round(rss_after - rss_before, 1) if None not in (rss_before, rss_after) else None,
+                    peak_field: round(peak, 1) if peak is not None else None
+                })
+
+    def mark_stage(self, name: str, status: str) -> None:
+        """Record a stage that finished without running (cached, resumed or skipped)"""
+        with self._lock:
+            self.stages[name] = {'status': status, 'duration_s': 0.0, 'counters': {}}
+        if status in ('cached', 'resumed'):
+            self.count('stage_cache_hits')
+
+    def summary(self) -> Dict[str, Any]:
+        """JSON-serializable summary of the run so far"""
+        with self._lock:
+            peak = max(filter(None, [self._run_peak, peak_rss_mb()]), default=None)
+            return {
+                'run': self.run_name,
+                'started_at': self.started_at,
+                'wall_time_s': round(time.perf_counter() - self._started, 4),
+                'peak_rss_mb': round(peak, 1) if peak is not None else None,
+                'counters': dict(self.counters),
+                'timers': {name: {**entry, 'total_s': round(entry['total_s'], 4), 'max_s': round(entry['max_s'], 4)}
+                           for name, entry in self.timers.items()},
+                'stages': {name: dict(entry, counters=dict(entry['counters'])) for name, entry in self.stages.items()}
+            }
+
+    def save(self, path: str, **extra: Any) -> Optional[str]:
+        """
+        Write the run summary to a JSON file
+
+        Args:
+            path: Output path, usually output/nmf_metrics_<timestamp>.json
+            **extra: Additional top-level fields (e.g. week_start)
+
+        Returns:
+            Path written, or None if saving failed
+        """
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({**self.summary(), **extra}, f, indent=2, ensure_ascii=False, default=str)
+            record_artifact(path, week_start=extra.get('week_start'))
+            logger.info(f"📊 Run metrics saved to: {path}")
+            return path
+        except Exception as e:
+            logger.warning(f"⚠️ Could not save run metrics: {e}")
+            return None
+
+    def _stage_stack(self) -> list:
+        if not hasattr(self._local, 'stages'):
+            self._local.stages = []
+        return self._local.stages
+
+    def _current_stage(self) -> Optional[str]:
+        stack = self._stage_stack()
+        return stack[-1] if stack else None
+
+
+# Shared by every module of a run
+metrics = RunMetrics()
+
+
+def metrics_path_for(data_path: str) -> str:
+    """Path of the metrics file stored next to an nmf_data_*.json file"""
+    directory, filename = os.path.split(data_path)
+    return os.path.join(directory, filename.replace('nmf_data_', 'nmf_metrics_', 1))
+
+
+def compare_metrics(previous: Dict[str, Any], current: Dict[str, Any]) -> None:
+    """Print per-stage duration and counter changes between two runs"""
+    print(f"📊 {previous.get('started_at', '?')} → {current.get('started_at', '?')}")
+    print(f"   {'stage':<22}{'before':>10}{'after':>10}{'change':>10}")
+    stage_names = list(previous.get('stages', {}))
+    stage_names += [name for name in current.get('stages', {}) if name not in stage_names]
+    for name in stage_names:
+        before = previous.get('stages', {}).get(name, {}).get('duration_s', 0.0)
+        after = current.get('stages', {}).get(name, {}).get('duration_s', 0.0)
+        change = f"{(after - before) / before * 100:+.0f}%" if before else '-'
+        print(f"   {name:<22}{before:9.2f}s{after:9.2f}s{change:>10}")
+    print(f"   {'wall time':<22}{previous.get('wall_time_s', 0):9.2f}s{current.get('wall_time_s', 0):9.2f}s")
+
+    counters = sorted(set(previous.get('counters', {})) | set(current.get('counters', {})))
+    for name in counters:
+        before = previous.get('counters', {}).get(name, 0)
+        after = current.get('counters', {}).get(name, 0)
+        if before != after:
+            print(f"   {name}: {before} → {after}")
+
+
+if __name__ == "__main__":
+    # Compare two runs: python instrumentation.py output/nmf_metrics_A.json output/nmf_metrics_B.json
+    if len(sys.argv) != 3:
+        print("Usage: python instrumentation.py <previous_metrics.json> <current_metrics.json>")
+        sys.exit(1)
+
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        previous_run = json.load(f)
+    with open(sys.argv[2], 'r', encoding='utf-8') as f:
+        current_run = json.load(f)
+    compare_metrics(previous_run, current_run)
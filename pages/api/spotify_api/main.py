@@ -11,9 +11,22 @@ from typing import Dict, List, Optional, Tuple
 
 import requests
 import spotipy
+from artifact_manifest import record_artifact
+from brand_fonts import load_font_prefer_helvetica
+from collage import CollageRenderer
+from cover_batch import preferred_first
+from fingerprints import FingerprintStore, track_set_fingerprint
 from hybrid_approach import HybridSpotifyFetcher
-from PIL import Image, ImageDraw, ImageFont
+from image_compositing import COVER_DIM_ALPHA, dim_and_composite
+from image_encoding import content_type_for, encode_image
+from image_loading import load_image
+from instrumentation import metrics, metrics_path_for
+from PIL import Image, ImageDraw
+from pipeline_runner import PipelineRunner
+from run_journal import RunJournal
 from spotipy.oauth2 import SpotifyClientCredentials, SpotifyOAuth
+from track_archive import archive_tracks
+from tracklist_template import get_tracklist_template, week_subtitle
 
 # Load environment variables from .env file
 try:
@@ -80,6 +93,7 @@ class SpotifyNewMusicAutomation:
             )
             
             # Test the connection
+            metrics.count('spotify_api_calls')
             user = self.spotify.current_user()
             logger.info(f"✅ Spotify client initialized successfully for user: {user['display_name']}")
             
@@ -103,6 +117,7 @@ class SpotifyNewMusicAutomation:
             limit = limit or self.config.TRACK_LIMIT
             logger.info(f"🎵 Fetching tracks from playlist: {playlist_id}")
             
+            metrics.count('spotify_api_calls')
             results = self.spotify.playlist_tracks(
                 playlist_id, 
                 limit=limit,
@@ -172,6 +187,8 @@ class SpotifyNewMusicAutomation:
             
         try:
             response = requests.get(url, timeout=self.config.REQUEST_TIMEOUT)
+            metrics.count('http_downloads')
+            metrics.count('bytes_downloaded', len(response.content))
             response.raise_for_status()
             
             filepath = os.path.join(self.config.OUTPUT_DIR, filename)
@@ -196,6 +213,7 @@ class SpotifyNewMusicAutomation:
             Artist image URL if found, None otherwise
         """
         try:
+            metrics.count('spotify_api_calls')
             artist = spotify_client.artist(artist_id)
             images = artist.get('images', [])
             
@@ -227,6 +245,8 @@ class SpotifyNewMusicAutomation:
             
         try:
             response = requests.get(url, timeout=self.config.REQUEST_TIMEOUT)
+            metrics.count('http_downloads')
+            metrics.count('bytes_downloaded', len(response.content))
             response.raise_for_status()
             
             filepath = os.path.join(self.config.OUTPUT_DIR, filename)
@@ -239,6 +259,34 @@ class SpotifyNewMusicAutomation:
             logger.warning(f"⚠️ Failed to download artist image: {e}")
             return None
     
+    def resolve_cover_artist_id(self, track: Dict, spotify_client) -> Optional[str]:
+        """
+        Find the Spotify ID of the artist shown on a track's cover
+        
+        Args:
+            track: Track dictionary with artist information
+            spotify_client: Spotify client instance
+            
+        Returns:
+            Artist ID if found, None otherwise
+        """
+        # Try to get artist ID from track, fallback to searching by name
+        if track.get('artist_ids') and track['artist_ids']:
+            return track['artist_ids'][0]
+        
+        # If no artist_ids, try to search for the artist by name
+        try:
+            artist_name = track.get('artist', '').split(',')[0].strip()  # Get first artist if multiple
+            metrics.count('spotify_api_calls')
+            search_results = spotify_client.search(q=f'artist:"{artist_name}"', type='artist', limit=1)
+            if search_results['artists']['items']:
+                artist_id = search_results['artists']['items'][0]['id']
+                logger.info(f"Found artist ID for {artist_name}: {artist_id}")
+                return artist_id
+        except Exception as e:
+            logger.warning(f"Could not find artist ID for {track.get('artist', 'Unknown')}: {e}")
+        return None
+    
     def create_single_artist_image(self, track: Dict, spotify_client, output_filename: str = "nmf_single_artist.png") -> str:
         """
         Create a single artist image with "New Music Friday" overlay
@@ -250,20 +298,7 @@ class SpotifyNewMusicAutomation:
         Returns:
             Path to the generated image
         """
-        # Try to get artist ID from track, fallback to searching by name
-        artist_id = None
-        if track.get('artist_ids') and track['artist_ids']:
-            artist_id = track['artist_ids'][0]
-        else:
-            # If no artist_ids, try to search for the artist by name
-            try:
-                artist_name = track.get('artist', '').split(',')[0].strip()  # Get first artist if multiple
-                search_results = spotify_client.search(q=f'artist:"{artist_name}"', type='artist', limit=1)
-                if search_results['artists']['items']:
-                    artist_id = search_results['artists']['items'][0]['id']
-                    logger.info(f"Found artist ID for {artist_name}: {artist_id}")
-            except Exception as e:
-                logger.warning(f"Could not find artist ID for {track.get('artist', 'Unknown')}: {e}")
+        artist_id = self.resolve_cover_artist_id(track, spotify_client)
         
         if not artist_id:
             logger.warning("⚠️ No artist ID found for track")
@@ -285,284 +320,245 @@ class SpotifyNewMusicAutomation:
                 logger.warning(f"⚠️ Failed to download artist image for {track['name']}")
                 return None
             
-            # Open and process the artist image
-            artist_image = Image.open(art_path)
+            output_path = self.render_single_artist_image(track, art_path, output_filename)
             
-            # Resize to Instagram-friendly dimensions (1080x1080)
-            target_size = (1080, 1080)
-            artist_image = artist_image.resize(target_size, Image.Resampling.LANCZOS)
+            # Clean up downloaded file
+            os.remove(art_path)
+            
+            return output_path
             
-            # Create overlay with branding similar to the reference
-            overlay = Image.new('RGBA', target_size, (0, 0, 0, 0))
-            draw_overlay = ImageDraw.Draw(overlay)
+        except Exception as e:
+            logger.error(f"❌ Error creating single artist image: {e}")
+            if 'art_path' in locals() and art_path and os.path.exists(art_path):
+                try:
+                    os.remove(art_path)
+                except:
+                    pass
+            return None
 
-            # Colors
-            off_white = (232, 220, 207, 255)  # beige/cream title color
-            light_gray = (210, 210, 210, 255)
-            pure_white = (255, 255, 255, 255)
-            brand_red = (226, 62, 54, 255)
+    def render_single_artist_image(self, track: Dict, source, output_filename: str) -> str:
+        """
+        Render the branded cover for a track from an already downloaded artist image
+        
+        Args:
+            track: Track dictionary with artist and track names
+            source: Artist image as a file path or encoded bytes
+            output_filename: Output filename for the image
+            
+        Returns:
+            Path to the generated image
+        """
+        # Open the artist image at Instagram-friendly dimensions (1080x1080)
+        target_size = (1080, 1080)
+        artist_image = load_image(source, target_size)
+        
+        # Create overlay with branding similar to the reference
+        overlay = Image.new('RGBA', target_size, (0, 0, 0, 0))
+        draw_overlay = ImageDraw.Draw(overlay)
 
-            # Fonts (prefer Helvetica Neue Bold / Condensed Bold on macOS)
-            def load_font_prefer_helvetica(size: int, condensed: bool = False):
-                # Windows-friendly font loading with larger base sizes
-                candidates = [
-                    # macOS fonts
-                    ("/System/Library/Fonts/HelveticaNeue.ttc", [0, 1, 2, 3, 4, 5, 6, 7, 8]),
-                    ("/System/Library/Fonts/Helvetica.ttc", [0, 1, 2, 3, 4, 5]),
-                    ("/Library/Fonts/HelveticaNeue.ttc", [0, 1, 2, 3, 4, 5, 6]),
-                    ("/System/Library/Fonts/Supplemental/HelveticaNeue.ttc", [0, 1, 2, 3, 4, 5, 6]),
-                    # Windows fonts
-                    ("C:/Windows/Fonts/arialbd.ttf", [0]),  # Arial Bold
-                    ("C:/Windows/Fonts/arial.ttf", [0]),    # Arial Regular
-                    ("C:/Windows/Fonts/calibrib.ttf", [0]), # Calibri Bold
-                    ("C:/Windows/Fonts/calibri.ttf", [0]),  # Calibri Regular
-                    ("C:/Windows/Fonts/segoeuib.ttf", [0]), # Segoe UI Bold
-                    ("C:/Windows/Fonts/segoeui.ttf", [0]),  # Segoe UI Regular
-                    # Linux fonts (GitHub Actions)
-                    ("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", [0]),
-                    ("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", [0]),
-                    ("/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf", [0]),
-                    ("/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf", [0]),
-                    ("/usr/share/fonts/truetype/noto/NotoSans-Bold.ttf", [0]),
-                    ("/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf", [0]),
-                    # Fallback
-                    ("Arial.ttf", [0])
-                ]
-                # Try specific TTC indexes first (heuristics)
-                # For bold fonts: prioritize Bold (index 2), then Heavy (index 3), then Medium (index 1)
-                # Avoid italic fonts (typically higher indexes like 6, 7, 8)
-                index_order = [2, 3, 1, 4, 5, 0] if condensed else [2, 3, 1, 4, 5, 0]
-                for path, idxs in candidates:
-                    if os.path.exists(path):
-                        for idx in index_order:
-                            if idx in idxs:
-                                try:
-                                    return ImageFont.truetype(path, size=size, index=idx)
-                                except Exception:
-                                    continue
-                        try:
-                            return ImageFont.truetype(path, size=size)
-                        except Exception:
-                            continue
-                # Fallback to default with larger size compensation
-                return ImageFont.load_default()
+        # Colors
+        off_white = (232, 220, 207, 255)  # beige/cream title color
+        light_gray = (210, 210, 210, 255)
+        pure_white = (255, 255, 255, 255)
+        brand_red = (226, 62, 54, 255)
 
-            # Even smaller, more balanced sizes for better readability
-            # Windows font size compensation (Windows fonts render smaller)
-            is_windows = os.name == 'nt'
-            size_multiplier = 1.0 if is_windows else 1.0  # No extra compensation needed
-            
-            title_font = load_font_prefer_helvetica(int(85 * size_multiplier), condensed=False)   # top artist name - smaller
-            name_font = load_font_prefer_helvetica(int(60 * size_multiplier), condensed=False)     # bottom-left lines - even smaller
-            stacked_font_big = load_font_prefer_helvetica(int(65 * size_multiplier), condensed=False)   # NEW - even smaller
-            stacked_font_small = load_font_prefer_helvetica(int(50 * size_multiplier), condensed=False) # MUSIC/FRIDAY - even smaller
+        # Fonts (prefer Helvetica Neue Bold / Condensed Bold on macOS), cached per size by brand_fonts
+        # Even smaller, more balanced sizes for better readability
+        # Windows font size compensation (Windows fonts render smaller)
+        is_windows = os.name == 'nt'
+        size_multiplier = 1.0 if is_windows else 1.0  # No extra compensation needed
+        
+        title_font = load_font_prefer_helvetica(int(85 * size_multiplier), condensed=False)   # top artist name - smaller
+        name_font = load_font_prefer_helvetica(int(60 * size_multiplier), condensed=False)     # bottom-left lines - even smaller
+        stacked_font_big = load_font_prefer_helvetica(int(65 * size_multiplier), condensed=False)   # NEW - even smaller
+        stacked_font_small = load_font_prefer_helvetica(int(50 * size_multiplier), condensed=False) # MUSIC/FRIDAY - even smaller
 
-            # Rounded white border
-            radius = 40
-            margin = 28
-            draw_overlay.rounded_rectangle(
-                [(margin, margin), (target_size[0]-margin, target_size[1]-margin)],
-                radius=radius,
-                outline=pure_white,
-                width=18
-            )
+        # Rounded white border
+        radius = 40
+        margin = 28
+        draw_overlay.rounded_rectangle(
+            [(margin, margin), (target_size[0]-margin, target_size[1]-margin)],
+            radius=radius,
+            outline=pure_white,
+            width=18
+        )
 
-            # Top artist name (uppercase, centered) - Dynamic sizing for long names
-            artist_name = (track['artist'] or "").upper()
-            
-            # Calculate available width for artist name (full width minus margins)
-            available_width = target_size[0] - (margin * 2) - 40  # Leave 40px margin on each side
-            artist_font_size = int(160 * size_multiplier)  # Starting size with Windows compensation
-            
-            # Find the optimal font size that fits
-            while artist_font_size > 80:  # Minimum font size
+        # Top artist name (uppercase, centered) - Dynamic sizing for long names
+        artist_name = (track['artist'] or "").upper()
+        
+        # Calculate available width for artist name (full width minus margins)
+        available_width = target_size[0] - (margin * 2) - 40  # Leave 40px margin on each side
+        artist_font_size = int(160 * size_multiplier)  # Starting size with Windows compensation
+        
+        # Find the optimal font size that fits
+        while artist_font_size > 80:  # Minimum font size
+            test_font = load_font_prefer_helvetica(artist_font_size, condensed=False)
+            test_bbox = draw_overlay.textbbox((0, 0), artist_name, font=test_font)
+            test_width = test_bbox[2] - test_bbox[0]
+            
+            if test_width <= available_width:
+                break
+            artist_font_size -= 10
+        
+        # If still too long, try two lines with proper word breaking
+        if artist_font_size <= int(80 * size_multiplier):
+            artist_font_size = int(100 * size_multiplier)  # Reasonable size for multi-line
+            words = artist_name.split()
+            lines = []
+            current_line = ""
+            
+            for word in words:
+                test_line = current_line + (" " if current_line else "") + word
                 test_font = load_font_prefer_helvetica(artist_font_size, condensed=False)
-                test_bbox = draw_overlay.textbbox((0, 0), artist_name, font=test_font)
+                test_bbox = draw_overlay.textbbox((0, 0), test_line, font=test_font)
                 test_width = test_bbox[2] - test_bbox[0]
                 
                 if test_width <= available_width:
-                    break
-                artist_font_size -= 10
-            
-            # If still too long, try two lines with proper word breaking
-            if artist_font_size <= int(80 * size_multiplier):
-                artist_font_size = int(100 * size_multiplier)  # Reasonable size for multi-line
-                words = artist_name.split()
-                lines = []
-                current_line = ""
-                
-                for word in words:
-                    test_line = current_line + (" " if current_line else "") + word
-                    test_font = load_font_prefer_helvetica(artist_font_size, condensed=False)
-                    test_bbox = draw_overlay.textbbox((0, 0), test_line, font=test_font)
-                    test_width = test_bbox[2] - test_bbox[0]
-                    
-                    if test_width <= available_width:
-                        current_line = test_line
+                    current_line = test_line
+                else:
+                    if current_line:
+                        lines.append(current_line)
+                        current_line = word
                     else:
-                        if current_line:
-                            lines.append(current_line)
-                            current_line = word
-                        else:
-                            # Single word too long, truncate it
-                            lines.append(word[:20] + "...")
-                            current_line = ""
-                
-                if current_line:
-                    lines.append(current_line)
-            else:
-                lines = [artist_name]
-            
-            # Create final font
-            dynamic_title_font = load_font_prefer_helvetica(artist_font_size, condensed=False)
-            
-            # Position artist name at top, centered with better spacing
-            if len(lines) == 1:
-                # Single line - center it
-                name_bbox = draw_overlay.textbbox((0, 0), lines[0], font=dynamic_title_font)
-                name_w = name_bbox[2] - name_bbox[0]
-                name_x = (target_size[0] - name_w) // 2
-                name_y = margin + 30  # More space from top
-                draw_overlay.text((name_x, name_y), lines[0], fill=off_white, font=dynamic_title_font, stroke_width=3, stroke_fill=(0,0,0,160))
-            else:
-                # Multiple lines - center each line
-                line_height = 0
-                for line in lines:
-                    bbox = draw_overlay.textbbox((0, 0), line, font=dynamic_title_font)
-                    line_height = max(line_height, bbox[3] - bbox[1])
-                
-                total_height = (line_height + 20) * len(lines)  # More spacing between lines
-                start_y = margin + 30  # More space from top
-                
-                for i, line in enumerate(lines):
-                    line_bbox = draw_overlay.textbbox((0, 0), line, font=dynamic_title_font)
-                    line_w = line_bbox[2] - line_bbox[0]
-                    line_x = (target_size[0] - line_w) // 2
-                    line_y = start_y + (i * (line_height + 20))
-                    draw_overlay.text((line_x, line_y), line, fill=off_white, font=dynamic_title_font, stroke_width=3, stroke_fill=(0,0,0,160))
-
-            # Bottom-left track title - Smart sizing and line breaking
-            track_title = (track['name'] or "").upper()
+                        # Single word too long, truncate it
+                        lines.append(word[:20] + "...")
+                        current_line = ""
             
-            # Calculate available space for track title (left side)
-            available_width = (target_size[0] // 2) - margin - 20  # Left half minus margin
-            track_font_size = int(100 * size_multiplier)  # Starting size with Windows compensation
+            if current_line:
+                lines.append(current_line)
+        else:
+            lines = [artist_name]
+        
+        # Create final font
+        dynamic_title_font = load_font_prefer_helvetica(artist_font_size, condensed=False)
+        
+        # Position artist name at top, centered with better spacing
+        if len(lines) == 1:
+            # Single line - center it
+            name_bbox = draw_overlay.textbbox((0, 0), lines[0], font=dynamic_title_font)
+            name_w = name_bbox[2] - name_bbox[0]
+            name_x = (target_size[0] - name_w) // 2
+            name_y = margin + 30  # More space from top
+            draw_overlay.text((name_x, name_y), lines[0], fill=off_white, font=dynamic_title_font, stroke_width=3, stroke_fill=(0,0,0,160))
+        else:
+            # Multiple lines - center each line
+            line_height = 0
+            for line in lines:
+                bbox = draw_overlay.textbbox((0, 0), line, font=dynamic_title_font)
+                line_height = max(line_height, bbox[3] - bbox[1])
+            
+            total_height = (line_height + 20) * len(lines)  # More spacing between lines
+            start_y = margin + 30  # More space from top
             
-            # Find optimal font size that fits
-            while track_font_size > 60:  # Minimum font size
+            for i, line in enumerate(lines):
+                line_bbox = draw_overlay.textbbox((0, 0), line, font=dynamic_title_font)
+                line_w = line_bbox[2] - line_bbox[0]
+                line_x = (target_size[0] - line_w) // 2
+                line_y = start_y + (i * (line_height + 20))
+                draw_overlay.text((line_x, line_y), line, fill=off_white, font=dynamic_title_font, stroke_width=3, stroke_fill=(0,0,0,160))
+
+        # Bottom-left track title - Smart sizing and line breaking
+        track_title = (track['name'] or "").upper()
+        
+        # Calculate available space for track title (left side)
+        available_width = (target_size[0] // 2) - margin - 20  # Left half minus margin
+        track_font_size = int(100 * size_multiplier)  # Starting size with Windows compensation
+        
+        # Find optimal font size that fits
+        while track_font_size > 60:  # Minimum font size
+            test_font = load_font_prefer_helvetica(track_font_size, condensed=False)
+            test_bbox = draw_overlay.textbbox((0, 0), track_title, font=test_font)
+            test_width = test_bbox[2] - test_bbox[0]
+            
+            if test_width <= available_width:
+                break
+            track_font_size -= 5
+        
+        # If still too long, try two lines with proper word breaking
+        if track_font_size <= int(60 * size_multiplier):
+            track_font_size = int(75 * size_multiplier)  # Reasonable size for multi-line
+            words = track_title.split()
+            lines = []
+            current_line = ""
+            
+            for word in words:
+                test_line = current_line + (" " if current_line else "") + word
                 test_font = load_font_prefer_helvetica(track_font_size, condensed=False)
-                test_bbox = draw_overlay.textbbox((0, 0), track_title, font=test_font)
+                test_bbox = draw_overlay.textbbox((0, 0), test_line, font=test_font)
                 test_width = test_bbox[2] - test_bbox[0]
                 
                 if test_width <= available_width:
-                    break
-                track_font_size -= 5
-            
-            # If still too long, try two lines with proper word breaking
-            if track_font_size <= int(60 * size_multiplier):
-                track_font_size = int(75 * size_multiplier)  # Reasonable size for multi-line
-                words = track_title.split()
-                lines = []
-                current_line = ""
-                
-                for word in words:
-                    test_line = current_line + (" " if current_line else "") + word
-                    test_font = load_font_prefer_helvetica(track_font_size, condensed=False)
-                    test_bbox = draw_overlay.textbbox((0, 0), test_line, font=test_font)
-                    test_width = test_bbox[2] - test_bbox[0]
-                    
-                    if test_width <= available_width:
-                        current_line = test_line
+                    current_line = test_line
+                else:
+                    if current_line:
+                        lines.append(current_line)
+                        current_line = word
                     else:
-                        if current_line:
-                            lines.append(current_line)
-                            current_line = word
-                        else:
-                            # Single word too long, truncate it
-                            lines.append(word[:15] + "...")
-                            current_line = ""
-                
-                if current_line:
-                    lines.append(current_line)
-            else:
-                lines = [track_title]
+                        # Single word too long, truncate it
+                        lines.append(word[:15] + "...")
+                        current_line = ""
             
-            # Create final font
-            dynamic_track_font = load_font_prefer_helvetica(track_font_size, condensed=False)
+            if current_line:
+                lines.append(current_line)
+        else:
+            lines = [track_title]
+        
+        # Create final font
+        dynamic_track_font = load_font_prefer_helvetica(track_font_size, condensed=False)
 
-            # Position track title in bottom left with better spacing
-            l_margin = margin + 30  # More space from left edge
-            b_margin = margin + 50  # Move down more from bottom
-            
-            # Calculate total height needed for all lines
-            line_height = 0
-            for line in lines:
-                bbox = draw_overlay.textbbox((0, 0), line, font=dynamic_track_font)
-                line_height = max(line_height, bbox[3] - bbox[1])
-            
-            total_height = (line_height + 20) * len(lines)  # 20px spacing between lines
-            start_y = target_size[1] - b_margin - total_height
-            
-            # Draw each line
-            for i, line in enumerate(lines):
-                y_pos = start_y + (i * (line_height + 20))
-                draw_overlay.text((l_margin, y_pos), line, fill=off_white, font=dynamic_track_font, stroke_width=2, stroke_fill=(0,0,0,150))
+        # Position track title in bottom left with better spacing
+        l_margin = margin + 30  # More space from left edge
+        b_margin = margin + 50  # Move down more from bottom
+        
+        # Calculate total height needed for all lines
+        line_height = 0
+        for line in lines:
+            bbox = draw_overlay.textbbox((0, 0), line, font=dynamic_track_font)
+            line_height = max(line_height, bbox[3] - bbox[1])
+        
+        total_height = (line_height + 20) * len(lines)  # 20px spacing between lines
+        start_y = target_size[1] - b_margin - total_height
+        
+        # Draw each line
+        for i, line in enumerate(lines):
+            y_pos = start_y + (i * (line_height + 20))
+            draw_overlay.text((l_margin, y_pos), line, fill=off_white, font=dynamic_track_font, stroke_width=2, stroke_fill=(0,0,0,150))
 
-            # Bottom-right stacked NEW / MUSIC / FRIDAY with better positioning
-            r_margin = margin + 50  # More space from right edge
-            b_margin_right = margin + 40  # Move down more from bottom
-            # Right align by measuring widest word
-            words_stack = [
-                ("NEW", brand_red, stacked_font_big),
-                ("MUSIC", light_gray, stacked_font_small),
-                ("FRIDAY", light_gray, stacked_font_small),
-            ]
-            # Compute x based on widest word width
-            max_w = 0
-            heights = []
-            for w, color, fnt in words_stack:
-                bbox = draw_overlay.textbbox((0,0), w, font=fnt)
-                max_w = max(max_w, bbox[2]-bbox[0])
-                heights.append(bbox[3]-bbox[1])
-            x_right = target_size[0] - r_margin
-            y_start = target_size[1] - b_margin_right - sum(heights) - 16*2
-            y = y_start
-            for (w, color, fnt), h in zip(words_stack, heights):
-                bbox = draw_overlay.textbbox((0,0), w, font=fnt)
-                w_px = bbox[2]-bbox[0]
-                x = x_right - w_px
-                draw_overlay.text((x, y), w, fill=color, font=fnt, stroke_width=2, stroke_fill=(0,0,0,150))
-                y += h + 16
-            
-            # Create a subtle background overlay to improve text readability
-            black_overlay = Image.new('RGBA', target_size, (0, 0, 0, 60))  # 60/255 = ~24% opacity
-            
-            # Composite the overlays onto the artist image
-            artist_image = artist_image.convert('RGBA')
-            # First apply the subtle black overlay
-            artist_image = Image.alpha_composite(artist_image, black_overlay)
-            # Then apply the text overlay
-            final_image = Image.alpha_composite(artist_image, overlay)
-            final_image = final_image.convert('RGB')
-            
-            # Save the final image
-            output_path = os.path.join(self.config.OUTPUT_DIR, output_filename)
-            final_image.save(output_path, 'PNG', quality=95)
-            
-            # Clean up downloaded file
-            os.remove(art_path)
-            
-            logger.info(f"✅ Single artist image saved to: {output_path}")
-            return output_path
-            
-        except Exception as e:
-            logger.error(f"❌ Error creating single artist image: {e}")
-            if 'art_path' in locals() and art_path and os.path.exists(art_path):
-                try:
-                    os.remove(art_path)
-                except:
-                    pass
-            return None
+        # Bottom-right stacked NEW / MUSIC / FRIDAY with better positioning
+        r_margin = margin + 50  # More space from right edge
+        b_margin_right = margin + 40  # Move down more from bottom
+        # Right align by measuring widest word
+        words_stack = [
+            ("NEW", brand_red, stacked_font_big),
+            ("MUSIC", light_gray, stacked_font_small),
+            ("FRIDAY", light_gray, stacked_font_small),
+        ]
+        # Compute x based on widest word width
+        max_w = 0
+        heights = []
+        for w, color, fnt in words_stack:
+            bbox = draw_overlay.textbbox((0,0), w, font=fnt)
+            max_w = max(max_w, bbox[2]-bbox[0])
+            heights.append(bbox[3]-bbox[1])
+        x_right = target_size[0] - r_margin
+        y_start = target_size[1] - b_margin_right - sum(heights) - 16*2
+        y = y_start
+        for (w, color, fnt), h in zip(words_stack, heights):
+            bbox = draw_overlay.textbbox((0,0), w, font=fnt)
+            w_px = bbox[2]-bbox[0]
+            x = x_right - w_px
+            draw_overlay.text((x, y), w, fill=color, font=fnt, stroke_width=2, stroke_fill=(0,0,0,150))
+            y += h + 16
+        
+        # Darken the artist image slightly to improve text readability, then apply the text overlay
+        final_image = dim_and_composite(artist_image, overlay, COVER_DIM_ALPHA)
+        
+        # Save the final image
+        output_path = os.path.join(self.config.OUTPUT_DIR, output_filename)
+        output_path = encode_image(final_image, output_path, self.config.OUTPUT_FORMATS['cover'])
+        
+        logger.info(f"✅ Single artist image saved to: {output_path}")
+        return output_path
 
     def create_collage(self, tracks: List[Dict], output_filename: str = "nmf_collage.png") -> str:
         """
@@ -577,120 +573,7 @@ class SpotifyNewMusicAutomation:
         """
         logger.info("🎨 Creating album art collage...")
         
-        cols, rows = self.config.COLLAGE_GRID
-        album_size = self.config.ALBUM_ART_SIZE
-        canvas_width, canvas_height = self.config.CANVAS_SIZE
-        
-        # Create canvas
-        canvas = Image.new('RGB', (canvas_width, canvas_height), self.config.SPOTIFY_BLACK)
-        draw = ImageDraw.Draw(canvas)
-        
-        # Calculate spacing
-        total_album_width = cols * album_size
-        total_album_height = rows * album_size
-        margin_x = (canvas_width - total_album_width) // 2
-        margin_y = (canvas_height - total_album_height) // 2
-        
-        # Process tracks (limit to grid size)
-        max_tracks = cols * rows
-        tracks_to_use = tracks[:max_tracks]
-        
-        # Create placeholder image for missing album art
-        placeholder = Image.new('RGB', (album_size, album_size), self.config.SPOTIFY_GRAY)
-        placeholder_draw = ImageDraw.Draw(placeholder)
-        
-        try:
-            # Try to load a default font, fallback to default if not available
-            font = ImageFont.truetype("Arial.ttf", 12) if os.name == 'nt' else ImageFont.load_default()
-        except:
-            font = ImageFont.load_default()
-        
-        placeholder_draw.text((album_size//2, album_size//2), "?", 
-                            fill=self.config.SPOTIFY_WHITE, 
-                            anchor="mm", font=font)
-        
-        for i, track in enumerate(tracks_to_use):
-            row = i // cols
-            col = i % cols
-            
-            x = margin_x + col * album_size
-            y = margin_y + row * album_size
-            
-            # Download and process artist image
-            artist_image = placeholder.copy()
-            if track.get('artist_ids') and track['artist_ids']:
-                # Get the first artist's image
-                artist_id = track['artist_ids'][0]
-                artist_image_url = self.get_artist_image_url(artist_id)
-                
-                if artist_image_url:
-                    art_filename = f"artist_{artist_id}.jpg"
-                    art_path = self.download_artist_image(artist_image_url, art_filename)
-                    
-                    if art_path and os.path.exists(art_path):
-                        try:
-                            artist_image = Image.open(art_path)
-                            artist_image = artist_image.resize((album_size, album_size), Image.Resampling.LANCZOS)
-                            
-                            # Create overlay with "New Music Friday" text
-                            overlay = Image.new('RGBA', (album_size, album_size), (0, 0, 0, 0))
-                            draw_overlay = ImageDraw.Draw(overlay)
-                            
-                            # Create semi-transparent background for text
-                            text_bg = Image.new('RGBA', (album_size, 40), (0, 0, 0, 150))
-                            overlay.paste(text_bg, (0, album_size - 40))
-                            
-                            # Add "New Music Friday" text
-                            try:
-                                text_font = ImageFont.truetype("Arial.ttf", 12) if os.name == 'nt' else ImageFont.load_default()
-                            except:
-                                text_font = ImageFont.load_default()
-                            
-                            text = "New Music Friday"
-                            text_bbox = draw_overlay.textbbox((0, 0), text, font=text_font)
-                            text_width = text_bbox[2] - text_bbox[0]
-                            text_x = (album_size - text_width) // 2
-                            text_y = album_size - 35
-                            
-                            draw_overlay.text((text_x, text_y), text, fill=(255, 255, 255, 255), font=text_font)
-                            
-                            # Composite the overlay onto the artist image
-                            artist_image = artist_image.convert('RGBA')
-                            artist_image = Image.alpha_composite(artist_image, overlay)
-                            artist_image = artist_image.convert('RGB')
-                            
-                            # Clean up downloaded file
-                            os.remove(art_path)
-                        except Exception as e:
-                            logger.warning(f"⚠️ Error processing artist image for {track['name']}: {e}")
-                            if 'art_path' in locals() and art_path and os.path.exists(art_path):
-                                try:
-                                    os.remove(art_path)
-                                except:
-                                    pass
-            
-            # Paste artist image onto canvas
-            canvas.paste(artist_image, (x, y))
-        
-        # Add title
-        try:
-            title_font = ImageFont.truetype("Arial.ttf", 36) if os.name == 'nt' else ImageFont.load_default()
-        except:
-            title_font = ImageFont.load_default()
-        
-        title = f"New Music Friday - {datetime.now().strftime('%B %d, %Y')}"
-        title_bbox = draw.textbbox((0, 0), title, font=title_font)
-        title_width = title_bbox[2] - title_bbox[0]
-        title_x = (canvas_width - title_width) // 2
-        
-        # Add background for title
-        title_bg_height = 60
-        draw.rectangle([0, 0, canvas_width, title_bg_height], fill=self.config.SPOTIFY_GREEN)
-        draw.text((title_x, 15), title, fill=self.config.SPOTIFY_WHITE, font=title_font)
-        
-        # Save collage
-        output_path = os.path.join(self.config.OUTPUT_DIR, output_filename)
-        canvas.save(output_path, 'PNG', quality=95)
+        output_path = CollageRenderer(self).render(tracks, output_filename)
         
         logger.info(f"✅ Collage saved to: {output_path}")
         return output_path
@@ -714,213 +597,23 @@ class SpotifyNewMusicAutomation:
         """
         logger.info("📋 Creating tracklist image...")
         
-        canvas_width, canvas_height = self.config.CANVAS_SIZE
-        canvas = Image.new('RGB', (canvas_width, canvas_height), self.config.SPOTIFY_BLACK)
-        draw = ImageDraw.Draw(canvas)
-        
         # Sort tracks by popularity first, then limit to top 10
         sorted_tracks = sorted(tracks, 
                              key=lambda x: x.get('popularity', 0), reverse=True)[:10]
         
-        # Load fonts using same Helvetica Neue Bold as single artist image
-        def load_font_prefer_helvetica(size: int, condensed: bool = False):
-            # Cross-platform font loading with larger base sizes
-            candidates = [
-                # macOS fonts
-                ("/System/Library/Fonts/HelveticaNeue.ttc", [0, 1, 2, 3, 4, 5, 6, 7, 8]),
-                ("/System/Library/Fonts/Helvetica.ttc", [0, 1, 2, 3, 4, 5]),
-                ("/Library/Fonts/HelveticaNeue.ttc", [0, 1, 2, 3, 4, 5, 6]),
-                ("/System/Library/Fonts/Supplemental/HelveticaNeue.ttc", [0, 1, 2, 3, 4, 5, 6]),
-                # Windows fonts
-                ("C:/Windows/Fonts/arialbd.ttf", [0]),  # Arial Bold
-                ("C:/Windows/Fonts/arial.ttf", [0]),    # Arial Regular
-                ("C:/Windows/Fonts/calibrib.ttf", [0]), # Calibri Bold
-                ("C:/Windows/Fonts/calibri.ttf", [0]),  # Calibri Regular
-                ("C:/Windows/Fonts/segoeuib.ttf", [0]), # Segoe UI Bold
-                ("C:/Windows/Fonts/segoeui.ttf", [0]),  # Segoe UI Regular
-                # Linux fonts (GitHub Actions)
-                ("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", [0]),
-                ("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", [0]),
-                ("/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf", [0]),
-                ("/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf", [0]),
-                ("/usr/share/fonts/truetype/noto/NotoSans-Bold.ttf", [0]),
-                ("/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf", [0]),
-                # Fallback
-                ("Arial.ttf", [0])
-            ]
-            # Try specific TTC indexes first (heuristics)
-            # For bold fonts: prioritize Bold (index 2), then Heavy (index 3), then Medium (index 1)
-            # Avoid italic fonts (typically higher indexes like 6, 7, 8)
-            index_order = [2, 3, 1, 4, 5, 0] if condensed else [2, 3, 1, 4, 5, 0]
-            for path, idxs in candidates:
-                if os.path.exists(path):
-                    for idx in index_order:
-                        if idx in idxs:
-                            try:
-                                return ImageFont.truetype(path, size=size, index=idx)
-                            except Exception:
-                                continue
-                    try:
-                        return ImageFont.truetype(path, size=size)
-                    except Exception:
-                        continue
-            # Fallback to default with larger size compensation
-            return ImageFont.load_default()
-
-        # Much larger font sizes for tracklist readability
-        # Smaller, more readable sizes with better padding
-        # Windows font size compensation (Windows fonts render smaller)
-        is_windows = os.name == 'nt'
-        size_multiplier = 1.0 if is_windows else 1.0  # No extra compensation needed
-        
-        title_font = load_font_prefer_helvetica(int(50 * size_multiplier), condensed=False)    # Main title - smaller
-        track_font = load_font_prefer_helvetica(int(38 * size_multiplier), condensed=False)    # Track names - smaller
-        artist_font = load_font_prefer_helvetica(int(28 * size_multiplier), condensed=False)   # Artist names - smaller
-        
-        # Title section - always use "New Music Out Now" as first line
-        title = "New Music Out Now"
-        # Calculate the most recent Friday date for the subtitle
-        # Get week_start from tracks if available, otherwise calculate from today
-        week_start_str = None
-        if tracks and len(tracks) > 0:
-            week_start_str = tracks[0].get('week_start')
-        
-        if week_start_str:
-            # Parse the week_start date (format: YYYY-MM-DD)
-            try:
-                friday_date = datetime.strptime(week_start_str, '%Y-%m-%d')
-            except:
-                # Fallback to calculating from today
-                today = datetime.now()
-                days_since_friday = (today.weekday() - 4) % 7  # 4 = Friday (0=Monday, 4=Friday)
-                friday_date = today - timedelta(days=days_since_friday)
-        else:
-            # Calculate from today if no week_start in tracks
-            today = datetime.now()
-            days_since_friday = (today.weekday() - 4) % 7  # 4 = Friday (0=Monday, 4=Friday)
-            friday_date = today - timedelta(days=days_since_friday)
-        
-        subtitle = f"New Music Friday - {friday_date.strftime('%B %d, %Y')}"
-        
-        # Title background - use same red as "NEW" from artist image
-        brand_red = (226, 62, 54)
-        title_height = 120  # Increased height to prevent overlap
-        draw.rectangle([0, 0, canvas_width, title_height], fill=brand_red)
-        
-        # Center title text
-        title_bbox = draw.textbbox((0, 0), title, font=title_font)
-        title_width = title_bbox[2] - title_bbox[0]
-        title_x = (canvas_width - title_width) // 2
-        
-        draw.text((title_x, 15), title, fill=self.config.SPOTIFY_WHITE, font=title_font)
-        
-        subtitle_bbox = draw.textbbox((0, 0), subtitle, font=artist_font)
-        subtitle_width = subtitle_bbox[2] - subtitle_bbox[0]
-        subtitle_x = (canvas_width - subtitle_width) // 2
-        draw.text((subtitle_x, 70), subtitle, fill=self.config.SPOTIFY_WHITE, font=artist_font)
-        
-        # Track list - more padding and better spacing
-        y_offset = title_height + 50  # More padding under title
-        line_height = 85  # Even more line height for better readability
-        margin = 50  # More margin for better padding
-        
-        for i, track in enumerate(sorted_tracks):  # Only top 10 tracks
-            track_y = y_offset + i * line_height
-            
-            # Track number
-            number_text = f"{i+1:2d}."
-            draw.text((margin, track_y), number_text, fill=self.config.SPOTIFY_GRAY, font=track_font)
-            
-            # Track name (truncate if too long and clean encoding) - Dynamic sizing
-            track_name = track['name']
-            # Replace problematic characters
-            track_name = track_name.replace('\u201c', '"').replace('\u201d', '"').replace('\u2018', "'").replace('\u2019', "'")
-            
-            # Dynamic font sizing for track names - smaller sizes with better padding
-            if len(track_name) > 30:
-                track_name = track_name[:30] + "..."
-                dynamic_track_font_size = int(28 * size_multiplier)  # Smaller size
-            elif len(track_name) > 25:
-                dynamic_track_font_size = int(32 * size_multiplier)  # Smaller size
-            elif len(track_name) > 20:
-                dynamic_track_font_size = int(34 * size_multiplier)  # Smaller size
-            else:
-                dynamic_track_font_size = int(38 * size_multiplier)  # Smaller base size
-            
-            # Create dynamic font for track name
-            dynamic_track_font = load_font_prefer_helvetica(dynamic_track_font_size, condensed=False)
-            
-            # Position track name with minimal padding
-            track_y_pos = track_y + 5  # Minimal padding from the line
-            draw.text((margin + 50, track_y_pos), track_name, fill=self.config.SPOTIFY_WHITE, font=dynamic_track_font)
-            
-            # Artist name (clean encoding) - add consistent spacing from track name
-            artist_name = track['artist']
-            artist_name = artist_name.replace('\u201c', '"').replace('\u201d', '"').replace('\u2018', "'").replace('\u2019', "'")
-            
-            # Dynamic font sizing for artist names - smaller sizes with better padding
-            if len(artist_name) > 35:
-                artist_name = artist_name[:35] + "..."
-                dynamic_artist_font_size = int(22 * size_multiplier)  # Smaller size
-            elif len(artist_name) > 30:
-                dynamic_artist_font_size = int(24 * size_multiplier)  # Smaller size
-            elif len(artist_name) > 25:
-                dynamic_artist_font_size = int(26 * size_multiplier)  # Smaller size
-            else:
-                dynamic_artist_font_size = int(28 * size_multiplier)  # Smaller base size
-            
-            # Create dynamic font for artist name
-            dynamic_artist_font = load_font_prefer_helvetica(dynamic_artist_font_size, condensed=False)
-            
-            # Calculate consistent spacing based on track name height
-            track_bbox = draw.textbbox((0, 0), track_name, font=dynamic_track_font)
-            track_height = track_bbox[3] - track_bbox[1]
-            artist_y_pos = track_y_pos + track_height + 8  # More spacing for better readability
-            draw.text((margin + 50, artist_y_pos), artist_name, fill=self.config.SPOTIFY_GRAY, font=dynamic_artist_font)
-        
-        # Footer
-        footer_text = "Suave's new music friday recap"
-        footer_bbox = draw.textbbox((0, 0), footer_text, font=artist_font)
-        footer_width = footer_bbox[2] - footer_bbox[0]
-        footer_x = (canvas_width - footer_width) // 2
+        # Title is always "New Music Out Now"; the subtitle dates the week (the most recent Friday if unknown)
+        subtitle = week_subtitle(tracks[0].get('week_start') if tracks else None)
         
-        draw.text((footer_x, canvas_height - 40), footer_text, 
-                 fill=self.config.SPOTIFY_GRAY, font=artist_font)
-        
-        # Add logo branding in bottom-right corner (replacing ISWT text)
-        logo_path = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'public', 'tlogo.png')
-        try:
-            logo = Image.open(logo_path)
-            if logo.mode != 'RGBA':
-                logo = logo.convert('RGBA')
-            
-            # Scale logo proportionally to occupy similar space as previous text
-            target_logo_height = int(48 * size_multiplier)
-            logo_aspect_ratio = logo.width / logo.height
-            target_logo_width = int(target_logo_height * logo_aspect_ratio)
-            logo_resized = logo.resize((target_logo_width, target_logo_height), Image.Resampling.LANCZOS)
-            
-            logo_x = canvas_width - target_logo_width - 40
-            logo_y = canvas_height - target_logo_height - 40
-            
-            padding = 10
-            bg_rect = [
-                logo_x - padding,
-                logo_y - padding,
-                logo_x + target_logo_width + padding,
-                logo_y + target_logo_height + padding
-            ]
-            draw.rectangle(bg_rect, fill=(0, 0, 0, 200))
-            
-            canvas_rgba = canvas.convert('RGBA')
-            canvas_rgba.paste(logo_resized, (logo_x, logo_y), logo_resized)
-            canvas = canvas_rgba.convert('RGB')
-        except Exception as e:
-            logger.warning(f"⚠️ Could not load logo from {logo_path}: {e}. Skipping logo branding.")
+        # Header, footer and logo come pre-rendered from the week's cached template;
+        # rows are fitted to their measured width, then drawn onto a copy of it
+        template = get_tracklist_template(subtitle)
+        canvas = template.new_canvas()
+        template.draw_rows(canvas, template.layout_rows(sorted_tracks))
+        canvas = template.finish(canvas)
         
         # Save tracklist
         output_path = os.path.join(self.config.OUTPUT_DIR, output_filename)
-        canvas.save(output_path, 'PNG', quality=95)
+        output_path = encode_image(canvas, output_path, self.config.OUTPUT_FORMATS['tracklist'])
         
         logger.info(f"✅ Tracklist saved to: {output_path}")
         return output_path
@@ -966,13 +659,14 @@ class SpotifyNewMusicAutomation:
         
         return "\n".join(caption_parts)
     
-    def save_track_data(self, tracks: List[Dict], filename: str = None) -> str:
+    def save_track_data(self, tracks: List[Dict], filename: str = None, week_start: str = None) -> str:
         """
         Save track data to JSON file
         
         Args:
             tracks: List of track dictionaries
             filename: Optional custom filename
+            week_start: Week start (YYYY-MM-DD); when given, the tracks are also added to the track archive
             
         Returns:
             Path to saved JSON file
@@ -991,6 +685,9 @@ class SpotifyNewMusicAutomation:
         
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
+        record_artifact(output_path, week_start=week_start)
+        if week_start:
+            archive_tracks(week_start, tracks, self.config.OUTPUT_DIR, run=filename)
         
         logger.info(f"💾 Track data saved to: {output_path}")
         return output_path
@@ -1011,10 +708,12 @@ class SpotifyNewMusicAutomation:
             Dictionary with results and file paths
         """
         logger.info("🚀 Starting New Music Friday automation...")
+        metrics.reset('automation')
         
         all_tracks = []
         
         # Use hybrid fetcher to get the playlists
+        hybrid_fetcher = None
         try:
             hybrid_fetcher = HybridSpotifyFetcher(self.client_id, self.client_secret)
             
@@ -1076,86 +775,140 @@ class SpotifyNewMusicAutomation:
         week_start_str = week_start.strftime('%Y%m%d')
         week_start_iso = week_start.strftime('%Y-%m-%d')  # ISO format for database
         
-        # Fetch preferences from Supabase if they exist
-        preferred_track_id = None
-        custom_tracklist_title = None
-        try:
-            from supabase import Client, create_client
-            supabase_url = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
-            supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
-            if supabase_url and supabase_key:
-                supabase: Client = create_client(supabase_url, supabase_key)
-                prefs_result = supabase.table('images').select(
-                    'preferred_track_id, tracklist_title'
-                ).eq('week_start', week_start_iso).execute()
-                
-                if prefs_result.data and len(prefs_result.data) > 0:
-                    prefs = prefs_result.data[0]
-                    preferred_track_id = prefs.get('preferred_track_id')
-                    custom_tracklist_title = prefs.get('tracklist_title')
-                    if preferred_track_id:
-                        logger.info(f"📋 Found preferred track ID: {preferred_track_id}")
-                    if custom_tracklist_title:
-                        logger.info(f"📋 Found custom tracklist title: {custom_tracklist_title}")
-        except Exception as e:
-            logger.warning(f"⚠️ Could not fetch preferences: {e}")
-        
-        # Reorder tracks to put preferred track first if it exists
-        cover_track = unique_tracks[0] if unique_tracks else None
-        if preferred_track_id and unique_tracks:
-            # Find the preferred track in the list
-            preferred_track = None
-            for track in unique_tracks:
-                # Check if track has 'id' field that matches preferred_track_id
-                track_id = track.get('id') or track.get('track_id')
-                if track_id and str(track_id) == str(preferred_track_id):
-                    preferred_track = track
-                    break
-            
+        # Artist lookups go through the hybrid fetcher's client when it was created
+        spotify_client = hybrid_fetcher.spotify if hybrid_fetcher else self.spotify
+        
+        # Keyed by this run's own week format so its stage results never mix with py_scraper.py's
+        runner = PipelineRunner(
+            name='automation pipeline',
+            fingerprint_store=FingerprintStore.for_week(self.config.OUTPUT_DIR, week_start_str),
+            journal=RunJournal.for_week(self.config.OUTPUT_DIR, week_start_str)
+        )
+        
+        def fetch_preferences():
+            # Fetch preferences from Supabase if they exist
+            prefs = {'preferred_track_id': None, 'tracklist_title': None}
+            try:
+                from supabase import Client, create_client
+                supabase_url = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
+                supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
+                if supabase_url and supabase_key:
+                    supabase: Client = create_client(supabase_url, supabase_key)
+                    metrics.count('db_round_trips')
+                    prefs_result = supabase.table('images').select(
+                        'preferred_track_id, tracklist_title'
+                    ).eq('week_start', week_start_iso).execute()
+                    
+                    if prefs_result.data and len(prefs_result.data) > 0:
+                        prefs.update({key: prefs_result.data[0].get(key) for key in prefs})
+                        if prefs['preferred_track_id']:
+                            logger.info(f"📋 Found preferred track ID: {prefs['preferred_track_id']}")
+                        if prefs['tracklist_title']:
+                            logger.info(f"📋 Found custom tracklist title: {prefs['tracklist_title']}")
+            except Exception as e:
+                logger.warning(f"⚠️ Could not fetch preferences: {e}")
+            return prefs
+        
+        def order_tracks(preferences):
+            # Reorder tracks to put preferred track first if it exists
+            tracks, preferred_track = preferred_first(unique_tracks, preferences['preferred_track_id'])
             if preferred_track:
-                # Move preferred track to the front
-                unique_tracks.remove(preferred_track)
-                unique_tracks.insert(0, preferred_track)
-                cover_track = preferred_track
                 logger.info(f"✅ Using preferred track: {preferred_track.get('name', 'Unknown')}")
-            else:
-                logger.warning(f"⚠️ Preferred track ID {preferred_track_id} not found in current tracks, using default")
+            elif preferences['preferred_track_id'] and tracks:
+                logger.warning(f"⚠️ Preferred track ID {preferences['preferred_track_id']} not found in current tracks, using default")
+            return {'tracks': tracks, 'cover_track': tracks[0] if tracks else None}
         
-        # Use week-based filenames to prevent duplicates
-        single_artist_filename = f"nmf_single_artist_{week_start_str}.png"
-        tracklist_filename = f"nmf_tracklist_{week_start_str}.png"
+        def render_cover(ordered_tracks):
+            # Use week-based filenames to prevent duplicates
+            if not ordered_tracks['cover_track']:
+                return None
+            single_artist_filename = f"nmf_single_artist_{week_start_str}.png"
+            return self.create_single_artist_image(ordered_tracks['cover_track'], spotify_client, single_artist_filename)
+        
+        def render_tracklist(preferences, ordered_tracks):
+            # Create tracklist with custom title if provided
+            tracklist_filename = f"nmf_tracklist_{week_start_str}.png"
+            return self.create_tracklist_image(
+                ordered_tracks['tracks'], tracklist_filename, custom_title=preferences['tracklist_title']
+            )
         
-        # Create single artist image (using preferred track or first track)
-        if cover_track:
-            single_artist_path = self.create_single_artist_image(cover_track, hybrid_fetcher.spotify, single_artist_filename)
-        else:
-            single_artist_path = None
+        def write_caption(ordered_tracks):
+            caption = self.generate_caption(ordered_tracks['tracks'])
+            caption_path = os.path.join(self.config.OUTPUT_DIR, f"nmf_caption_{week_start_str}.txt")
+            with open(caption_path, 'w', encoding='utf-8') as f:
+                f.write(caption)
+            record_artifact(caption_path)
+            return {'caption': caption, 'caption_file': caption_path}
         
-        # Create tracklist with custom title if provided
-        tracklist_path = self.create_tracklist_image(unique_tracks, tracklist_filename, custom_title=custom_tracklist_title)
+        def save_data(ordered_tracks):
+            # Save track data with timestamp
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            data_filename = f"nmf_data_{week_start_str}_{timestamp}.json"
+            return self.save_track_data(ordered_tracks['tracks'], data_filename, week_start=week_start_iso)
         
-        # Generate caption
-        caption = self.generate_caption(unique_tracks)
+        def upload_cover(cover_image):
+            if cover_image and os.path.exists(cover_image):
+                return self.upload_image_to_supabase(cover_image, week_start_str, 'cover')
+            return None
         
-        # Save track data with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        data_filename = f"nmf_data_{week_start_str}_{timestamp}.json"
-        data_path = self.save_track_data(unique_tracks, data_filename)
+        def upload_tracklist(tracklist_image):
+            if tracklist_image and os.path.exists(tracklist_image):
+                return self.upload_image_to_supabase(tracklist_image, week_start_str, 'tracklist')
+            return None
         
-        # Save caption to file
-        caption_filename = f"nmf_caption_{week_start_str}.txt"
-        caption_path = os.path.join(self.config.OUTPUT_DIR, caption_filename)
-        with open(caption_path, 'w', encoding='utf-8') as f:
-            f.write(caption)
+        def save_metadata(cover_upload, tracklist_upload):
+            # Save image metadata to database
+            if cover_upload or tracklist_upload:
+                self.save_image_metadata(week_start_str, cover_upload, tracklist_upload)
+        
+        def track_set(ordered_tracks):
+            return track_set_fingerprint(ordered_tracks['tracks'])
+        
+        def image_version(path):
+            # Images are rewritten under the same week-based name, so uploads also key on the file's mtime
+            return [path, os.path.getmtime(path) if path and os.path.exists(path) else None]
+        
+        runner.add_stage('preferences', fetch_preferences)
+        runner.add_stage('ordered_tracks', order_tracks, inputs=['preferences'])
+        runner.add_stage('cover_image', render_cover, inputs=['ordered_tracks'],
+                         fingerprint=lambda ordered_tracks: {
+                             'template_version': self.config.TEMPLATE_VERSION,
+                             'output_format': self.config.OUTPUT_FORMATS['cover'],
+                             'cover_track': track_set_fingerprint([ordered_tracks['cover_track'] or {}])
+                         })
+        runner.add_stage('tracklist_image', render_tracklist, inputs=['preferences', 'ordered_tracks'],
+                         fingerprint=lambda preferences, ordered_tracks: {
+                             'template_version': self.config.TEMPLATE_VERSION,
+                             'output_format': self.config.OUTPUT_FORMATS['tracklist'],
+                             'tracks': track_set(ordered_tracks),
+                             'title': preferences['tracklist_title']
+                         })
+        runner.add_stage('caption', write_caption, inputs=['ordered_tracks'], fingerprint=track_set)
+        runner.add_stage('track_data', save_data, inputs=['ordered_tracks'], fingerprint=track_set)
+        runner.add_stage('cover_upload', upload_cover, inputs=['cover_image'],
+                         fingerprint=lambda cover_image: image_version(cover_image))
+        runner.add_stage('tracklist_upload', upload_tracklist, inputs=['tracklist_image'],
+                         fingerprint=lambda tracklist_image: image_version(tracklist_image))
+        runner.add_stage('image_metadata', save_metadata, inputs=['cover_upload', 'tracklist_upload'])
+        stage_results = runner.run()
+        
+        single_artist_path = stage_results['cover_image']
+        tracklist_path = stage_results['tracklist_image']
+        caption_path = stage_results['caption']['caption_file']
+        data_path = stage_results['track_data']
+        metrics.save(metrics_path_for(data_path), week_start=week_start_iso)
         
         results = {
             'track_count': len(unique_tracks),
             'single_artist_image': single_artist_path,
             'tracklist_image': tracklist_path,
-            'caption': caption,
+            'caption': stage_results['caption']['caption'],
             'caption_file': caption_path,
             'data_file': data_path,
-            'generated_at': datetime.now().isoformat()
+            'generated_at': datetime.now().isoformat(),
+            'artist_collage_url': stage_results['cover_upload'],
+            'tracklist_url': stage_results['tracklist_upload'],
+            'week_start': week_start_str
         }
         
         logger.info("🎉 Automation completed successfully!")
@@ -1164,27 +917,6 @@ class SpotifyNewMusicAutomation:
         logger.info(f"📝 Caption: {caption_path}")
         logger.info(f"💾 Data: {data_path}")
         
-        # Upload images to Supabase
-        cover_url = None
-        tracklist_url = None
-        
-        if single_artist_path and os.path.exists(single_artist_path):
-            cover_url = self.upload_image_to_supabase(single_artist_path, week_start_str, 'cover')
-        
-        if tracklist_path and os.path.exists(tracklist_path):
-            tracklist_url = self.upload_image_to_supabase(tracklist_path, week_start_str, 'tracklist')
-        
-        # Save image metadata to database
-        if cover_url or tracklist_url:
-            self.save_image_metadata(week_start_str, cover_url, tracklist_url)
-        
-        # Add URLs to results
-        results.update({
-            'artist_collage_url': cover_url,
-            'tracklist_url': tracklist_url,
-            'week_start': week_start_str
-        })
-        
         # Clean up .pyc files
         self.cleanup_pyc_files()
         
@@ -1237,18 +969,22 @@ class SpotifyNewMusicAutomation:
                 image_data = f.read()
             
             # Create filename without timestamp for consistent overwriting
+            # (the extension follows the format the artifact was encoded in)
+            extension = os.path.splitext(image_path)[1].lower() or '.png'
             if image_type == 'cover':
-                filename = f"{week_start}_artist_collage.png"
+                filename = f"{week_start}_artist_collage{extension}"
             elif image_type == 'tracklist':
-                filename = f"{week_start}_tracklist.png"
+                filename = f"{week_start}_tracklist{extension}"
             else:
-                filename = f"{week_start}_{image_type}.png"
+                filename = f"{week_start}_{image_type}{extension}"
             
             # Upload to Supabase storage with upsert to overwrite existing files
+            metrics.count('storage_uploads')
+            metrics.count('bytes_uploaded', len(image_data))
             result = supabase.storage.from_('instagram-images').upload(
                 filename, 
                 image_data,
-                file_options={"upsert": "true"}
+                file_options={"upsert": "true", "content-type": content_type_for(image_path)}
             )
             
             # Check if upload was successful
@@ -1278,6 +1014,7 @@ class SpotifyNewMusicAutomation:
             supabase: Client = create_client(supabase_url, supabase_key)
             
             # First, get existing metadata to preserve preferences
+            metrics.count('db_round_trips')
             existing_result = supabase.table('images').select(
                 'preferred_track_id, preferred_track_name, preferred_track_image, tracklist_title'
             ).eq('week_start', week_start).execute()
@@ -1310,6 +1047,7 @@ class SpotifyNewMusicAutomation:
             print(f"📝 Saving metadata: {metadata}")
             
             # Insert or update metadata (upsert)
+            metrics.count('db_round_trips')
             result = supabase.table('images').upsert(
                 metadata,
                 on_conflict='week_start'
@@ -1330,6 +1068,56 @@ class SpotifyNewMusicAutomation:
             import traceback
             traceback.print_exc()
 
+    def save_cover_set(self, week_start, cover_urls):
+        """
+        Save the week's pre-rendered cover URLs, keyed by Spotify track ID, to the images table
+
+        Only the cover_set column is written, so preferences and image URLs are left as they are.
+        """
+        saved = self._save_images_column(week_start, 'cover_set', cover_urls)
+        if saved:
+            logger.info(f"✅ Saved {len(cover_urls)} cover URLs for week {week_start}")
+        return saved
+
+    def save_carousel(self, week_start, slide_urls):
+        """
+        Save the week's carousel slide URLs, in posting order, to the images table
+
+        Only the carousel_urls column is written, so preferences and image URLs are left as they are.
+        """
+        saved = self._save_images_column(week_start, 'carousel_urls', slide_urls)
+        if saved:
+            logger.info(f"✅ Saved {len(slide_urls)} carousel slide URLs for week {week_start}")
+        return saved
+
+    def _save_images_column(self, week_start, column, value):
+        """Write one column of the week's images row, creating the row if there is none yet"""
+        try:
+            from supabase import Client, create_client
+
+            supabase_url = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
+            supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
+            supabase: Client = create_client(supabase_url, supabase_key)
+
+            now = datetime.now().isoformat()
+            metrics.count('db_round_trips')
+            result = supabase.table('images').update(
+                {column: value, 'updated_at': now}
+            ).eq('week_start', week_start).execute()
+
+            if not result.data:
+                # No row for the week yet
+                metrics.count('db_round_trips')
+                result = supabase.table('images').insert(
+                    {'week_start': week_start, column: value, 'created_at': now, 'updated_at': now}
+                ).execute()
+
+            return bool(result.data)
+
+        except Exception as e:
+            logger.error(f"Error saving {column}: {e}")
+            return False
+
     def save_caption_metadata(self, week_start, caption, hashtags, style):
         """Save caption and hashtags to Supabase database, preserving existing preferences"""
         try:
@@ -1342,6 +1130,7 @@ class SpotifyNewMusicAutomation:
             supabase: Client = create_client(supabase_url, supabase_key)
             
             # First, get existing metadata to preserve preferences
+            metrics.count('db_round_trips')
             existing_result = supabase.table('images').select(
                 'preferred_track_id, preferred_track_name, preferred_track_image, tracklist_title, cover_image_url, tracklist_image_url'
             ).eq('week_start', week_start).execute()
@@ -1377,6 +1166,7 @@ class SpotifyNewMusicAutomation:
             print(f"📝 Saving caption metadata: {len(caption)} chars, {len(hashtags)} hashtags")
             
             # Update existing record or create new one
+            metrics.count('db_round_trips')
             result = supabase.table('images').upsert(
                 metadata,
                 on_conflict='week_start'
@@ -1413,6 +1203,7 @@ class SpotifyNewMusicAutomation:
             supabase: Client = create_client(supabase_url, supabase_key)
             
             # Get all image records
+            metrics.count('db_round_trips')
             result = supabase.table('images').select('*').execute()
             
             if not result.data:
@@ -1427,6 +1218,7 @@ class SpotifyNewMusicAutomation:
                 
                 if '/instagram-images/instagram_images/' in cover_url or '/instagram-images/instagram_images/' in tracklist_url:
                     # Delete this record
+                    metrics.count('db_round_trips')
                     delete_result = supabase.table('images').delete().eq('id', record['id']).execute()
                     if delete_result.data:
                         deleted_count += 1
@@ -0,0 +1,291 @@
+"""
+Stage-based pipeline runner for the weekly automation
+Runs stages as a dependency graph so independent work overlaps
+"""
+
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from fingerprints import FingerprintStore, compute_fingerprint
+from instrumentation import metrics
+from run_journal import RunJournal
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineError(Exception):
+    """Raised when one or more pipeline stages fail"""
+
+    def __init__(self, message: str, results: Dict[str, Any], errors: Dict[str, Exception]):
+        super().__init__(message)
+        self.results = results
+        self.errors = errors
+
+
+@dataclass
+class PipelineStage:
+    """A unit of work in the pipeline and the stages it reads from"""
+    name: str
+    func: Callable[..., Any]
+    inputs: List[str] = field(default_factory=list)
+    fingerprint: Optional[Callable[..., Any]] = None
+
+
+@dataclass
+class StageTiming:
+    """Timing and outcome of a single stage"""
+    name: str
+    status: str = 'pending'
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def duration(self) -> float:
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+
+class PipelineRunner:
+    """Runs pipeline stages concurrently as soon as their inputs are ready"""
+
+    def __init__(self,
+                 name: str = 'pipeline',
+                 max_workers: int = 4,
+                 fingerprint_store: Optional[FingerprintStore] = None,
+                 incremental: bool = True,
+                 journal: Optional[RunJournal] = None,
+                 force_stages: Optional[List[str]] = None):
+        """
+        Initialize the runner
+
+        Args:
+            name: Pipeline name used in logs and the timing report
+            max_workers: Maximum number of stages running at the same time
+            fingerprint_store: Where stage fingerprints and results are kept between runs
+            incremental: Whether to skip stages whose fingerprint is unchanged
+            journal: Run-state journal used to checkpoint and resume runs
+            force_stages: Stages to rerun regardless of checkpoints or
+                fingerprints (their dependents are rerun too)
+        """
+        self.name = name
+        self.max_workers = max_workers
+        self.fingerprint_store = fingerprint_store
+        self.incremental = incremental
+        self.journal = journal
+        self.force_stages = list(force_stages or [])
+        self.stages: Dict[str, PipelineStage] = {}
+        self.timings: Dict[str, StageTiming] = {}
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, Exception] = {}
+        self._pending_fingerprints: Dict[str, Optional[str]] = {}
+        self._forced: set = set()
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+
+    def add_stage(self,
+                  name: str,
+                  func: Callable[..., Any],
+                  inputs: Optional[List[str]] = None,
+                  fingerprint: Optional[Callable[..., Any]] = None) -> None:
+        """
+        Register a stage
+
+        The stage function is called with one keyword argument per input,
+        holding the result of that input stage. Inputs must be registered
+        before the stages that read them, which keeps the graph acyclic.
+
+        Args:
+            name: Unique stage name (also the keyword it is passed as)
+            func: Callable that performs the stage's work
+            inputs: Names of the stages whose results this stage needs
+            fingerprint: Called with the same arguments as func; returns the
+                JSON-serializable values the stage output depends on. When it
+                matches the stored fingerprint the stored result is reused.
+                Stages with a fingerprint are also checkpointed in the journal.
+        """
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' is already registered")
+
+        inputs = list(inputs or [])
+        for dependency in inputs:
+            if dependency not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dependency}'")
+
+        self.stages[name] = PipelineStage(name=name, func=func, inputs=inputs, fingerprint=fingerprint)
+        self.timings[name] = StageTiming(name=name)
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run every registered stage
+
+        Stages whose inputs failed are skipped. Remaining independent
+        stages still run to completion before the failure is raised.
+
+        Returns:
+            Dictionary of stage name to stage result
+
+        Raises:
+            PipelineError: If any stage raised an exception
+        """
+        logger.info(f"🚀 Running {self.name} with {len(self.stages)} stages")
+        self._forced = self._expand_forced_stages()
+        if self._forced:
+            print(f"🔨 Forcing stages: {', '.join(sorted(self._forced))}")
+        if self.journal:
+            self.journal.begin()
+        self._started_at = time.perf_counter()
+
+        pending = list(self.stages)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name) as executor:
+            while pending or running:
+                for name in list(pending):
+                    stage = self.stages[name]
+                    dependency_states = [self.timings[dep].status for dep in stage.inputs]
+
+                    if any(state in ('failed', 'skipped') for state in dependency_states):
+                        pending.remove(name)
+                        self.timings[name].status = 'skipped'
+                        metrics.mark_stage(name, 'skipped')
+                        logger.warning(f"⏭️ Skipping stage '{name}' because an input failed")
+                    elif all(state in ('done', 'cached', 'resumed') for state in dependency_states):
+                        pending.remove(name)
+                        kwargs = {dep: self.results[dep] for dep in stage.inputs}
+                        self.timings[name].started_at = time.perf_counter()
+                        fingerprint = self._stage_fingerprint(stage, kwargs)
+                        self._pending_fingerprints[name] = fingerprint
+                        if self._resume_from_checkpoint(stage, fingerprint) or \
+                                self._reuse_stored_result(stage, fingerprint):
+                            continue
+                        self.timings[name].status = 'running'
+                        running[executor.submit(self._run_stage, stage, kwargs)] = name
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    timing = self.timings[name]
+                    timing.finished_at = time.perf_counter()
+                    try:
+                        self.results[name] = future.result()
+                        timing.status = 'done'
+                        self._record_completion(name)
+                    except Exception as e:
+                        self.errors[name] = e
+                        timing.status = 'failed'
+                        logger.error(f"❌ Stage '{name}' failed: {e}")
+
+        self._finished_at = time.perf_counter()
+        if self.journal:
+            self.journal.finish('failed' if self.errors else 'complete')
+        self.print_timing_report()
+
+        if self.errors:
+            failed = ', '.join(self.errors)
+            raise PipelineError(f"{self.name} failed in stage(s): {failed}", self.results, self.errors)
+
+        return self.results
+
+    def _run_stage(self, stage: PipelineStage, kwargs: Dict[str, Any]) -> Any:
+        with metrics.stage(stage.name):
+            return stage.func(**kwargs)
+
+    def _expand_forced_stages(self) -> set:
+        """Resolve forced stage names to the stages plus everything downstream of them"""
+        unknown = [name for name in self.force_stages if name not in self.stages]
+        if unknown:
+            raise ValueError(f"Unknown stage(s) to force: {', '.join(unknown)}. "
+                             f"Available stages: {', '.join(self.stages)}")
+
+        forced = set(self.force_stages)
+        # Stages are registered in dependency order, so one pass reaches every dependent
+        for name, stage in self.stages.items():
+            if any(dependency in forced for dependency in stage.inputs):
+                forced.add(name)
+        return forced
+
+    def _resume_from_checkpoint(self, stage: PipelineStage, fingerprint: Optional[str]) -> bool:
+        """Reuse the result of a stage completed by an interrupted run, if its inputs are unchanged"""
+        if not self.journal or fingerprint is None or stage.name in self._forced:
+            return False
+
+        hit, result = self.journal.checkpoint(stage.name, fingerprint)
+        if not hit:
+            return False
+
+        self._finish_without_running(stage.name, result, 'resumed')
+        logger.info(f"🔁 Resuming stage '{stage.name}' from checkpoint")
+        return True
+
+    def _finish_without_running(self, name: str, result: Any, status: str) -> None:
+        timing = self.timings[name]
+        timing.finished_at = timing.started_at
+        timing.status = status
+        self.results[name] = result
+        metrics.mark_stage(name, status)
+
+    def _stage_fingerprint(self, stage: PipelineStage, kwargs: Dict[str, Any]) -> Optional[str]:
+        if not stage.fingerprint or not (self.fingerprint_store or self.journal):
+            return None
+        try:
+            return compute_fingerprint(stage.fingerprint(**kwargs))
+        except Exception as e:
+            logger.warning(f"⚠️ Could not fingerprint stage '{stage.name}', running it: {e}")
+            return None
+
+    def _reuse_stored_result(self, stage: PipelineStage, fingerprint: Optional[str]) -> bool:
+        """Reuse a stage's stored result when its inputs are unchanged"""
+        if fingerprint is None or not self.fingerprint_store or not self.incremental or stage.name in self._forced:
+            return False
+
+        hit, result = self.fingerprint_store.lookup(stage.name, fingerprint)
+        if not hit:
+            return False
+
+        self._finish_without_running(stage.name, result, 'cached')
+        self._record_checkpoint(stage.name, fingerprint)
+        logger.info(f"♻️ Inputs unchanged, reusing stored result for stage '{stage.name}'")
+        return True
+
+    def _record_completion(self, name: str) -> None:
+        # A None result means the stage produced nothing worth reusing (or failed softly)
+        fingerprint = self._pending_fingerprints.pop(name, None)
+        if self.results[name] is None:
+            return
+        if fingerprint is not None and self.fingerprint_store:
+            try:
+                self.fingerprint_store.record(name, fingerprint, self.results[name])
+            except Exception as e:
+                logger.warning(f"⚠️ Could not record fingerprint for stage '{name}': {e}")
+        if self.stages[name].fingerprint:
+            self._record_checkpoint(name, fingerprint)
+
+    def _record_checkpoint(self, name: str, fingerprint: Optional[str]) -> None:
+        if not self.journal:
+            return
+        try:
+            self.journal.record(name, self.results[name], fingerprint)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not checkpoint stage '{name}': {e}")
+
+    def print_timing_report(self) -> None:
+        """Print a per-stage timing report for the last run"""
+        if self._started_at is None:
+            return
+
+        wall_time = (self._finished_at or time.perf_counter()) - self._started_at
+        stage_time = sum(timing.duration for timing in self.timings.values())
+
+        print(f"\n⏱️ {self.name} timing report")
+        print(f"   {'stage':<22}{'status':<10}{'start':>9}{'duration':>11}")
+        for timing in sorted(self.timings.values(), key=lambda t: t.started_at or float('inf')):
+            offset = f"{timing.started_at - self._started_at:8.2f}s" if timing.started_at else f"{'-':>9}"
+            print(f"   {timing.name:<22}{timing.status:<10}{offset}{timing.duration:10.2f}s")
+        print(f"   Wall time: {wall_time:.2f}s (sum of stages: {stage_time:.2f}s)")
@@ -7,16 +7,27 @@ import logging
 import os
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import spotipy
+from artifact_manifest import record_artifact
+from config import SpotifyConfig
+from cover_batch import find_cover, preferred_first
 from email_notifier import send_weekly_notification
+from fingerprints import FingerprintStore, track_set_fingerprint
+from instrumentation import metrics, metrics_path_for
+from pipeline_runner import PipelineError, PipelineRunner
+from retention import RetentionService, print_retention_report
+from run_journal import RunJournal
 from selenium_scraper import SpotifySeleniumScraper
 from spotipy.oauth2 import SpotifyOAuth
 from supabase import Client, create_client
 
 logger = logging.getLogger(__name__)
 
+# Raw Selenium results, reused by later stages and resumed runs
+SCRAPE_CACHE_FILE = 'selenium_scraped_data.json'
+
 class EnhancedSpotifyAutomation:
     """Enhanced automation that combines Selenium scraping with Spotify API for complete data"""
     
@@ -69,6 +80,7 @@ class EnhancedSpotifyAutomation:
                 # If we have a track ID from scraping, use it directly
                 if track.get('id') and track.get('spotify_url'):
                     try:
+                        metrics.count('spotify_api_calls')
                         spotify_track = self.spotify.track(track['id'])
                         print(f"  ✅ Found exact track: {track['name']} - {track['artist']}")
                     except Exception as e:
@@ -79,6 +91,7 @@ class EnhancedSpotifyAutomation:
                 if not spotify_track:
                     # Search for the track on Spotify to get full metadata
                     search_query = f'"{track["name"]}" artist:"{track["artist"]}"'
+                    metrics.count('spotify_api_calls')
                     results = self.spotify.search(q=search_query, type='track', limit=10, market='US')
                     
                     # Try to find the best match with more sophisticated matching
@@ -194,6 +207,40 @@ class EnhancedSpotifyAutomation:
         
         return top_tracks
     
+    def scrape_playlists(self, cache_file: str = SCRAPE_CACHE_FILE) -> Dict:
+        """
+        Scrape both playlists in a headless browser and save them to the scrape cache
+        
+        Args:
+            cache_file: Where to save the raw scraped data
+            
+        Returns:
+            Dictionary with the raw scraped tracks of both playlists
+        """
+        print("🌐 Scraping fresh data from Spotify...")
+        scraper = SpotifySeleniumScraper(headless=True)
+        try:
+            # Scrape both playlists
+            with metrics.timer('scrape_new_music_friday'):
+                nmf_tracks = scraper.scrape_new_music_friday()
+            with metrics.timer('scrape_release_radar'):
+                rr_tracks = scraper.scrape_release_radar()
+            
+            # Save scraped data
+            scraped_data = {
+                'new_music_friday': nmf_tracks,
+                'release_radar': rr_tracks,
+                'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'method': 'enhanced_scraper'
+            }
+            
+            with open(cache_file, 'w', encoding='utf-8') as f:
+                json.dump(scraped_data, f, indent=2, ensure_ascii=False)
+            
+            return scraped_data
+        finally:
+            scraper.close()
+    
     def get_enhanced_playlist_data(self, use_cached: bool = True, top_tracks_per_playlist: int = 15) -> Dict:
         """
         Get enhanced data from both playlists with popularity filtering
@@ -208,36 +255,20 @@ class EnhancedSpotifyAutomation:
         print("🚀 Getting enhanced playlist data with popularity filtering...")
         
         # First, get the raw scraped data
-        scraper = None
         try:
-            cache_file = 'selenium_scraped_data.json'
+            cache_file = SCRAPE_CACHE_FILE
             
             # Use cached data if available and requested
             if use_cached and os.path.exists(cache_file):
                 print("📂 Using cached scraped data...")
+                metrics.count('scrape_cache_hits')
                 with open(cache_file, 'r', encoding='utf-8') as f:
-                    cached_data = json.load(f)
-                
-                nmf_tracks = cached_data.get('new_music_friday', [])
-                rr_tracks = cached_data.get('release_radar', [])
+                    scraped_data = json.load(f)
             else:
-                print("🌐 Scraping fresh data from Spotify...")
-                scraper = SpotifySeleniumScraper(headless=True)
-                
-                # Scrape both playlists
-                nmf_tracks = scraper.scrape_new_music_friday()
-                rr_tracks = scraper.scrape_release_radar()
-                
-                # Save scraped data
-                scraped_data = {
-                    'new_music_friday': nmf_tracks,
-                    'release_radar': rr_tracks,
-                    'scraped_at': time.strftime('%Y-%m-%d %H:%M:%S'),
-                    'method': 'enhanced_scraper'
-                }
-                
-                with open(cache_file, 'w', encoding='utf-8') as f:
-                    json.dump(scraped_data, f, indent=2, ensure_ascii=False)
+                scraped_data = self.scrape_playlists(cache_file)
+            
+            nmf_tracks = scraped_data.get('new_music_friday', [])
+            rr_tracks = scraped_data.get('release_radar', [])
             
             # Enhance track data with Spotify API
             print("\n📈 Enhancing New Music Friday tracks...")
@@ -260,26 +291,17 @@ class EnhancedSpotifyAutomation:
         except Exception as e:
             print(f"❌ Error getting enhanced playlist data: {e}")
             return {'new_music_friday': [], 'release_radar': []}
-        
-        finally:
-            if scraper:
-                scraper.close()
     
-    def run_enhanced_automation(self, 
-                            use_new_music_friday: bool = True,
-                            use_release_radar: bool = True,
-                            top_tracks_per_playlist: int = 15,
-                            use_cached: bool = True) -> Dict:
+    def select_weekly_tracks(self,
+                             use_new_music_friday: bool = True,
+                             use_release_radar: bool = True,
+                             top_tracks_per_playlist: int = 15,
+                             use_cached: bool = True) -> List[Dict]:
         """
-        Run the complete enhanced automation with EXACTLY 5 unique tracks per playlist.
+        Scrape, enhance and select EXACTLY 5 unique tracks per playlist.
         Dedupe within each playlist and across playlists (NMF has priority).
         Ensures RR still fills to 5 by pulling from a larger candidate pool.
         """
-        import os
-        from datetime import datetime, timedelta
-
-        from main import SpotifyNewMusicAutomation
-
         def _norm(s: str) -> str:
             return (s or "").strip().lower()
 
@@ -304,11 +326,6 @@ class EnhancedSpotifyAutomation:
                     break
             return unique
 
-        print("🚀 Starting Enhanced New Music Friday Automation...")
-        print("🎯 Goal: 5 unique tracks per playlist (no cross-duplication)")
-        print("🖼️ With full album art and metadata")
-        print("🔇 Running completely headless")
-
         # --- IMPORTANT FIX ---
         # Pull a bigger candidate pool so RR can refill after excluding NMF overlaps.
         candidate_pool_per_playlist = max(top_tracks_per_playlist, 100)
@@ -343,219 +360,90 @@ class EnhancedSpotifyAutomation:
         print(f"   • Release Radar: {len(rr_unique)} (target 5)")
         print(f"   • Total: {len(unique_tracks)}")
 
-        if not unique_tracks:
-            print("❌ No tracks found")
-            return {}
+        return unique_tracks
+
+    def run_enhanced_automation(self, 
+                            use_new_music_friday: bool = True,
+                            use_release_radar: bool = True,
+                            top_tracks_per_playlist: int = 15,
+                            use_cached: bool = True,
+                            incremental: bool = True,
+                            force_stages: Optional[List[str]] = None) -> Dict:
+        """
+        Run the complete enhanced automation with EXACTLY 5 unique tracks per playlist.
+
+        Each artifact's inputs are fingerprinted next to the week's outputs, so a
+        rerun only redoes the stages whose inputs changed (e.g. only the
+        tracklist when only the title changed). Pass incremental=False to
+        rebuild everything.
+
+        Completed stages are checkpointed in output/run_state_<week>.json. If
+        the previous run for the week failed, this run resumes after its last
+        completed stage instead of scraping and rendering again. force_stages
+        reruns the named stages (and everything downstream of them) anyway.
+        """
+        import os
+        from datetime import datetime, timedelta
+
+        print("🚀 Starting Enhanced New Music Friday Automation...")
+        print("🎯 Goal: 5 unique tracks per playlist (no cross-duplication)")
+        print("🖼️ With full album art and metadata")
+        print("🔇 Running completely headless")
 
         # Generate timestamp for files
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Initialize main automation
+
+        # Calculate week start (Friday - the day the refresh happens)
+        today = datetime.now()
+        days_since_friday = (today.weekday() - 4) % 7  # 4 = Friday (0=Monday, 4=Friday)
+        week_start_str = (today - timedelta(days=days_since_friday)).strftime('%Y-%m-%d')
+
+        selection = {
+            'use_new_music_friday': use_new_music_friday,
+            'use_release_radar': use_release_radar,
+            'top_tracks_per_playlist': top_tracks_per_playlist,
+            'use_cached': use_cached
+        }
+        metrics.reset('enhanced_automation')
+        # Older weeks' artifacts are cleaned up while the pipeline runs; this week's are left alone
+        retention = None
+        if SpotifyConfig.RETENTION_ENABLED:
+            retention = RetentionService(SpotifyConfig.OUTPUT_DIR, active_week=week_start_str).start()
+        runner = self._build_content_pipeline(selection, week_start_str, timestamp, incremental, force_stages)
         try:
-            automation = SpotifyNewMusicAutomation(self.client_id, self.client_secret)
-            
-            # Generate images using the actual scraped tracks instead of simulation
-            print("🎨 Generating images with actual scraped tracks...")
-            
-            # Calculate week start (Friday)
-            today = datetime.now()
-            days_since_friday = (today.weekday() - 4) % 7  # 4 = Friday (0=Monday, 4=Friday)
-            week_start = today - timedelta(days=days_since_friday)
-            week_start_str = week_start.strftime('%Y-%m-%d')
-            
-            # Fetch preferences from Supabase if they exist
-            preferred_track_id = None
-            custom_tracklist_title = None
-            custom_image_url = None
-            try:
-                from supabase import Client, create_client
-                supabase_url = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
-                supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
-                if supabase_url and supabase_key:
-                    supabase: Client = create_client(supabase_url, supabase_key)
-                    prefs_result = supabase.table('images').select(
-                        'preferred_track_id, tracklist_title, custom_image_url'
-                    ).eq('week_start', week_start_str).execute()
-                    
-                    if prefs_result.data and len(prefs_result.data) > 0:
-                        prefs = prefs_result.data[0]
-                        preferred_track_id = prefs.get('preferred_track_id')
-                        custom_tracklist_title = prefs.get('tracklist_title')
-                        custom_image_url = prefs.get('custom_image_url')
-                        if preferred_track_id:
-                            print(f"📋 Found preferred track ID: {preferred_track_id}")
-                        if custom_tracklist_title:
-                            print(f"📋 Found custom tracklist title: {custom_tracklist_title}")
-                        if custom_image_url:
-                            print(f"📋 Found custom image URL: {custom_image_url}")
-            except Exception as e:
-                print(f"⚠️ Could not fetch preferences: {e}")
-            
-            # Reorder tracks to put preferred track first if it exists
-            cover_track = unique_tracks[0] if unique_tracks else None
-            if preferred_track_id and unique_tracks:
-                # Find the preferred track in the list
-                preferred_track = None
-                for track in unique_tracks:
-                    # Check multiple possible ID fields
-                    track_id = track.get('id') or track.get('track_id')
-                    if track_id and str(track_id) == str(preferred_track_id):
-                        preferred_track = track
-                        break
-                
-                if preferred_track:
-                    # Move preferred track to the front
-                    unique_tracks.remove(preferred_track)
-                    unique_tracks.insert(0, preferred_track)
-                    cover_track = preferred_track
-                    print(f"✅ Using preferred track: {preferred_track.get('name', 'Unknown')}")
-                else:
-                    print(f"⚠️ Preferred track ID {preferred_track_id} not found in current tracks, using default")
-            
-            # Check if custom image URL exists - if so, use it instead of generating
-            # IMPORTANT: Only generate cover image if user has selected a cover track
-            # If no selection made yet, skip cover image generation and wait for user selection
-            single_artist_path = None
-            if custom_image_url:
-                print(f"✅ Using custom uploaded image: {custom_image_url}")
-                # The custom image is already processed with overlay, so we'll use its URL directly
-                # No need to generate a new image
-            elif preferred_track_id or cover_track:
-                # User has selected a cover track, generate the image
-                if cover_track:
-                    print(f"🎨 Generating cover image using user-selected track: {cover_track.get('name', 'Unknown')}")
-                    single_artist_filename = f"{week_start_str}_artist_collage_{timestamp}.png"
-                    single_artist_path = automation.create_single_artist_image(cover_track, automation.spotify, single_artist_filename)
-                else:
-                    single_artist_path = None
-            else:
-                # No user selection yet - skip cover image generation
-                # User needs to select a cover track in the UI first
-                print(f"⏸️ No cover track selected yet. Skipping cover image generation.")
-                print(f"💡 Please select a cover track in the tracks management UI, then images will be generated.")
-                single_artist_path = None
-            
-            # Create tracklist with custom title if provided
-            tracklist_filename = f"{week_start_str}_tracklist_{timestamp}.png"
-            tracklist_path = automation.create_tracklist_image(unique_tracks, tracklist_filename, custom_title=custom_tracklist_title)
-            
-            # Generate caption
-            caption = automation.generate_caption(unique_tracks)
-            
-            # Save track data
-            data_filename = f"nmf_data_{timestamp}.json"
-            data_path = automation.save_track_data(unique_tracks, data_filename)
-            
-            # Upload images to Supabase and save metadata
-            cover_url = None
-            tracklist_url = None
-            
-            print(f"🖼️ Uploading images for week {week_start_str}...")
-            
-            # Use custom image URL if available, otherwise upload generated image
-            if custom_image_url:
-                cover_url = custom_image_url
-                print(f"✅ Using custom image URL: {cover_url}")
-            elif single_artist_path and os.path.exists(single_artist_path):
-                print(f"📤 Uploading cover image: {single_artist_path}")
-                cover_url = automation.upload_image_to_supabase(single_artist_path, week_start_str, 'cover')
-                if cover_url:
-                    print(f"✅ Cover image uploaded: {cover_url}")
-                else:
-                    print("❌ Failed to upload cover image")
-            else:
-                print("⚠️ No cover image to upload")
-            
-            if tracklist_path and os.path.exists(tracklist_path):
-                print(f"📤 Uploading tracklist image: {tracklist_path}")
-                tracklist_url = automation.upload_image_to_supabase(tracklist_path, week_start_str, 'tracklist')
-                if tracklist_url:
-                    print(f"✅ Tracklist image uploaded: {tracklist_url}")
-                else:
-                    print("❌ Failed to upload tracklist image")
-            else:
-                print("⚠️ No tracklist image to upload")
-            
-            # Save image metadata to Supabase
-            print(f"💾 Saving image metadata to database...")
-            if cover_url or tracklist_url:
-                try:
-                    automation.save_image_metadata(week_start_str, cover_url, tracklist_url)
-                    print(f"✅ Image metadata saved for week {week_start_str}")
-                except Exception as e:
-                    print(f"❌ Failed to save image metadata: {e}")
-            else:
-                print("⚠️ No image URLs to save to database")
-            
-            # Generate caption and hashtags
-            print(f"📝 Generating caption and hashtags...")
-            try:
-                from caption_generator import CaptionGenerator
-                caption_gen = CaptionGenerator()
-                
-                caption_result = caption_gen.generate_caption(
-                    tracks=unique_tracks,
-                    week_start=week_start_str,
-                    include_hashtags=True
-                )
-                
-                print(f"✅ Caption generated ({caption_result['character_count']} chars)")
-                print(f"📝 Caption: {caption_result['caption'][:100]}...")
-                print(f"🏷️ Hashtags: {len(caption_result['hashtags'])} generated")
-                
-                # Save caption to images table
-                automation.save_caption_metadata(
-                    week_start_str, 
-                    caption_result['caption'],
-                    caption_result['hashtags'],
-                    'reviewer'
-                )
-                
-            except Exception as e:
-                print(f"❌ Failed to generate caption: {e}")
-                # Continue without caption - images are still saved
-            
-            # Create results dictionary
-            results = {
-                'track_count': len(unique_tracks),
-                'single_artist_image': single_artist_path,
-                'tracklist_image': tracklist_path,
-                'cover_url': cover_url,
-                'tracklist_url': tracklist_url,
-                'week_start': week_start_str,
-                'caption': caption,
-                'caption_file': f"output/nmf_caption_{timestamp}.txt",
-                'data_file': data_path,
-                'generated_at': datetime.now().isoformat()
-            }
-            
-            # Save caption to file
-            caption_filename = f"nmf_caption_{timestamp}.txt"
-            caption_path = os.path.join(automation.config.OUTPUT_DIR, caption_filename)
-            with open(caption_path, 'w', encoding='utf-8') as f:
-                f.write(caption)
-            
-            print("🎉 Image generation completed successfully!")
-            print(f"🎨 Single Artist Image: {single_artist_path}")
-            print(f"📋 Tracklist: {tracklist_path}")
-            if cover_url:
-                print(f"☁️ Cover URL: {cover_url}")
-            if tracklist_url:
-                print(f"☁️ Tracklist URL: {tracklist_url}")
-            print(f"📝 Caption: {caption_path}")
-            print(f"💾 Data: {data_path}")
-            
-            # Extract results for compatibility
-            collage_path = single_artist_path
-            tracklist_path = tracklist_path
-            caption = caption
-            data_path = data_path
-            cover_url = cover_url
-            tracklist_url = tracklist_url
+            stage_results = runner.run()
+            pipeline_failed = False
+        except PipelineError as e:
+            print(f"⚠️ Content pipeline failed: {e}")
+            stage_results = e.results
+            pipeline_failed = True
+
+        retention_report = retention.join() if retention else None
+        if retention_report:
+            print_retention_report(retention_report)
+
+        # Stored next to nmf_data_<timestamp>.json so runs can be compared week over week
+        metrics_path = metrics.save(metrics_path_for(os.path.join(SpotifyConfig.OUTPUT_DIR, f"nmf_data_{timestamp}.json")),
+                                    week_start=week_start_str, pipeline_failed=pipeline_failed)
+        if metrics_path:
+            print(f"📊 Metrics: {metrics_path}")
+
+        unique_tracks = stage_results.get('tracks')
+        if not unique_tracks:
+            print("❌ No tracks found")
+            return {}
+
+        if not pipeline_failed:
+            automation = stage_results['automation']
+            unique_tracks = stage_results['ordered_tracks']['tracks']
+            collage_path = stage_results['cover_image']
+            tracklist_path = stage_results['tracklist_image']
+            caption = stage_results['caption']
+            data_path = stage_results['track_data']
+            cover_url = stage_results['cover_upload']
+            tracklist_url = stage_results['tracklist_upload']
             week_start = week_start_str
-            
-        except Exception as e:
-            print(f"⚠️ Failed to initialize Spotify automation: {e}")
+        else:
             print("🔄 Continuing without Spotify API features...")
             # Create a minimal automation object for basic functionality
             class MinimalAutomation:
@@ -579,6 +467,7 @@ class EnhancedSpotifyAutomation:
                     filepath = f"output/{filename}"
                     with open(filepath, 'w', encoding='utf-8') as f:
                         json.dump(tracks, f, indent=2, ensure_ascii=False)
+                    record_artifact(filepath)
                     return filepath
             
             automation = MinimalAutomation()
@@ -614,78 +503,15 @@ class EnhancedSpotifyAutomation:
             tracklist_url = None
             week_start = None
 
-        # Save tracks to Supabase
-        print("💾 Saving tracks to Supabase...")
-        try:
-            from supabase import create_client
-
-            # Use Supabase credentials from environment variables
-            supabase_url = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
-            supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
-            
-            print("🔍 Using Supabase credentials from environment variables")
-            print(f"🔍 Debug - Using Supabase URL: {supabase_url[:50] if supabase_url else 'NOT_SET'}...")
-            print(f"🔍 Debug - Using Supabase KEY: {supabase_key[:20] if supabase_key else 'NOT_SET'}...")
-            
-            # Validate credentials before creating client
-            if not supabase_url or not supabase_url.strip():
-                raise Exception("Invalid Supabase URL")
-            if not supabase_key or not supabase_key.strip():
-                raise Exception("Invalid Supabase KEY")
-
-            print("🔗 Creating Supabase client...")
-            try:
-                supabase = create_client(supabase_url, supabase_key)
-                print("✅ Supabase client created successfully!")
-            except Exception as client_error:
-                print(f"❌ Failed to create Supabase client: {client_error}")
-                raise client_error
-
-            # Week start (Friday - the day the refresh happens)
-            today = datetime.now()
-            days_since_friday = (today.weekday() - 4) % 7  # 4 = Friday (0=Monday, 4=Friday)
-            week_start = today - timedelta(days=days_since_friday)
-            week_start_str = week_start.strftime('%Y-%m-%d')
-
-            # Clean up existing tracks for this week to prevent duplicates
-            print(f"🧹 Cleaning up existing tracks for week {week_start_str}...")
-            try:
-                delete_result = supabase.table('tracks').delete().eq('week_start', week_start_str).execute()
-                if hasattr(delete_result, 'data') and delete_result.data:
-                    print(f"✅ Deleted {len(delete_result.data)} existing tracks for week {week_start_str}")
-                else:
-                    print(f"ℹ️ No existing tracks found for week {week_start_str}")
-            except Exception as cleanup_error:
-                print(f"⚠️ Warning: Failed to cleanup existing tracks: {cleanup_error}")
-                print("Continuing with track insertion...")
-
-            tracks_saved = 0
-            for track in unique_tracks:
-                track_data = {
-                    'track_name': track.get('name', ''),
-                    'artists': track.get('artist', ''),
-                    'album': track.get('album', ''),
-                    'spotify_url': track.get('spotify_url', ''),
-                    'album_art_url': track.get('album_art_url'),
-                    'popularity': track.get('popularity', 0),
-                    'playlist_name': track.get('playlist_source', 'Unknown'),
-                    'week_start': week_start_str,
-                    'created_at': datetime.now().isoformat()
-                }
-                result = supabase.table('tracks').insert(track_data).execute()
-                if getattr(result, "data", None):
-                    tracks_saved += 1
-
-            print(f"✅ Successfully saved {tracks_saved}/{len(unique_tracks)} tracks to Supabase")
-
-        except Exception as e:
-            print(f"⚠️ Failed to save to Supabase: {e}")
-            print("💾 Tracks still saved to JSON file")
+            # The pipeline saves tracks alongside the uploads; only save here if it never got that far
+            if 'supabase_tracks' not in stage_results:
+                self.save_tracks_to_supabase(unique_tracks, week_start_str)
 
         caption_filename = f"enhanced_caption_{timestamp}.txt"
         caption_path = os.path.join(automation.config.OUTPUT_DIR, caption_filename)
         with open(caption_path, 'w', encoding='utf-8') as f:
             f.write(caption)
+        record_artifact(caption_path, week_start=week_start_str)
 
         results = {
             'track_count': len(unique_tracks),
@@ -739,8 +565,342 @@ class EnhancedSpotifyAutomation:
 
         return results
 
+    def _build_content_pipeline(self,
+                                selection: Dict,
+                                week_start_str: str,
+                                timestamp: str,
+                                incremental: bool = True,
+                                force_stages: Optional[List[str]] = None) -> PipelineRunner:
+        """
+        Build the stage graph that turns the week's playlists into published content
+
+        Independent stages run concurrently: the tracklist render, captions and
+        the Supabase track insert overlap with the cover download and uploads.
+        Stages with a fingerprint are skipped when their inputs are unchanged
+        since the last run for the same week, and are checkpointed in the
+        week's run journal so a failed run resumes after its last completed stage.
+
+        Args:
+            selection: Keyword arguments for select_weekly_tracks
+            week_start_str: Week start date (YYYY-MM-DD)
+            timestamp: Run timestamp used in output filenames
+            incremental: Whether to reuse results of stages with unchanged inputs
+            force_stages: Stages to rerun even if checkpointed or unchanged
+
+        Returns:
+            PipelineRunner ready to run
+        """
+        from main import SpotifyConfig, SpotifyNewMusicAutomation
+
+        template_version = SpotifyConfig.TEMPLATE_VERSION
+        runner = PipelineRunner(
+            name='content pipeline',
+            fingerprint_store=FingerprintStore.for_week(SpotifyConfig.OUTPUT_DIR, week_start_str),
+            incremental=incremental,
+            journal=RunJournal.for_week(SpotifyConfig.OUTPUT_DIR, week_start_str),
+            force_stages=force_stages
+        )
+
+        def scrape():
+            if selection['use_cached'] and os.path.exists(SCRAPE_CACHE_FILE):
+                print("📂 Using cached scraped data...")
+                with open(SCRAPE_CACHE_FILE, 'r', encoding='utf-8') as f:
+                    scraped_at = json.load(f).get('scraped_at')
+            else:
+                scraped_at = self.scrape_playlists(SCRAPE_CACHE_FILE)['scraped_at']
+            return {'path': SCRAPE_CACHE_FILE, 'scraped_at': scraped_at}
+
+        def select_tracks(scrape):
+            # The scrape stage has just written (or resumed) the cache, so always read it back
+            unique_tracks = self.select_weekly_tracks(**{**selection, 'use_cached': True})
+            if not unique_tracks:
+                raise ValueError("No tracks selected for this week")
+            return unique_tracks
+
+        def init_automation():
+            return SpotifyNewMusicAutomation(self.client_id, self.client_secret)
+
+        def fetch_preferences():
+            # Fetch preferences from Supabase if they exist
+            prefs = {'preferred_track_id': None, 'tracklist_title': None, 'custom_image_url': None}
+            try:
+                supabase_url = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
+                supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
+                if supabase_url and supabase_key:
+                    supabase: Client = create_client(supabase_url, supabase_key)
+                    metrics.count('db_round_trips')
+                    prefs_result = supabase.table('images').select(
+                        'preferred_track_id, tracklist_title, custom_image_url'
+                    ).eq('week_start', week_start_str).execute()
+                    
+                    if prefs_result.data and len(prefs_result.data) > 0:
+                        prefs.update({key: prefs_result.data[0].get(key) for key in prefs})
+                        if prefs['preferred_track_id']:
+                            print(f"📋 Found preferred track ID: {prefs['preferred_track_id']}")
+                        if prefs['tracklist_title']:
+                            print(f"📋 Found custom tracklist title: {prefs['tracklist_title']}")
+                        if prefs['custom_image_url']:
+                            print(f"📋 Found custom image URL: {prefs['custom_image_url']}")
+            except Exception as e:
+                print(f"⚠️ Could not fetch preferences: {e}")
+            return prefs
+
+        def order_tracks(tracks, preferences):
+            # Reorder tracks to put preferred track first if it exists
+            tracks, preferred_track = preferred_first(tracks, preferences['preferred_track_id'])
+            if preferred_track:
+                print(f"✅ Using preferred track: {preferred_track.get('name', 'Unknown')}")
+            elif preferences['preferred_track_id'] and tracks:
+                print(f"⚠️ Preferred track ID {preferences['preferred_track_id']} not found in current tracks, using default")
+            return {'tracks': tracks, 'cover_track': tracks[0] if tracks else None}
+
+        def render_cover(automation, preferences, ordered_tracks):
+            # A custom uploaded image is already processed with overlay, so its URL is used directly
+            if preferences['custom_image_url']:
+                print(f"✅ Using custom uploaded image: {preferences['custom_image_url']}")
+                return None
+
+            cover_track = ordered_tracks['cover_track']
+            if not cover_track:
+                # No user selection yet - the user needs to select a cover track in the UI first
+                print(f"⏸️ No cover track selected yet. Skipping cover image generation.")
+                print(f"💡 Please select a cover track in the tracks management UI, then images will be generated.")
+                return None
+
+            # A cover pre-rendered by the batch renderer (cover_batch.py) only needs a lookup
+            pre_rendered = find_cover(automation.config.OUTPUT_DIR, week_start_str, cover_track)
+            if pre_rendered:
+                print(f"🗂️ Using pre-rendered cover for {cover_track.get('name', 'Unknown')}: {pre_rendered}")
+                return pre_rendered
+
+            print(f"🎨 Generating cover image using user-selected track: {cover_track.get('name', 'Unknown')}")
+            single_artist_filename = f"{week_start_str}_artist_collage_{timestamp}.png"
+            return automation.create_single_artist_image(cover_track, automation.spotify, single_artist_filename)
+
+        def render_tracklist(automation, preferences, ordered_tracks):
+            # Create tracklist with custom title if provided
+            tracklist_filename = f"{week_start_str}_tracklist_{timestamp}.png"
+            return automation.create_tracklist_image(
+                ordered_tracks['tracks'], tracklist_filename, custom_title=preferences['tracklist_title']
+            )
+
+        def write_caption(automation, ordered_tracks):
+            caption = automation.generate_caption(ordered_tracks['tracks'])
+            caption_path = os.path.join(automation.config.OUTPUT_DIR, f"nmf_caption_{timestamp}.txt")
+            with open(caption_path, 'w', encoding='utf-8') as f:
+                f.write(caption)
+            record_artifact(caption_path, week_start=week_start_str)
+            return caption
+
+        def save_data(automation, ordered_tracks):
+            return automation.save_track_data(ordered_tracks['tracks'], f"nmf_data_{timestamp}.json",
+                                              week_start=week_start_str)
+
+        def upload_cover(automation, preferences, cover_image):
+            # Use custom image URL if available, otherwise upload generated image
+            if preferences['custom_image_url']:
+                print(f"✅ Using custom image URL: {preferences['custom_image_url']}")
+                return preferences['custom_image_url']
+            if not cover_image or not os.path.exists(cover_image):
+                print("⚠️ No cover image to upload")
+                return None
+
+            print(f"📤 Uploading cover image: {cover_image}")
+            cover_url = automation.upload_image_to_supabase(cover_image, week_start_str, 'cover')
+            if cover_url:
+                print(f"✅ Cover image uploaded: {cover_url}")
+            else:
+                print("❌ Failed to upload cover image")
+            return cover_url
+
+        def upload_tracklist(automation, tracklist_image):
+            if not tracklist_image or not os.path.exists(tracklist_image):
+                print("⚠️ No tracklist image to upload")
+                return None
+
+            print(f"📤 Uploading tracklist image: {tracklist_image}")
+            tracklist_url = automation.upload_image_to_supabase(tracklist_image, week_start_str, 'tracklist')
+            if tracklist_url:
+                print(f"✅ Tracklist image uploaded: {tracklist_url}")
+            else:
+                print("❌ Failed to upload tracklist image")
+            return tracklist_url
+
+        def save_metadata(automation, cover_upload, tracklist_upload):
+            print(f"💾 Saving image metadata to database...")
+            if not (cover_upload or tracklist_upload):
+                print("⚠️ No image URLs to save to database")
+                return None
+            try:
+                automation.save_image_metadata(week_start_str, cover_upload, tracklist_upload)
+                print(f"✅ Image metadata saved for week {week_start_str}")
+                return True
+            except Exception as e:
+                print(f"❌ Failed to save image metadata: {e}")
+                return None
+
+        def generate_ai_caption(ordered_tracks):
+            print(f"📝 Generating caption and hashtags...")
+            try:
+                from caption_generator import CaptionGenerator
+                with CaptionGenerator() as generator:
+                    caption_result = generator.generate_caption(
+                        tracks=ordered_tracks['tracks'],
+                        week_start=week_start_str,
+                        include_hashtags=True
+                    )
+                source = "from cache" if caption_result.get('cached') else caption_result['method']
+                print(f"✅ Caption generated ({caption_result['character_count']} chars, {source})")
+                print(f"📝 Caption: {caption_result['caption'][:100]}...")
+                print(f"🏷️ Hashtags: {len(caption_result['hashtags'])} generated")
+                return caption_result
+            except Exception as e:
+                print(f"❌ Failed to generate caption: {e}")
+                # Continue without caption - images are still saved
+                return None
+
+        def save_ai_caption(automation, ai_caption, image_metadata):
+            # Runs after the image metadata upsert so the caption row sees the new image URLs
+            if not ai_caption:
+                return None
+            try:
+                automation.save_caption_metadata(
+                    week_start_str,
+                    ai_caption['caption'],
+                    ai_caption['hashtags'],
+                    'reviewer'
+                )
+                return True
+            except Exception as e:
+                print(f"❌ Failed to save caption: {e}")
+                return None
+
+        def save_tracks(ordered_tracks):
+            return self.save_tracks_to_supabase(ordered_tracks['tracks'], week_start_str) or None
+
+        def track_set(ordered_tracks):
+            return track_set_fingerprint(ordered_tracks['tracks'])
+
+        # A fresh scrape is fingerprinted per run so it is only ever reused by a resumed run
+        runner.add_stage('scrape', scrape,
+                         fingerprint=lambda: {'week_start': week_start_str,
+                                              'run': None if selection['use_cached'] else timestamp})
+        runner.add_stage('tracks', select_tracks, inputs=['scrape'],
+                         fingerprint=lambda scrape: {'week_start': week_start_str, 'scraped_at': scrape['scraped_at'],
+                                                     **selection})
+        runner.add_stage('automation', init_automation)
+        runner.add_stage('preferences', fetch_preferences)
+        runner.add_stage('ordered_tracks', order_tracks, inputs=['tracks', 'preferences'])
+        runner.add_stage('cover_image', render_cover, inputs=['automation', 'preferences', 'ordered_tracks'],
+                         fingerprint=lambda automation, preferences, ordered_tracks: {
+                             'template_version': template_version,
+                             'output_format': SpotifyConfig.OUTPUT_FORMATS['cover'],
+                             'cover_track': track_set_fingerprint([ordered_tracks['cover_track'] or {}]),
+                             'custom_image_url': preferences['custom_image_url']
+                         })
+        runner.add_stage('tracklist_image', render_tracklist, inputs=['automation', 'preferences', 'ordered_tracks'],
+                         fingerprint=lambda automation, preferences, ordered_tracks: {
+                             'template_version': template_version,
+                             'output_format': SpotifyConfig.OUTPUT_FORMATS['tracklist'],
+                             'tracks': track_set(ordered_tracks),
+                             'title': preferences['tracklist_title']
+                         })
+        runner.add_stage('caption', write_caption, inputs=['automation', 'ordered_tracks'],
+                         fingerprint=lambda automation, ordered_tracks: track_set(ordered_tracks))
+        runner.add_stage('track_data', save_data, inputs=['automation', 'ordered_tracks'],
+                         fingerprint=lambda automation, ordered_tracks: track_set(ordered_tracks))
+        runner.add_stage('ai_caption', generate_ai_caption, inputs=['ordered_tracks'],
+                         fingerprint=lambda ordered_tracks: track_set(ordered_tracks))
+        runner.add_stage('supabase_tracks', save_tracks, inputs=['ordered_tracks'],
+                         fingerprint=lambda ordered_tracks: track_set(ordered_tracks))
+        runner.add_stage('cover_upload', upload_cover, inputs=['automation', 'preferences', 'cover_image'],
+                         fingerprint=lambda automation, preferences, cover_image: [cover_image, preferences['custom_image_url']])
+        runner.add_stage('tracklist_upload', upload_tracklist, inputs=['automation', 'tracklist_image'],
+                         fingerprint=lambda automation, tracklist_image: tracklist_image)
+        runner.add_stage('image_metadata', save_metadata, inputs=['automation', 'cover_upload', 'tracklist_upload'],
+                         fingerprint=lambda automation, cover_upload, tracklist_upload: [cover_upload, tracklist_upload])
+        runner.add_stage('caption_metadata', save_ai_caption, inputs=['automation', 'ai_caption', 'image_metadata'],
+                         fingerprint=lambda automation, ai_caption, image_metadata: [
+                             ai_caption and ai_caption['caption'], ai_caption and ai_caption['hashtags'], image_metadata
+                         ])
+        return runner
+
+    def save_tracks_to_supabase(self, tracks: List[Dict], week_start_str: str) -> int:
+        """
+        Replace the week's rows in the Supabase tracks table
 
-def test_enhanced_automation():
+        Args:
+            tracks: Tracks to save
+            week_start_str: Week start date (YYYY-MM-DD)
+
+        Returns:
+            Number of tracks saved
+        """
+        print("💾 Saving tracks to Supabase...")
+        try:
+            # Use Supabase credentials from environment variables
+            supabase_url = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
+            supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
+            
+            print("🔍 Using Supabase credentials from environment variables")
+            print(f"🔍 Debug - Using Supabase URL: {supabase_url[:50] if supabase_url else 'NOT_SET'}...")
+            print(f"🔍 Debug - Using Supabase KEY: {supabase_key[:20] if supabase_key else 'NOT_SET'}...")
+            
+            # Validate credentials before creating client
+            if not supabase_url or not supabase_url.strip():
+                raise Exception("Invalid Supabase URL")
+            if not supabase_key or not supabase_key.strip():
+                raise Exception("Invalid Supabase KEY")
+
+            print("🔗 Creating Supabase client...")
+            try:
+                supabase = create_client(supabase_url, supabase_key)
+                print("✅ Supabase client created successfully!")
+            except Exception as client_error:
+                print(f"❌ Failed to create Supabase client: {client_error}")
+                raise client_error
+
+            # Clean up existing tracks for this week to prevent duplicates
+            print(f"🧹 Cleaning up existing tracks for week {week_start_str}...")
+            try:
+                metrics.count('db_round_trips')
+                delete_result = supabase.table('tracks').delete().eq('week_start', week_start_str).execute()
+                if hasattr(delete_result, 'data') and delete_result.data:
+                    print(f"✅ Deleted {len(delete_result.data)} existing tracks for week {week_start_str}")
+                else:
+                    print(f"ℹ️ No existing tracks found for week {week_start_str}")
+            except Exception as cleanup_error:
+                print(f"⚠️ Warning: Failed to cleanup existing tracks: {cleanup_error}")
+                print("Continuing with track insertion...")
+
+            tracks_saved = 0
+            for track in tracks:
+                track_data = {
+                    'track_name': track.get('name', ''),
+                    'artists': track.get('artist', ''),
+                    'album': track.get('album', ''),
+                    'spotify_url': track.get('spotify_url', ''),
+                    'album_art_url': track.get('album_art_url'),
+                    'popularity': track.get('popularity', 0),
+                    'playlist_name': track.get('playlist_source', 'Unknown'),
+                    'week_start': week_start_str,
+                    'created_at': datetime.now().isoformat()
+                }
+                metrics.count('db_round_trips')
+                result = supabase.table('tracks').insert(track_data).execute()
+                if getattr(result, "data", None):
+                    tracks_saved += 1
+
+            print(f"✅ Successfully saved {tracks_saved}/{len(tracks)} tracks to Supabase")
+            return tracks_saved
+
+        except Exception as e:
+            print(f"⚠️ Failed to save to Supabase: {e}")
+            print("💾 Tracks still saved to JSON file")
+            return 0
+
+
+def test_enhanced_automation(force_stages: Optional[List[str]] = None, incremental: bool = True):
     """Test the enhanced automation"""
     # Use environment variables for Spotify credentials
     client_id = os.getenv('SPOTIFY_CLIENT_ID')
@@ -765,17 +925,26 @@ def test_enhanced_automation():
     
     # Determine if we should use cached data
     # Force fresh scraping in GitHub Actions or if explicitly requested
+    # (a failed run still resumes from its checkpointed scrape)
     use_cached = False  # False if running in GitHub Actions
     
+    # Stages to rerun can also come from the workflow, e.g. FORCE_STAGES=tracklist_image,caption
+    if force_stages is None:
+        force_stages = [stage.strip() for stage in os.getenv('FORCE_STAGES', '').split(',') if stage.strip()]
+    
     print(f"🔍 Running in GitHub Actions: {bool(os.getenv('GITHUB_ACTIONS'))}")
     print(f"🔍 Using cached data: {use_cached}")
+    if force_stages:
+        print(f"🔍 Forcing stages: {', '.join(force_stages)}")
     
     # Run enhanced automation
     results = automation.run_enhanced_automation(
         use_new_music_friday=True,
         use_release_radar=True,  # Re-enable Release Radar
         top_tracks_per_playlist=5,  # Get top 5 most popular from each
-        use_cached=use_cached
+        use_cached=use_cached,
+        incremental=incremental,
+        force_stages=force_stages
     )
     
     if results:
@@ -789,12 +958,21 @@ def test_enhanced_automation():
         print("❌ Enhanced automation failed")
 
 if __name__ == "__main__":
+    import argparse
     import os
 
+    parser = argparse.ArgumentParser(description="Run the enhanced New Music Friday automation")
+    parser.add_argument('--force', metavar='STAGE[,STAGE]',
+                        help="Rerun these stages and everything downstream, ignoring checkpoints")
+    parser.add_argument('--full-rebuild', action='store_true',
+                        help="Ignore stored fingerprints and rebuild every artifact")
+    args = parser.parse_args()
+
     # Debug: Print all environment variables that start with SPOTIFY or SUPABASE
     print("🔍 Debug - Environment variables:")
     for key, value in os.environ.items():
         if key.startswith(('SPOTIFY', 'SUPABASE', 'NEXT_PUBLIC')):
             print(f"  {key}: {value[:20]}..." if len(value) > 20 else f"  {key}: {value}")
     
-    test_enhanced_automation()
\ No newline at end of file
+    force_stages = [stage.strip() for stage in args.force.split(',') if stage.strip()] if args.force else None
+    test_enhanced_automation(force_stages=force_stages, incremental=not args.full_rebuild)
\ No newline at end of file
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Retention for the output directory
+Deletes artifacts the site no longer needs (duplicates, re-runs superseded by newer
+ones, weeks old enough that their uploads are the only copy needed) using the
+artifact manifest, and reports the bytes reclaimed. Runs alongside the pipeline
+in a background thread and never touches the week being built. Track data files
+never expire, so every week keeps its newest nmf_data_*.json, and older runs of a
+week's data are only deleted once the week is in the track archive (archive.db).
+
+Usage:
+    python retention.py --dry-run
+    python retention.py --keep-per-week 1 --max-age-weeks 8
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import threading
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from artifact_manifest import ArtifactManifest
+from config import SpotifyConfig
+from instrumentation import metrics
+from track_archive import ARCHIVE_FILENAME, TrackArchive, import_data_files, iter_data_files
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionPolicy(NamedTuple):
+    """What the retention service keeps"""
+    keep_per_week: int = SpotifyConfig.RETENTION_KEEP_PER_WEEK
+    max_age_weeks: Optional[int] = SpotifyConfig.RETENTION_MAX_AGE_WEEKS  # None keeps every week
+    dedupe: bool = True
+    protected_kinds: Tuple[str, ...] = SpotifyConfig.RETENTION_PROTECTED_KINDS
+    data_kinds: Tuple[str, ...] = SpotifyConfig.RETENTION_DATA_KINDS  # only ever superseded
+
+
+def week_of_entry(entry: Dict) -> Optional[str]:
+    """Week an artifact belongs to: its recorded week, else the Friday on or before its run"""
+    if entry.get('week_start'):
+        return entry['week_start']
+    if entry.get('run'):
+        run_date = datetime.strptime(entry['run'][:8], '%Y%m%d').date()
+        return (run_date - timedelta(days=(run_date.weekday() - 4) % 7)).isoformat()
+    return None
+
+
+def plan_deletions(entries: Iterable[Dict], policy: RetentionPolicy, uploaded_weeks: Set[str],
+                   today: date, active_week: Optional[str] = None,
+                   archived_weeks: Optional[Set[str]] = None) -> List[Tuple[Dict, str]]:
+    """
+    Artifacts the policy deletes
+
+    Track data (policy.data_kinds) never expires and is only deduplicated within
+    its week, so the newest data file of every week is kept. Older runs of a
+    week's data are only deleted once the week is archived.
+
+    Args:
+        entries: Manifest entries, oldest first
+        policy: Retention policy
+        uploaded_weeks: Weeks whose images are uploaded (only these expire)
+        today: Date the age limit counts back from
+        active_week: Week being built, left untouched
+        archived_weeks: Weeks in the track archive; None keeps all track data
+
+    Returns:
+        (entry, reason) pairs; reason is 'expired', 'duplicate' or 'superseded'
+    """
+    archived_weeks = archived_weeks or set()
+    candidates = [
+        entry for entry in entries
+        if entry['kind'] not in policy.protected_kinds and week_of_entry(entry) != active_week
+        and (entry['kind'] not in policy.data_kinds or week_of_entry(entry) in archived_weeks)
+    ]
+    doomed: Dict[str, str] = {}
+
+    if policy.max_age_weeks is not None:
+        cutoff = (today - timedelta(weeks=policy.max_age_weeks)).isoformat()
+        for entry in candidates:
+            week = week_of_entry(entry)
+            if week and week < cutoff and week in uploaded_weeks and entry['kind'] not in policy.data_kinds:
+                doomed[entry['path']] = 'expired'
+
+    if policy.dedupe:
+        # Identical files of a kind: keep the newest copy; track data is only compared within its week
+        def identity(entry):
+            week = week_of_entry(entry) if entry['kind'] in policy.data_kinds else None
+            return entry['kind'], entry['sha256'], week
+
+        newest = {identity(entry): entry['path'] for entry in candidates}
+        for entry in candidates:
+            if entry['path'] not in doomed and newest[identity(entry)] != entry['path']:
+                doomed[entry['path']] = 'duplicate'
+
+    # A run can write several files of a kind (e.g. carousel slides), so whole runs are
+    # superseded. Files named without a run timestamp are rewritten in place by every
+    # re-run of their week, so together they count as one run.
+    groups: Dict[Tuple[str, str], Dict[Optional[str], List[Dict]]] = {}
+    for entry in candidates:
+        week = week_of_entry(entry)
+        if week and entry['path'] not in doomed:
+            runs = groups.setdefault((week, entry['kind']), {})
+            # Runs are ordered by their most recently recorded file
+            runs[entry.get('run')] = runs.pop(entry.get('run'), []) + [entry]
+    keep = max(policy.keep_per_week, 1)
+    for runs in groups.values():
+        for run_entries in list(runs.values())[:-keep]:
+            for entry in run_entries:
+                doomed[entry['path']] = 'superseded'
+
+    return [(entry, doomed[entry['path']]) for entry in candidates if entry['path'] in doomed]
+
+
+def _iso_week(week: str) -> str:
+    # main.py's runs key their week as YYYYMMDD
+    return f"{week[:4]}-{week[4:6]}-{week[6:8]}" if week.isdigit() else week
+
+
+def uploaded_weeks(output_dir: str) -> Set[str]:
+    """
+    Weeks whose cover or tracklist has been uploaded
+
+    Combines the upload stages recorded in the run journals with the images table
+    (when Supabase is configured).
+    """
+    weeks = set()
+    for path in glob.glob(os.path.join(output_dir, 'run_state_*.json')):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                stages = json.load(f).get('stages', {})
+        except (OSError, ValueError):
+            continue
+        if any((stages.get(stage) or {}).get('result') for stage in ('cover_upload', 'tracklist_upload')):
+            weeks.add(_iso_week(os.path.basename(path)[len('run_state_'):-len('.json')]))
+
+    supabase_url = os.getenv('NEXT_PUBLIC_SUPABASE_URL')
+    supabase_key = os.getenv('SUPABASE_SERVICE_KEY')
+    if supabase_url and supabase_key:
+        try:
+            from supabase import create_client
+            metrics.count('db_round_trips')
+            rows = create_client(supabase_url, supabase_key).table('images').select(
+                'week_start, cover_image_url, tracklist_image_url'
+            ).execute().data or []
+            for row in rows:
+                if row.get('cover_image_url') or row.get('tracklist_image_url'):
+                    weeks.add(_iso_week(str(row['week_start'])[:10]))
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load uploaded weeks from Supabase: {e}")
+    return weeks
+
+
+class RetentionService:
+    """Applies a retention policy to an output directory, in the foreground or a background thread"""
+
+    def __init__(self, output_dir: str = SpotifyConfig.OUTPUT_DIR, policy: Optional[RetentionPolicy] = None,
+                 active_week: Optional[str] = None, dry_run: bool = False,
+                 uploaded: Callable[[str], Set[str]] = uploaded_weeks):
+        """
+        Initialize the retention service
+
+        Args:
+            output_dir: Directory to clean up
+            policy: Retention policy (default: the SpotifyConfig settings)
+            active_week: Week the running pipeline is building; its artifacts are never deleted
+            dry_run: Report what would be deleted without deleting it
+            uploaded: Returns the uploaded weeks of an output directory
+        """
+        self.output_dir = output_dir
+        self.policy = policy or RetentionPolicy()
+        self.active_week = active_week
+        self.dry_run = dry_run
+        self.uploaded = uploaded
+        self.report: Optional[Dict] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def run(self) -> Dict:
+        """
+        Delete what the policy does not keep
+
+        Returns:
+            Report: {'files', 'bytes_reclaimed', 'by_reason', 'dry_run'}
+        """
+        report = {'files': 0, 'bytes_reclaimed': 0, 'by_reason': {}, 'dry_run': self.dry_run}
+        if not os.path.isdir(self.output_dir):
+            self.report = report
+            return report
+
+        manifest = ArtifactManifest(self.output_dir)
+        # Pick up files written without going through the manifest
+        manifest.rebuild()
+        plan = plan_deletions(manifest.entries(), self.policy, self.uploaded(self.output_dir),
+                              date.today(), self.active_week, self.archived_weeks())
+
+        for entry, reason in plan:
+            if not os.path.exists(entry['path']):
+                continue
+            size = os.path.getsize(entry['path'])
+            if not self.dry_run:
+                try:
+                    os.remove(entry['path'])
+                except OSError as e:
+                    logger.warning(f"⚠️ Could not delete {entry['path']}: {e}")
+                    continue
+                manifest.remove(entry['path'])
+            report['files'] += 1
+            report['bytes_reclaimed'] += size
+            report['by_reason'][reason] = report['by_reason'].get(reason, 0) + 1
+
+        if not self.dry_run:
+            metrics.count('retention_files_deleted', report['files'])
+            metrics.count('retention_bytes_reclaimed', report['bytes_reclaimed'])
+        self.report = report
+        return report
+
+    def archived_weeks(self) -> Set[str]:
+        """
+        Weeks whose tracks are in the track archive, importing weeks saved before it existed
+
+        A dry run reads the archive without changing it and counts the weeks the
+        import would add. If the archive cannot be opened no week counts as
+        archived, so no track data is deleted.
+        """
+        try:
+            if self.dry_run:
+                weeks = {week for week, _, _ in iter_data_files(self.output_dir)}
+                if os.path.exists(os.path.join(self.output_dir, ARCHIVE_FILENAME)):
+                    with TrackArchive.for_output_dir(self.output_dir) as archive:
+                        weeks.update(archive.weeks())
+                return weeks
+            with TrackArchive.for_output_dir(self.output_dir) as archive:
+                imported = import_data_files(archive, self.output_dir, skip_archived=True)
+                if imported:
+                    logger.info(f"🗄️ Archived {imported} weeks before cleaning up their track data")
+                return set(archive.weeks())
+        except Exception as e:
+            logger.warning(f"⚠️ Could not read the track archive, keeping all track data: {e}")
+            return set()
+
+    def start(self) -> 'RetentionService':
+        """Run in a background thread; join() waits for the report"""
+        self._thread = threading.Thread(target=self._run_logged, name='retention', daemon=True)
+        self._thread.start()
+        return self
+
+    def join(self, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Wait for a background run and return its report (None if it has not finished)"""
+        if self._thread:
+            self._thread.join(timeout)
+        return self.report
+
+    def _run_logged(self) -> None:
+        try:
+            self.run()
+        except Exception as e:
+            logger.warning(f"⚠️ Retention run failed: {e}")
+
+
+def print_retention_report(report: Dict) -> None:
+    """Print a retention report"""
+    verb = "Would delete" if report['dry_run'] else "Deleted"
+    reasons = ', '.join(f"{count} {reason}" for reason, count in sorted(report['by_reason'].items()))
+    print(f"🧹 {verb} {report['files']} files, {report['bytes_reclaimed'] / (1024 * 1024):.1f}MB reclaimed"
+          f"{f' ({reasons})' if reasons else ''}")
+
+
+def main() -> int:
+    defaults = RetentionPolicy()
+    parser = argparse.ArgumentParser(description="Delete output artifacts the retention policy does not keep")
+    parser.add_argument('--output-dir', default=SpotifyConfig.OUTPUT_DIR, help="Output directory (default: output)")
+    parser.add_argument('--keep-per-week', type=int, default=defaults.keep_per_week,
+                        help=f"Newest artifacts of each kind kept per week (default {defaults.keep_per_week})")
+    parser.add_argument('--max-age-weeks', type=int, default=defaults.max_age_weeks,
+                        help=f"Delete uploaded weeks older than this (default {defaults.max_age_weeks}; 0 keeps every week)")
+    parser.add_argument('--no-dedupe', action='store_true', help="Keep identical copies of an artifact")
+    parser.add_argument('--dry-run', action='store_true', help="Only report what would be deleted")
+    args = parser.parse_args()
+
+    # Supabase credentials for the lookup of uploaded weeks
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(os.path.join(os.path.dirname(__file__), '..', '..', '..', '.env'))
+    except ImportError:
+        pass
+
+    policy = RetentionPolicy(keep_per_week=args.keep_per_week, max_age_weeks=args.max_age_weeks or None,
+                             dedupe=not args.no_dedupe)
+    print_retention_report(RetentionService(args.output_dir, policy, dry_run=args.dry_run).run())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
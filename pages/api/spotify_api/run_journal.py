@@ -0,0 +1,142 @@
+"""
+Per-week run-state journal for resumable weekly runs
+Records each completed stage and its artifacts so a failed run can pick up where it stopped
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def find_artifacts(result: Any) -> List[str]:
+    """Collect the local file paths referenced by a stage result"""
+    if isinstance(result, str):
+        return [result] if os.path.isfile(result) else []
+    if isinstance(result, dict):
+        result = list(result.values())
+    if isinstance(result, (list, tuple)):
+        return [path for item in result for path in find_artifacts(item)]
+    return []
+
+
+class RunJournal:
+    """Checkpoint journal for one week's run"""
+
+    def __init__(self, path: str):
+        """
+        Initialize the journal, loading the state of the previous run if any
+
+        Args:
+            path: JSON file the run state is kept in
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._state: Dict = {}
+        self._checkpoints: Dict[str, Dict] = {}
+
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._state = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"⚠️ Ignoring unreadable run journal {path}: {e}")
+
+    @classmethod
+    def for_week(cls, output_dir: str, week_start: str) -> 'RunJournal':
+        """Open the run journal for a week"""
+        return cls(os.path.join(output_dir, f"run_state_{week_start}.json"))
+
+    def begin(self) -> None:
+        """
+        Start a run, resuming from the previous run if it did not complete
+
+        Stages completed by an interrupted run become checkpoints that this
+        run can reuse. A completed previous run starts a fresh journal.
+        """
+        with self._lock:
+            previous_status = self._state.get('status')
+            previous_stages = self._state.get('stages', {})
+
+            if previous_status in ('running', 'failed') and previous_stages:
+                self._checkpoints = dict(previous_stages)
+                print(f"🔁 Resuming interrupted run from checkpoint ({len(previous_stages)} completed stages: "
+                      f"{', '.join(previous_stages)})")
+            else:
+                self._checkpoints = {}
+                previous_stages = {}
+
+            now = datetime.now().isoformat()
+            self._state = {
+                'status': 'running',
+                'started_at': now,
+                'updated_at': now,
+                'resumed_from': previous_status if previous_stages else None,
+                'stages': previous_stages
+            }
+            self._save()
+
+    def checkpoint(self, stage: str, fingerprint: Optional[str] = None) -> Tuple[bool, Any]:
+        """
+        Look up a stage completed by the interrupted run being resumed
+
+        A checkpoint is only usable while all of its recorded artifacts still exist
+        and, when a fingerprint is given, while the stage's inputs are unchanged.
+
+        Args:
+            stage: Stage name
+            fingerprint: Fingerprint of the stage's current inputs
+
+        Returns:
+            (hit, result) where hit is True if the stage can be skipped
+        """
+        with self._lock:
+            entry = self._checkpoints.get(stage)
+        if not entry:
+            return False, None
+
+        if fingerprint is not None and entry.get('fingerprint') != fingerprint:
+            logger.info(f"🔄 Inputs of stage '{stage}' changed since the interrupted run, rerunning it")
+            return False, None
+
+        missing = [path for path in entry.get('artifacts', []) if not os.path.exists(path)]
+        if missing:
+            logger.warning(f"⚠️ Checkpoint for stage '{stage}' is missing artifacts {missing}, rerunning it")
+            return False, None
+        return True, entry.get('result')
+
+    def record(self, stage: str, result: Any, fingerprint: Optional[str] = None) -> None:
+        """Record a completed stage with its result, artifact paths and input fingerprint"""
+        with self._lock:
+            now = datetime.now().isoformat()
+            self._state.setdefault('stages', {})[stage] = {
+                'completed_at': now,
+                'fingerprint': fingerprint,
+                'artifacts': find_artifacts(result),
+                'result': result
+            }
+            self._state['updated_at'] = now
+            self._save()
+
+    def finish(self, status: str) -> None:
+        """
+        Mark the run as finished
+
+        Args:
+            status: 'complete' or 'failed'
+        """
+        with self._lock:
+            self._state['status'] = status
+            self._state['updated_at'] = datetime.now().isoformat()
+            self._save()
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._state, f, indent=2, ensure_ascii=False, default=str)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test script for the artifact manifest
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from artifact_manifest import ArtifactManifest, parse_artifact_name, record_artifact
+
+
+def write(directory, name, content=b'data'):
+    path = os.path.join(directory, name)
+    with open(path, 'wb') as f:
+        f.write(content)
+    return path
+
+
+def test_names_are_parsed_into_kind_week_and_run():
+    """Every naming scheme the pipeline uses maps to a kind, week and run"""
+    assert parse_artifact_name('nmf_data_20251010_101500.json') == ('nmf_data', None, '20251010_101500')
+    assert parse_artifact_name('nmf_data_20251010_20251011_101500.json') == ('nmf_data', '2025-10-10', '20251011_101500')
+    assert parse_artifact_name('2025-10-10_tracklist_20251010_101500.png') == ('tracklist', '2025-10-10', '20251010_101500')
+    assert parse_artifact_name('nmf_single_artist_20251010.png') == ('nmf_single_artist', '2025-10-10', None)
+    assert parse_artifact_name('carousel_2025-10-10_03_artist.png') == ('carousel_artist', '2025-10-10', None)
+
+
+def test_latest_and_week_lookups_follow_recorded_saves():
+    """latest() returns the newest file still on disk; removals and rewrites update the index"""
+    output_dir = tempfile.mkdtemp()
+    write(output_dir, 'enhanced_data_20251003_090000.json')
+    manifest = ArtifactManifest(output_dir)
+    assert not manifest.exists
+    assert manifest.rebuild() == 1
+
+    newer = write(output_dir, 'enhanced_data_20251010_090000.json', b'newer')
+    record_artifact(newer, week_start='2025-10-10')
+    cover = write(output_dir, '2025-10-10_artist_collage_20251010_090000.png')
+    record_artifact(cover)
+
+    manifest = ArtifactManifest(output_dir)
+    latest = manifest.latest('enhanced_data')
+    assert latest['path'] == newer and latest['bytes'] == 5
+    assert [entry['kind'] for entry in manifest.for_week('2025-10-10')] == ['enhanced_data', 'artist_collage']
+    assert manifest.rebuild() == 0
+
+    # A file deleted behind the manifest's back is skipped; a recorded removal drops it
+    os.remove(newer)
+    assert manifest.latest('enhanced_data')['path'].endswith('enhanced_data_20251003_090000.json')
+    manifest.remove(newer)
+    assert [entry['kind'] for entry in ArtifactManifest(output_dir).for_week('2025-10-10')] == ['artist_collage']
+
+
+def test_latest_finds_files_saved_without_a_record():
+    """A save that skipped record_artifact is indexed by the next latest() even though the manifest exists"""
+    output_dir = tempfile.mkdtemp()
+    older = write(output_dir, 'enhanced_data_20251003_090000.json')
+    record_artifact(older)
+
+    newer = write(output_dir, 'enhanced_data_20251010_090000.json', b'unrecorded')
+    manifest = ArtifactManifest(output_dir)
+    assert manifest.exists
+    assert manifest.latest('enhanced_data')['path'] == newer
+    assert [entry['path'] for entry in ArtifactManifest(output_dir).entries()] == [older, newer]
+
+
+def test_bookkeeping_files_are_never_indexed():
+    """Run journals, fingerprint stores, caption caches and partial writes stay out of the manifest"""
+    output_dir = tempfile.mkdtemp()
+    record_artifact(write(output_dir, 'enhanced_data_20251010_090000.json'))
+    for name in ('run_state_2025-10-10.json', 'fingerprints_2025-10-10.json',
+                 'caption_cache_2025-10-10.json', 'enhanced_data_20251017_090000.json.tmp'):
+        write(output_dir, name)
+    cover = write(output_dir, '2025-10-10_artist_collage_20251010_090000.png')
+
+    # latest() only indexes unrecorded files of the kind it was asked for
+    manifest = ArtifactManifest(output_dir)
+    assert manifest.latest('enhanced_data')['path'].endswith('enhanced_data_20251010_090000.json')
+    assert [entry['kind'] for entry in manifest.entries()] == ['enhanced_data']
+    assert manifest.rebuild() == 1
+    assert [entry['path'] for entry in ArtifactManifest(output_dir).entries()][-1] == cover
+
+
+if __name__ == "__main__":
+    test_names_are_parsed_into_kind_week_and_run()
+    test_latest_and_week_lookups_follow_recorded_saves()
+    test_latest_finds_files_saved_without_a_record()
+    test_bookkeeping_files_are_never_indexed()
+    print("✅ Artifact manifest tests passed")
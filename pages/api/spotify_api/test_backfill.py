@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script for the backfill planner
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import backfill
+import supabase
+
+TRACKS = [
+    {'id': '2takcwOaAZWiXQijPHIx7B', 'name': 'Saturn', 'artist': 'SZA', 'popularity': 80},
+    {'id': '6Ad4Gc1A6Gv4yB8cFxH2mO', 'name': 'girl, get up.', 'artist': 'Doechii, SZA', 'popularity': 48},
+]
+# Rows of the Supabase tracks table; images.preferred_track_id holds a row id
+TRACK_ROWS = [
+    {'id': 101, 'track_name': 'Saturn', 'artists': 'SZA', 'popularity': 80, 'week_start': '2025-10-03',
+     'spotify_url': 'https://open.spotify.com/track/2takcwOaAZWiXQijPHIx7B'},
+    {'id': 102, 'track_name': 'girl, get up.', 'artists': 'Doechii, SZA', 'popularity': 48, 'week_start': '2025-10-03',
+     'spotify_url': 'https://open.spotify.com/track/6Ad4Gc1A6Gv4yB8cFxH2mO'},
+    {'id': 103, 'track_name': 'Tyler Song', 'artists': 'Tyler, The Creator', 'popularity': 70,
+     'week_start': '2025-10-03', 'spotify_url': 'https://open.spotify.com/track/3WpbRZi6c1pl2jQ9Yhk0aU'},
+]
+IMAGE_ROWS = [
+    {'week_start': '2025-10-03', 'preferred_track_id': 103, 'tracklist_title': None, 'custom_image_url': None},
+    {'week_start': '2025-10-10', 'preferred_track_id': None, 'tracklist_title': 'Fresh Picks',
+     'custom_image_url': 'https://example.com/custom.png'},
+]
+
+
+class FakeSupabase:
+    """Serves the tracks and images tables from memory"""
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    def table(self, name):
+        return FakeQuery(self.tables[name])
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        return FakeQuery([row for row in self.rows if row.get(column) == value])
+
+    def execute(self):
+        return type('Response', (), {'data': list(self.rows)})
+
+
+class FakeAutomation:
+    """Records what would be rendered instead of drawing images"""
+
+    def __init__(self, output_dir):
+        self.config = type('Config', (), {'OUTPUT_DIR': output_dir})
+        self.spotify = None
+        self.rendered = []
+
+    def create_single_artist_image(self, track, spotify, filename):
+        self.rendered.append(('cover', track['id']))
+        return self._write(filename)
+
+    def create_tracklist_image(self, tracks, filename, custom_title=None):
+        self.rendered.append(('tracklist', [track['id'] for track in tracks], custom_title))
+        return self._write(filename)
+
+    def _write(self, filename):
+        path = os.path.join(self.config.OUTPUT_DIR, filename)
+        with open(path, 'wb') as f:
+            f.write(b'image')
+        return path
+
+
+def test_weeks_use_preferences_and_custom_cover():
+    """File and Supabase weeks get the preferred row first, the custom title and the custom cover"""
+    output_dir = tempfile.mkdtemp()
+    with open(os.path.join(output_dir, 'nmf_data_20251010_20251010_090000.json'), 'w', encoding='utf-8') as f:
+        json.dump({'tracks': TRACKS}, f)
+
+    original_client, original_automation = supabase.create_client, backfill._automation
+    supabase.create_client = lambda url, key: FakeSupabase({'tracks': TRACK_ROWS, 'images': IMAGE_ROWS})
+    backfill._automation = FakeAutomation(output_dir)
+    try:
+        jobs, missing = backfill.plan_weeks(['2025-10-03', '2025-10-10', '2025-10-17'], 'auto', output_dir)
+        assert missing == ['2025-10-17']
+        assert [track['track_id'] for track in jobs[0]['tracks']] == [103, 101, 102]
+        assert jobs[1]['tracklist_title'] == 'Fresh Picks' and jobs[1]['custom_cover']
+
+        outcome = backfill.render_week(jobs[1])
+        assert outcome['artifacts'] == {'cover': 'custom', 'tracklist': 'rendered'}
+        assert backfill._automation.rendered == [('tracklist', [track['id'] for track in TRACKS], 'Fresh Picks')]
+    finally:
+        supabase.create_client, backfill._automation = original_client, original_automation
+
+
+if __name__ == "__main__":
+    test_weeks_use_preferences_and_custom_cover()
+    print("✅ Backfill tests passed")
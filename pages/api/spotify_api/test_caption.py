@@ -3,42 +3,48 @@
 Test script for the caption generator
 """
 
+import asyncio
+import json
 import os
 import sys
+import tempfile
+import time
+from types import SimpleNamespace
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from caption_cache import CaptionCache
 from caption_generator import CaptionGenerator
 
+# Sample track data
+SAMPLE_TRACKS = [
+    {
+        'artist': 'Drake',
+        'name': 'DOG HOUSE',
+        'genre': 'Hip Hop',
+        'mood': 'Energetic',
+        'popularity': 79
+    },
+    {
+        'artist': 'Twenty One Pilots',
+        'name': 'City Walls',
+        'genre': 'Alternative Rock',
+        'mood': 'Melancholic',
+        'popularity': 78
+    },
+    {
+        'artist': 'Ed Sheeran',
+        'name': 'Camera',
+        'genre': 'Pop',
+        'mood': 'Upbeat',
+        'popularity': 73
+    }
+]
+
 
 def test_caption_generator():
     """Test the caption generator with sample data"""
     
-    # Sample track data
-    sample_tracks = [
-        {
-            'artist': 'Drake',
-            'name': 'DOG HOUSE',
-            'genre': 'Hip Hop',
-            'mood': 'Energetic',
-            'popularity': 79
-        },
-        {
-            'artist': 'Twenty One Pilots',
-            'name': 'City Walls',
-            'genre': 'Alternative Rock',
-            'mood': 'Melancholic',
-            'popularity': 78
-        },
-        {
-            'artist': 'Ed Sheeran',
-            'name': 'Camera',
-            'genre': 'Pop',
-            'mood': 'Upbeat',
-            'popularity': 73
-        }
-    ]
-    
     print("🧪 Testing Caption Generator")
     print("=" * 50)
     
@@ -53,7 +59,7 @@ def test_caption_generator():
         
         try:
             result = generator.generate_caption(
-                tracks=sample_tracks,
+                tracks=SAMPLE_TRACKS,
                 week_start='2025-09-12',
                 include_hashtags=True
             )
@@ -69,5 +75,212 @@ def test_caption_generator():
     
     print(f"\n🎉 Caption generator test complete!")
 
+class SlowChatClient:
+    """Stands in for the OpenAI client, answering each model after a fixed delay"""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, **kwargs):
+        self.calls += 1
+        time.sleep(self.delays[model])
+        if kwargs.get('response_format') == {"type": "json_object"}:
+            content = json.dumps({'variants': {'minimal': "Drake & Twenty One Pilots. Good week.",
+                                               'emoji_heavy': "🔥 " + "Drake is back. " * 40,
+                                               'balanced': ""},
+                                  'hashtags': ["#NewMusicFriday", "HipHop"]})
+        elif model == "gpt-3.5-turbo":
+            content = "#NewMusicFriday\n#HipHop"
+        else:
+            content = "Drake came through this week 🔥"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+                               usage=SimpleNamespace(total_tokens=42))
+
+    def close(self):
+        self.closed = True
+
+
+class StreamingChatClient:
+    """Stands in for the async OpenAI client, streaming a caption a word at a time"""
+
+    def __init__(self, words):
+        self.words = words
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model, messages, stream=False, **kwargs):
+        async def chunks():
+            for word in self.words:
+                await asyncio.sleep(0.01)
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word))], usage=None)
+            yield SimpleNamespace(choices=[], usage=SimpleNamespace(total_tokens=30))
+        return chunks()
+
+
+def openai_generator(delays, request_timeout):
+    generator = CaptionGenerator(api_key='test-key', request_timeout=request_timeout, cache_dir=tempfile.mkdtemp())
+    generator.openai_available = True
+    generator._client = SlowChatClient(delays)
+    return generator
+
+
+def test_caption_and_hashtags_run_concurrently():
+    """Caption latency is about the slower request, not the sum of both"""
+    generator = openai_generator({'gpt-4': 0.3, 'gpt-3.5-turbo': 0.3}, request_timeout=5)
+
+    started = time.monotonic()
+    result = generator.generate_caption(SAMPLE_TRACKS, '2025-09-12')
+
+    assert time.monotonic() - started < 0.55
+    assert result['method'] == 'openai'
+    assert result['caption'] == "Drake came through this week 🔥"
+    assert result['hashtags'] == ['#NewMusicFriday', '#HipHop']
+
+
+def test_missed_deadline_falls_back_to_templates():
+    """A request slower than the deadline is replaced by its template without waiting for it"""
+    generator = openai_generator({'gpt-4': 2.0, 'gpt-3.5-turbo': 0.0}, request_timeout=0.2)
+
+    started = time.monotonic()
+    result = generator.generate_caption(SAMPLE_TRACKS, '2025-09-12')
+
+    assert time.monotonic() - started < 1.0
+    assert result['method'] == 'fallback'
+    assert 'Drake' in result['caption']
+    assert result['hashtags'] == ['#NewMusicFriday', '#HipHop']
+
+
+def test_timed_out_requests_are_cancelled_and_close_stops_the_workers():
+    """Requests still queued at the deadline never reach OpenAI; close() shuts the pool and client down"""
+    generator = openai_generator({'gpt-4': 0.0, 'gpt-3.5-turbo': 0.0}, request_timeout=0.2)
+    busy = [generator._executor.submit(time.sleep, 0.5) for _ in range(2)]
+
+    result = generator.generate_caption(SAMPLE_TRACKS, '2025-09-12', use_cache=False)
+    for future in busy:
+        future.result()
+    assert result['method'] == 'fallback'
+    assert generator._client.calls == 0
+
+    client = generator._client
+    generator.close()
+    assert client.closed and generator._client is None
+    try:
+        generator._executor.submit(time.sleep, 0)
+        assert False, "RuntimeError was not raised"
+    except RuntimeError:
+        pass
+
+
+def test_repeat_request_is_served_from_cache():
+    """An unchanged week is answered from the cache until bypassed or expired"""
+    generator = openai_generator({'gpt-4': 0.0, 'gpt-3.5-turbo': 0.0}, request_timeout=5)
+    first = generator.generate_caption(SAMPLE_TRACKS, '2025-09-12')
+    assert generator._client.calls == 2
+
+    # A hit is counted in memory without rewriting the cache file
+    cache_path = CaptionCache.for_week(generator.cache_dir, '2025-09-12').path
+    with open(cache_path, 'rb') as f:
+        saved = f.read()
+    cached = generator.generate_caption(SAMPLE_TRACKS, '2025-09-12')
+    assert generator._client.calls == 2
+    assert cached['cached'] and cached['caption'] == first['caption']
+    with open(cache_path, 'rb') as f:
+        assert f.read() == saved
+
+    generator.generate_caption(SAMPLE_TRACKS, '2025-09-12', use_cache=False)
+    generator.generate_caption(SAMPLE_TRACKS, '2025-09-12', cache_ttl=0)
+    generator.generate_caption(SAMPLE_TRACKS[:2], '2025-09-12')
+    assert generator._client.calls == 8
+
+    generator.close()
+    stats = CaptionCache.for_week(generator.cache_dir, '2025-09-12').stats()
+    assert (stats['hits'], stats['misses'], stats['tokens_saved']) == (1, 3, 84)
+
+
+def test_variants_come_from_one_json_call():
+    """Every style comes back from one completion, checked against its length limit"""
+    generator = openai_generator({'gpt-4o-mini': 0.0}, request_timeout=5)
+
+    result = generator.generate_variants(SAMPLE_TRACKS, '2025-09-12')
+    variants = result['variants']
+
+    assert generator._client.calls == 1
+    assert list(variants) == ['emoji_heavy', 'minimal', 'review_style', 'balanced']
+    assert variants['minimal'] == {'caption': "Drake & Twenty One Pilots. Good week.", 'character_count': 37,
+                                   'method': 'openai'}
+    # Over the limit: cut at the last sentence that fits
+    assert variants['emoji_heavy']['method'] == 'openai'
+    assert variants['emoji_heavy']['character_count'] <= CaptionGenerator.STYLES['emoji_heavy'].max_length
+    assert variants['emoji_heavy']['caption'].endswith("Drake is back.")
+    # Missing or empty: the style's template
+    assert variants['review_style']['method'] == variants['balanced']['method'] == 'fallback'
+    assert result['hashtags'] == ['#NewMusicFriday', '#HipHop']
+
+    assert generator.generate_variants(SAMPLE_TRACKS, '2025-09-12')['cached']
+    assert generator._client.calls == 1
+
+
+def test_stream_yields_tokens_then_full_result():
+    """Tokens arrive one by one; the final event carries the whole caption and hashtags, which are then cached"""
+    generator = openai_generator({'gpt-3.5-turbo': 0.0}, request_timeout=5)
+    generator._async_client = StreamingChatClient(["Drake ", "came ", "through ", "🔥"])
+
+    async def collect():
+        return [event async for event in generator.stream_caption(SAMPLE_TRACKS, '2025-09-12')]
+
+    events = asyncio.run(collect())
+
+    assert [event['text'] for event in events[:-1]] == ["Drake ", "came ", "through ", "🔥"]
+    done = events[-1]
+    assert done['type'] == 'done' and done['method'] == 'openai'
+    assert done['caption'] == "Drake came through 🔥"
+    assert done['hashtags'] == ['#NewMusicFriday', '#HipHop']
+    assert done['tokens_used'] == 72
+
+    cached = asyncio.run(collect())
+    assert len(cached) == 2 and cached[-1]['cached']
+    assert generator.generate_caption(SAMPLE_TRACKS, '2025-09-12')['caption'] == "Drake came through 🔥"
+
+
+def test_offline_engine_is_deterministic_and_fits_styles():
+    """Template captions repeat for the same week, respect style limits and tag genres by whole word"""
+    from caption_engine import caption_hashtags, pick_template
+
+    generator = CaptionGenerator()
+    first = generator._generate_fallback_caption(SAMPLE_TRACKS, '2025-09-12', True)
+    again = generator._generate_fallback_caption(SAMPLE_TRACKS, '2025-09-12', True)
+    assert (first['caption'], first['hashtags']) == (again['caption'], again['hashtags'])
+    assert 'Drake' in first['caption']
+
+    for style, spec in CaptionGenerator.STYLES.items():
+        assert len(generator._template_variant(SAMPLE_TRACKS, '2025-09-12', style)) <= spec.max_length
+    assert len(pick_template('reviewer', SAMPLE_TRACKS, '2025-09-12', max_length=160)) <= 160
+
+    hashtags = caption_hashtags([{'genre': 'k-pop'}, {'genres': ['uk drill', 'popular']}], '2025-09-12')
+    assert '#KPop' in hashtags and '#HipHop' in hashtags
+    assert '#PopMusic' not in hashtags
+    assert hashtags[-1] == '#2025Music' and len(hashtags) <= 12
+
+    # A one-track week never gets a template naming a second or third artist
+    for week in ('2025-09-05', '2025-09-12', '2025-09-19', '2025-09-26'):
+        for style in ('reviewer', 'emoji_heavy', 'minimal', 'review_style', 'balanced'):
+            caption = pick_template(style, SAMPLE_TRACKS[:1], week)
+            assert 'more artists' not in caption and 'Twenty One Pilots' not in caption
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        pick_template('balanced', SAMPLE_TRACKS, '2025-09-12')
+        caption_hashtags(SAMPLE_TRACKS, '2025-09-12')
+    assert time.perf_counter() - start < 1.0
+
+
 if __name__ == "__main__":
     test_caption_generator()
+    test_caption_and_hashtags_run_concurrently()
+    test_missed_deadline_falls_back_to_templates()
+    test_timed_out_requests_are_cancelled_and_close_stops_the_workers()
+    test_repeat_request_is_served_from_cache()
+    test_variants_come_from_one_json_call()
+    test_stream_yields_tokens_then_full_result()
+    test_offline_engine_is_deterministic_and_fits_styles()
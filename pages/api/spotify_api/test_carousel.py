@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test script for the carousel slide plan
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from carousel import CarouselGenerator
+from config import SpotifyConfig
+from cover_batch import COVER_SET_INDEX, cover_fingerprint, cover_key, cover_set_dir
+
+WEEK = '2025-10-10'
+# Shaped like load_tracks_from_supabase's tracks; images.preferred_track_id holds a track_id
+TRACKS = [
+    {'track_id': 101, 'name': 'Saturn', 'artist': 'SZA', 'popularity': 80,
+     'spotify_url': 'https://open.spotify.com/track/2takcwOaAZWiXQijPHIx7B'},
+    {'track_id': 102, 'name': 'girl, get up.', 'artist': 'Doechii, SZA', 'popularity': 48,
+     'spotify_url': 'https://open.spotify.com/track/6Ad4Gc1A6Gv4yB8cFxH2mO'},
+    {'track_id': 103, 'name': 'Tyler Song', 'artist': 'Tyler, The Creator', 'popularity': 70,
+     'spotify_url': 'https://open.spotify.com/track/3WpbRZi6c1pl2jQ9Yhk0aU'},
+]
+
+
+class FakeAutomation:
+    """Records what would be rendered or downloaded instead of doing it"""
+
+    def __init__(self, output_dir):
+        self.config = type('Config', (SpotifyConfig,), {'OUTPUT_DIR': output_dir})
+        self.spotify = None
+        self.calls = []
+
+    def create_single_artist_image(self, track, spotify, filename):
+        self.calls.append(('render', track['track_id'], filename))
+        return os.path.join(self.config.OUTPUT_DIR, filename)
+
+    def download_artist_image(self, url, filename):
+        self.calls.append(('download', url, filename))
+        return os.path.join(self.config.OUTPUT_DIR, filename)
+
+
+def test_plan_leads_with_the_preferred_track():
+    """The preferred track is the cover and tops the tracklist; its artist gets no separate card"""
+    plan = CarouselGenerator(FakeAutomation(tempfile.mkdtemp())).plan(TRACKS, {'preferred_track_id': 103})
+
+    assert [slide['kind'] for slide in plan] == ['cover', 'tracklist', 'artist', 'artist']
+    assert plan[0]['tracks'][0]['track_id'] == 103 and not plan[0]['custom_image_url']
+    assert [track['track_id'] for track in plan[1]['tracks']] == [103, 101, 102]
+    assert [slide['tracks'][0]['track_id'] for slide in plan[2:]] == [101, 102]
+
+
+def test_cover_slide_uses_custom_image_or_pre_rendered_cover():
+    """A custom upload is the cover as is; otherwise a pre-rendered cover is reused before rendering one"""
+    output_dir = tempfile.mkdtemp()
+    automation = FakeAutomation(output_dir)
+    generator = CarouselGenerator(automation)
+
+    custom = {'preferred_track_id': 103, 'custom_image_url': 'https://example.com/custom.jpg?v=2'}
+    plan = generator.plan(TRACKS, custom)
+    assert [slide['tracks'][0]['track_id'] for slide in plan if slide['kind'] == 'artist'] == [103, 101, 102]
+    assert generator._render(plan[0], WEEK, 'carousel_2025-10-10_01_cover.png') == \
+        os.path.join(output_dir, 'carousel_2025-10-10_01_cover.jpg')
+    assert automation.calls == [('download', custom['custom_image_url'], 'carousel_2025-10-10_01_cover.jpg')]
+
+    set_dir = cover_set_dir(output_dir, WEEK)
+    os.makedirs(set_dir)
+    cover_path = os.path.join(set_dir, f"{cover_key(TRACKS[2])}.png")
+    open(cover_path, 'wb').close()
+    with open(os.path.join(set_dir, COVER_SET_INDEX), 'w', encoding='utf-8') as f:
+        json.dump({cover_key(TRACKS[2]): {'fingerprint': cover_fingerprint(TRACKS[2]), 'path': cover_path}}, f)
+
+    plan = generator.plan(TRACKS, {'preferred_track_id': 103})
+    assert generator._render(plan[0], WEEK, 'carousel_2025-10-10_01_cover.png') == cover_path
+    assert len(automation.calls) == 1
+
+
+if __name__ == "__main__":
+    test_plan_leads_with_the_preferred_track()
+    test_cover_slide_uses_custom_image_or_pre_rendered_cover()
+    print("✅ Carousel tests passed")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test script for the collage renderer
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from collage import CollageRenderer
+from config import SpotifyConfig
+from PIL import Image
+
+RED = (200, 30, 30)
+
+
+class FakeAutomation:
+    """Serves artist images from disk instead of Spotify"""
+
+    def __init__(self, output_dir):
+        self.config = type('Config', (SpotifyConfig,), {
+            'OUTPUT_DIR': output_dir, 'COLLAGE_GRID': (2, 2), 'CANVAS_SIZE': (400, 400)
+        })
+        self.spotify = None
+        self.lookups = []
+        self.downloads = []
+
+    def resolve_cover_artist_id(self, track, spotify):
+        return track.get('artist_id')
+
+    def get_artist_image_url(self, artist_id, spotify):
+        self.lookups.append(artist_id)
+        return f"https://i.scdn.co/image/{artist_id}" if artist_id != 'no_image' else None
+
+    def download_artist_image(self, url, filename):
+        path = os.path.join(self.config.OUTPUT_DIR, filename)
+        Image.new('RGB', (640, 640), RED).save(path, 'JPEG')
+        self.downloads.append(path)
+        return path
+
+
+def close_to(pixel, expected, tolerance=12):
+    return all(abs(a - b) <= tolerance for a, b in zip(pixel, expected))
+
+
+def test_tiles_are_shared_per_artist_with_placeholders_for_missing_images():
+    """Each artist is fetched once and fills all its cells; tracks without an image get the placeholder"""
+    output_dir = tempfile.mkdtemp()
+    automation = FakeAutomation(output_dir)
+    tracks = [
+        {'name': 'Saturn', 'artist_id': 'sza'},
+        {'name': 'Snooze', 'artist_id': 'sza'},
+        {'name': 'Unknown', 'artist_id': None},
+        {'name': 'No Image', 'artist_id': 'no_image'},
+        {'name': 'Beyond the grid', 'artist_id': 'extra'},
+    ]
+
+    path = CollageRenderer(automation, max_workers=2).render(tracks, 'nmf_collage.png')
+
+    assert path == os.path.join(output_dir, 'nmf_collage.jpg')
+    assert sorted(automation.lookups) == ['no_image', 'sza']
+    assert automation.downloads and not any(os.path.exists(download) for download in automation.downloads)
+
+    gray = Image.new('RGB', (1, 1), SpotifyConfig.SPOTIFY_GRAY).getpixel((0, 0))
+    with Image.open(path) as collage:
+        assert collage.size == (400, 400)
+        # Both Saturn and Snooze show the SZA tile below the title bar and above the strip
+        assert close_to(collage.getpixel((20, 100)), RED) and close_to(collage.getpixel((220, 100)), RED)
+        assert close_to(collage.getpixel((20, 300)), gray) and close_to(collage.getpixel((220, 300)), gray)
+
+
+if __name__ == "__main__":
+    test_tiles_are_shared_per_artist_with_placeholders_for_missing_images()
+    print("✅ Collage tests passed")
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Test script for concurrent DALL-E generation
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from dalle_cache import DalleImageCache
+from dalle_image_generator import DALLEImageGenerator
+
+SAMPLE_DATA = {
+    'tracks': [
+        {'artists': 'Drake', 'track_name': 'DOG HOUSE', 'playlist_name': 'New Music Friday', 'popularity': 79},
+        {'artists': 'Ed Sheeran', 'track_name': 'Camera', 'playlist_name': 'Release Radar', 'popularity': 73},
+    ]
+}
+
+
+class FakeResponse:
+    """Stand-in for a requests response"""
+
+    def __init__(self, status_code=200, payload=None, chunks=()):
+        self.status_code = status_code
+        self.payload = payload
+        self.chunks = chunks
+        self.text = json.dumps(payload)
+
+    def json(self):
+        return self.payload
+
+    def iter_content(self, chunk_size=1):
+        yield from self.chunks
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class SlowImageSession:
+    """Fake session whose generations each take `delay` seconds"""
+
+    def __init__(self, delay, failing_prompt=None):
+        self.delay = delay
+        self.failing_prompt = failing_prompt
+        self.active = 0
+        self.peak = 0
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def post(self, url, headers=None, json=None, timeout=None):
+        assert timeout is not None
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        if self.failing_prompt and self.failing_prompt in json['prompt']:
+            return FakeResponse(500, {'error': 'boom'})
+        return FakeResponse(payload={'data': [{'url': f"https://images.example/{len(self.calls)}.png"}]})
+
+    def get(self, url, stream=False, timeout=None):
+        assert stream and timeout is not None
+        self.calls.append(url)
+        return FakeResponse(chunks=[b'\x89PNG', b'chunk' * 10])
+
+
+def write_sample_data():
+    output_dir = tempfile.mkdtemp()
+    with open(os.path.join(output_dir, 'enhanced_data_20250912_101500.json'), 'w', encoding='utf-8') as f:
+        json.dump(SAMPLE_DATA, f)
+    return output_dir
+
+
+def test_images_generate_concurrently_and_stream_to_disk():
+    """The three generations overlap and each image is written in full"""
+    output_dir = write_sample_data()
+    session = SlowImageSession(delay=0.3)
+    generator = DALLEImageGenerator('sk-test', session=session, cache_dir=None)
+
+    started = time.perf_counter()
+    results = generator.generate_all_images(output_dir)
+    elapsed = time.perf_counter() - started
+
+    assert list(results) == ['artist_collage', 'tracklist', 'weekly_update']
+    assert session.peak == 3
+    assert elapsed < 0.8, f"generations ran one after another ({elapsed:.2f}s)"
+    for path in results.values():
+        with open(path, 'rb') as f:
+            assert f.read() == b'\x89PNG' + b'chunk' * 10
+    assert not [name for name in os.listdir(output_dir) if name.endswith('.part')]
+
+
+def test_failed_generation_leaves_the_others():
+    """One failing prompt only drops its own image"""
+    output_dir = write_sample_data()
+    generator = DALLEImageGenerator('sk-test', session=SlowImageSession(delay=0.05, failing_prompt='Weekly Music Update'),
+                                    cache_dir=None)
+
+    results = generator.generate_all_images(output_dir)
+
+    assert list(results) == ['artist_collage', 'tracklist']
+
+
+def test_repeated_prompts_are_served_from_cache():
+    """Regenerating the same data reuses the cached images; eviction keeps the cache within its limits"""
+    output_dir = write_sample_data()
+    cache_dir = os.path.join(output_dir, 'dalle_cache')
+    session = SlowImageSession(delay=0)
+    generator = DALLEImageGenerator('sk-test', session=session, cache_dir=cache_dir)
+
+    first = generator.generate_all_images(output_dir)
+    time.sleep(1)  # new timestamped filenames
+    second = generator.generate_all_images(output_dir)
+
+    assert len(session.calls) == 3
+    assert set(first.values()).isdisjoint(second.values())
+    for path in second.values():
+        with open(path, 'rb') as f:
+            assert f.read() == b'\x89PNG' + b'chunk' * 10
+    assert generator.cache.stats()['hits'] == 3
+
+    bypass = DALLEImageGenerator('sk-test', session=session, cache_dir=cache_dir, use_cache=False)
+    bypass.generate_image_with_dalle("a new prompt", os.path.join(output_dir, 'extra.png'))
+    assert len(session.calls) == 4
+
+    image_bytes = os.path.getsize(first['tracklist'])
+    small = DalleImageCache(cache_dir, max_bytes=2 * image_bytes)
+    assert small.evict() == 2
+    assert small.stats()['entries'] == 2
+    assert DalleImageCache(cache_dir, max_age=0).evict() == 2
+    assert os.listdir(cache_dir) == ['index.json']
+
+
+if __name__ == "__main__":
+    test_images_generate_concurrently_and_stream_to_disk()
+    test_failed_generation_leaves_the_others()
+    test_repeated_prompts_are_served_from_cache()
+    print("✅ DALL-E generator tests passed")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test script for the dim-and-composite step
+"""
+
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from image_compositing import COVER_DIM_ALPHA, dim_and_composite
+from PIL import Image, ImageDraw
+
+
+def composite_with_rgba_copies(image, overlay, dim_alpha):
+    """The convert/alpha_composite/convert sequence the renderers used before"""
+    image = image.convert('RGBA')
+    if dim_alpha:
+        image = Image.alpha_composite(image, Image.new('RGBA', image.size, (0, 0, 0, dim_alpha)))
+    return Image.alpha_composite(image, overlay).convert('RGB')
+
+
+def random_image(rng, mode, size):
+    return Image.frombytes(mode, size, rng.randbytes(size[0] * size[1] * len(mode)))
+
+
+def test_matches_alpha_composite_pixel_for_pixel():
+    """Every source value, overlay alpha and dim level gives the same pixels as alpha_composite"""
+    rng = random.Random(7)
+    for size in [(1080, 1080), (200, 200), (333, 97)]:
+        image = random_image(rng, 'RGB', size)
+        overlay = random_image(rng, 'RGBA', size)
+        for dim_alpha in (0, COVER_DIM_ALPHA, 255):
+            expected = composite_with_rgba_copies(image, overlay, dim_alpha)
+            assert dim_and_composite(image, overlay, dim_alpha).tobytes() == expected.tobytes()
+
+
+def test_sparse_text_overlay():
+    """Text drawn on a mostly transparent layer composites exactly, leaving the input untouched"""
+    rng = random.Random(11)
+    image = random_image(rng, 'RGB', (1080, 1080))
+    original = image.tobytes()
+    overlay = Image.new('RGBA', image.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    draw.text((40, 40), "NEW MUSIC FRIDAY", fill=(232, 220, 207, 255), stroke_width=2, stroke_fill=(0, 0, 0, 150))
+    draw.rectangle([0, 1040, 1080, 1080], fill=(0, 0, 0, 150))
+
+    result = dim_and_composite(image, overlay, COVER_DIM_ALPHA)
+
+    assert result.tobytes() == composite_with_rgba_copies(image, overlay, COVER_DIM_ALPHA).tobytes()
+    assert image.tobytes() == original
+
+
+if __name__ == "__main__":
+    test_matches_alpha_composite_pixel_for_pixel()
+    test_sparse_text_overlay()
+    print("🎉 Image compositing tests complete!")
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Test script for the pipeline runner
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fingerprints import FingerprintStore
+from instrumentation import metrics
+from pipeline_runner import PipelineError, PipelineRunner
+from run_journal import RunJournal
+
+
+def test_independent_stages_run_concurrently():
+    """Stages that share an input start together and their results flow downstream"""
+    both_started = threading.Barrier(2, timeout=5)
+
+    def wait_for_sibling(source):
+        both_started.wait()
+        return source
+
+    runner = PipelineRunner(name='test pipeline')
+    runner.add_stage('source', lambda: 2)
+    runner.add_stage('left', lambda source: wait_for_sibling(source) * 10, inputs=['source'])
+    runner.add_stage('right', lambda source: wait_for_sibling(source) + 1, inputs=['source'])
+    runner.add_stage('total', lambda left, right: left + right, inputs=['left', 'right'])
+
+    results = runner.run()
+
+    assert results == {'source': 2, 'left': 20, 'right': 3, 'total': 23}
+    assert all(timing.status == 'done' for timing in runner.timings.values())
+
+
+def test_failed_stage_skips_dependents():
+    """A failing stage skips its dependents but lets unrelated stages finish"""
+    runner = PipelineRunner(name='test pipeline')
+    runner.add_stage('broken', lambda: 1 / 0)
+    runner.add_stage('dependent', lambda broken: broken, inputs=['broken'])
+    runner.add_stage('unrelated', lambda: 'ok')
+
+    try:
+        runner.run()
+        assert False, "PipelineError was not raised"
+    except PipelineError as e:
+        assert list(e.errors) == ['broken']
+        assert e.results == {'unrelated': 'ok'}
+
+    assert runner.timings['dependent'].status == 'skipped'
+
+
+def test_unknown_input_is_rejected():
+    """Inputs must be registered before the stages that read them"""
+    runner = PipelineRunner(name='test pipeline')
+
+    try:
+        runner.add_stage('orphan', lambda missing: missing, inputs=['missing'])
+        assert False, "ValueError was not raised"
+    except ValueError:
+        pass
+
+
+def test_failed_run_resumes_from_checkpoint():
+    """A rerun after a failure skips the stages the failed run completed"""
+    calls = []
+    fail = [True]
+
+    def fetch():
+        calls.append('fetch')
+        return 'tracks'
+
+    def render(fetch):
+        calls.append('render')
+        if fail[0]:
+            raise RuntimeError("render crashed")
+        return f"image of {fetch}"
+
+    def build_runner(journal_path, force_stages=None):
+        runner = PipelineRunner(name='test pipeline', journal=RunJournal(journal_path), force_stages=force_stages)
+        runner.add_stage('fetch', fetch, fingerprint=lambda: 'fetch')
+        runner.add_stage('render', render, inputs=['fetch'], fingerprint=lambda fetch: fetch)
+        return runner
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        journal_path = os.path.join(output_dir, 'run_state_test.json')
+
+        try:
+            build_runner(journal_path).run()
+            assert False, "PipelineError was not raised"
+        except PipelineError:
+            pass
+
+        fail[0] = False
+        runner = build_runner(journal_path)
+        assert runner.run()['render'] == 'image of tracks'
+        assert calls == ['fetch', 'render', 'render']
+        assert runner.timings['fetch'].status == 'resumed'
+
+        # The run completed, so the next one starts fresh; forcing reruns dependents too
+        runner = build_runner(journal_path, force_stages=['fetch'])
+        runner.run()
+        assert calls[-2:] == ['fetch', 'render']
+
+
+def test_resumed_run_reruns_stages_whose_inputs_changed():
+    """A checkpoint is only reused while its stage's fingerprint still matches"""
+    calls = []
+    fail = [True]
+
+    def render(preferences):
+        calls.append(f"render {preferences['title']}")
+        return f"tracklist titled {preferences['title']}"
+
+    def upload(tracklist):
+        calls.append('upload')
+        if fail[0]:
+            raise RuntimeError("upload failed")
+        return f"url of {tracklist}"
+
+    def build_runner(journal_path, title):
+        runner = PipelineRunner(name='test pipeline', journal=RunJournal(journal_path))
+        runner.add_stage('preferences', lambda: {'title': title})
+        runner.add_stage('tracklist', render, inputs=['preferences'],
+                         fingerprint=lambda preferences: preferences['title'])
+        runner.add_stage('upload', upload, inputs=['tracklist'], fingerprint=lambda tracklist: tracklist)
+        return runner
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        journal_path = os.path.join(output_dir, 'run_state_test.json')
+        try:
+            build_runner(journal_path, 'New Music Friday').run()
+            assert False, "PipelineError was not raised"
+        except PipelineError:
+            pass
+
+        # The title was edited before the rerun, so the checkpointed tracklist is stale
+        fail[0] = False
+        runner = build_runner(journal_path, 'Fresh Picks')
+        assert runner.run()['upload'] == 'url of tracklist titled Fresh Picks'
+        assert calls == ['render New Music Friday', 'upload', 'render Fresh Picks', 'upload']
+        assert runner.timings['tracklist'].status == 'done'
+
+
+def test_title_change_rerenders_only_the_tracklist():
+    """Unchanged stages reuse their stored files; a changed title or a deleted file reruns the stage"""
+    rendered = []
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        def render(kind):
+            def stage(preferences):
+                rendered.append(kind)
+                path = os.path.join(output_dir, f"{kind}_{len(rendered)}.png")
+                with open(path, 'w') as f:
+                    f.write(preferences['title'] if kind == 'tracklist' else 'cover')
+                return path
+            return stage
+
+        def build_runner(title):
+            runner = PipelineRunner(name='test pipeline',
+                                    fingerprint_store=FingerprintStore(os.path.join(output_dir, 'fingerprints.json')))
+            runner.add_stage('preferences', lambda: {'title': title})
+            runner.add_stage('cover_image', render('cover'), inputs=['preferences'],
+                             fingerprint=lambda preferences: 'tracks')
+            runner.add_stage('tracklist_image', render('tracklist'), inputs=['preferences'],
+                             fingerprint=lambda preferences: ['tracks', preferences['title']])
+            return runner
+
+        first = build_runner('New Music Friday').run()
+        runner = build_runner('Fresh Picks')
+        results = runner.run()
+        assert sorted(rendered) == ['cover', 'tracklist', 'tracklist']
+        assert runner.timings['cover_image'].status == 'cached'
+        assert results['cover_image'] == first['cover_image']
+
+        # A stored result whose file is gone is rendered again
+        os.remove(results['cover_image'])
+        runner = build_runner('Fresh Picks')
+        results = runner.run()
+        assert rendered[-1] == 'cover' and len(rendered) == 4
+        assert runner.timings['tracklist_image'].status == 'cached'
+        assert os.path.exists(results['cover_image'])
+
+
+def test_stage_metrics_attribute_counters():
+    """Counters incremented inside a stage are reported for that stage and the run"""
+    def download():
+        metrics.count('bytes_downloaded', 512)
+        return 'image'
+
+    metrics.reset('test run')
+    runner = PipelineRunner(name='test pipeline')
+    runner.add_stage('download', download)
+    runner.add_stage('render', lambda download: metrics.count('http_downloads'), inputs=['download'])
+    runner.run()
+
+    summary = metrics.summary()
+    assert summary['counters'] == {'bytes_downloaded': 512, 'http_downloads': 1}
+    assert summary['stages']['download']['counters'] == {'bytes_downloaded': 512}
+    assert summary['stages']['render']['status'] == 'done'
+
+
+def test_stage_peak_memory_is_per_stage_only_when_serial():
+    """Serial stages report their own peak RSS; overlapping stages report the process-wide mark"""
+    both_started = threading.Barrier(2, timeout=5)
+
+    metrics.reset('test run')
+    with metrics.stage('serial'):
+        pass
+
+    def overlapping(name):
+        with metrics.stage(name):
+            both_started.wait()
+            both_started.wait()
+
+    threads = [threading.Thread(target=overlapping, args=(name,)) for name in ('left', 'right')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stages = metrics.summary()['stages']
+    assert 'peak_rss_mb' in stages['serial'] and 'process_peak_rss_mb' not in stages['serial']
+    assert all('process_peak_rss_mb' in stages[name] and 'peak_rss_mb' not in stages[name]
+               for name in ('left', 'right'))
+
+
+if __name__ == "__main__":
+    test_independent_stages_run_concurrently()
+    test_failed_stage_skips_dependents()
+    test_unknown_input_is_rejected()
+    test_failed_run_resumes_from_checkpoint()
+    test_resumed_run_reruns_stages_whose_inputs_changed()
+    test_title_change_rerenders_only_the_tracklist()
+    test_stage_metrics_attribute_counters()
+    test_stage_peak_memory_is_per_stage_only_when_serial()
+    print("🎉 Pipeline runner tests complete!")
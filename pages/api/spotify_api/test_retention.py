@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test script for output retention
+"""
+
+import json
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from artifact_manifest import ArtifactManifest, record_artifact
+from retention import RetentionPolicy, RetentionService
+from track_archive import TrackArchive
+
+
+def friday(weeks_ago):
+    today = date.today()
+    return (today - timedelta(days=(today.weekday() - 4) % 7, weeks=weeks_ago)).isoformat()
+
+
+def write(directory, name, content):
+    path = os.path.join(directory, name)
+    with open(path, 'wb') as f:
+        f.write(content)
+    record_artifact(path)
+    return path
+
+
+def test_policy_dedupes_supersedes_and_expires_uploaded_weeks():
+    """Duplicates and re-runs beyond the newest N go; old weeks go only once uploaded; the active week is kept"""
+    output_dir = tempfile.mkdtemp()
+    old_uploaded, old_pending, recent, active = friday(20), friday(19), friday(2), friday(0)
+    run = lambda week, n: f"{week.replace('-', '')}_09000{n}"
+
+    expired = write(output_dir, f"{old_uploaded}_tracklist_{run(old_uploaded, 0)}.png", b'old' * 100)
+    pending = write(output_dir, f"{old_pending}_tracklist_{run(old_pending, 0)}.png", b'pending')
+    first = write(output_dir, f"{recent}_tracklist_{run(recent, 1)}.png", b'first')
+    copy = write(output_dir, f"{recent}_tracklist_{run(recent, 2)}.png", b'first')
+    second = write(output_dir, f"{recent}_tracklist_{run(recent, 3)}.png", b'second')
+    third = write(output_dir, f"{recent}_tracklist_{run(recent, 4)}.png", b'third')
+    journal = write(output_dir, f"run_state_{old_uploaded}.json",
+                    json.dumps({'stages': {'cover_upload': {'result': 'https://cdn/cover.png'}}}).encode())
+    active_files = [write(output_dir, f"{active}_tracklist_{run(active, n)}.png", b'same') for n in range(3)]
+
+    service = RetentionService(output_dir, RetentionPolicy(keep_per_week=2, max_age_weeks=12),
+                               active_week=active, uploaded=lambda _: {old_uploaded})
+    dry_run = RetentionService(output_dir, service.policy, active_week=active,
+                               uploaded=lambda _: {old_uploaded}, dry_run=True)
+    report = dry_run.run()
+    assert report['files'] == 3 and all(os.path.exists(path) for path in (expired, first, copy))
+
+    report = service.run()
+    assert report['by_reason'] == {'expired': 1, 'duplicate': 1, 'superseded': 1}
+    assert report['bytes_reclaimed'] == 300 + 5 + 5
+    remaining = {entry['path'] for entry in ArtifactManifest(output_dir).entries()}
+    assert remaining == {pending, second, third, journal, *active_files}
+    assert sorted(os.listdir(output_dir)) == sorted(
+        os.path.basename(path) for path in remaining | {'manifest.jsonl', 'archive.db'})
+
+
+def test_expired_week_keeps_its_latest_data_file():
+    """Expiry removes an old uploaded week's images but never its newest track data"""
+    output_dir = tempfile.mkdtemp()
+    week = friday(20)
+    stamp = week.replace('-', '')
+    image = write(output_dir, f"{week}_tracklist_{stamp}_090000.png", b'image')
+    older = write(output_dir, f"nmf_data_{stamp}_090000.json", b'{"tracks": [{"name": "Saturn"}]}')
+    latest = write(output_dir, f"nmf_data_{stamp}_100000.json", b'{"tracks": []}')
+    other_week = write(output_dir, f"nmf_data_{friday(21).replace('-', '')}_090000.json", b'{"tracks": []}')
+
+    report = RetentionService(output_dir, RetentionPolicy(keep_per_week=1, max_age_weeks=12),
+                              uploaded=lambda _: {week, friday(21)}).run()
+
+    assert report['by_reason'] == {'expired': 1, 'superseded': 1}
+    assert not os.path.exists(image) and not os.path.exists(older)
+    assert os.path.exists(latest) and os.path.exists(other_week)
+
+
+def test_multi_file_runs_are_superseded_whole():
+    """Every file of a run is kept together; only whole runs beyond keep_per_week go"""
+    output_dir = tempfile.mkdtemp()
+    week = friday(1)
+    slides = [write(output_dir, f"carousel_{week}_{n:02d}_artist.png", f"slide {n}".encode()) for n in range(1, 8)]
+    stamp = week.replace('-', '')
+    runs = [[write(output_dir, f"{week}_tracklist_{page + 1:02d}_{stamp}_09000{n}.png", f"run {n} page {page}".encode())
+             for page in range(2)] for n in range(3)]
+
+    report = RetentionService(output_dir, RetentionPolicy(keep_per_week=2), uploaded=lambda _: set()).run()
+
+    assert report['by_reason'] == {'superseded': 2}
+    assert all(os.path.exists(path) for path in slides + runs[1] + runs[2])
+    assert not any(os.path.exists(path) for path in runs[0])
+
+
+def test_background_run_reports_when_joined():
+    """start() cleans up on a background thread and join() returns the report"""
+    output_dir = tempfile.mkdtemp()
+    week = friday(3)
+    for n in range(3):
+        write(output_dir, f"nmf_data_{week.replace('-', '')}_10000{n}.json", json.dumps({'tracks': [], 'run': n}).encode())
+
+    report = RetentionService(output_dir, RetentionPolicy(keep_per_week=1), uploaded=lambda _: set()).start().join()
+
+    assert report['files'] == 2 and report['by_reason'] == {'superseded': 2}
+    assert len(os.listdir(output_dir)) == 3  # newest data file, the manifest and the archive
+
+
+def test_track_data_is_only_deleted_for_archived_weeks():
+    """Weeks are imported into the archive first; a week that cannot be archived keeps all its data"""
+    output_dir = tempfile.mkdtemp()
+    readable, unreadable = friday(3), friday(4)
+    for week, content in ((readable, b'{"tracks": [{"id": "track1", "name": "Saturn", "artist": "SZA"}]}'),
+                          (unreadable, b'not json')):
+        for n in range(2):
+            write(output_dir, f"nmf_data_{week.replace('-', '')}_10000{n}.json", content + b' ' * n)
+
+    policy = RetentionPolicy(keep_per_week=1)
+    dry_run = RetentionService(output_dir, policy, uploaded=lambda _: set(), dry_run=True).run()
+    assert dry_run['files'] == 1 and not os.path.exists(os.path.join(output_dir, 'archive.db'))
+
+    report = RetentionService(output_dir, policy, uploaded=lambda _: set()).run()
+    assert report['files'] == 1
+    with TrackArchive.for_output_dir(output_dir) as archive:
+        assert archive.weeks() == [readable]
+        assert [track['name'] for track in archive.week_tracks(readable)] == ['Saturn']
+    remaining = {name for name in os.listdir(output_dir) if name.startswith('nmf_data_')}
+    assert remaining == {f"nmf_data_{readable.replace('-', '')}_100001.json",
+                         f"nmf_data_{unreadable.replace('-', '')}_100000.json",
+                         f"nmf_data_{unreadable.replace('-', '')}_100001.json"}
+
+
+if __name__ == "__main__":
+    test_policy_dedupes_supersedes_and_expires_uploaded_weeks()
+    test_expired_week_keeps_its_latest_data_file()
+    test_multi_file_runs_are_superseded_whole()
+    test_background_run_reports_when_joined()
+    test_track_data_is_only_deleted_for_archived_weeks()
+    print("✅ Retention tests passed")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test script for the track archive
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from track_archive import TrackArchive
+
+WEEK_ONE = [
+    {'id': 'track1', 'name': 'girl, get up.', 'artist': 'Doechii, SZA', 'album': 'single', 'popularity': 48,
+     'album_art_url': 'https://i.scdn.co/image/a', 'spotify_url': 'https://open.spotify.com/track/track1',
+     'playlist_source': 'New Music Friday'},
+    {'id': 'track2', 'name': 'Saturn', 'artist': 'SZA', 'album': 'SOS', 'popularity': 80,
+     'album_art_url': 'https://i.scdn.co/image/b', 'spotify_url': 'https://open.spotify.com/track/track2',
+     'playlist_source': 'Release Radar'},
+]
+WEEK_TWO = [
+    dict(WEEK_ONE[1], popularity=84),
+    {'name': 'Tyler Song', 'artist': 'Tyler, The Creator', 'album': 'CHROMAKOPIA', 'popularity': 70,
+     'album_art_url': 'https://i.scdn.co/image/c', 'spotify_url': 'https://example.com/custom',
+     'playlist_source': 'New Music Friday'},
+]
+
+
+def test_weeks_round_trip_and_answer_cross_week_queries():
+    """Archived weeks read back as saved; artist and popularity queries span weeks"""
+    path = os.path.join(tempfile.mkdtemp(), 'archive.db')
+    with TrackArchive(path) as archive:
+        archive.archive_week('2025-10-03', WEEK_ONE)
+        archive.archive_week('2025-10-10', [{'id': 'stale', 'name': 'Replaced', 'artist': 'Nobody'}])
+        archive.archive_week('2025-10-10', WEEK_TWO, run='nmf_data_20251010_090000.json')
+
+    with TrackArchive(path) as archive:
+        assert archive.weeks() == ['2025-10-03', '2025-10-10']
+        assert [{key: track[key] for key in WEEK_ONE[0]} for track in archive.week_tracks('2025-10-03')] == WEEK_ONE
+        week_two = archive.week_tracks('2025-10-10')
+        assert [track['name'] for track in week_two] == ['Saturn', 'Tyler Song']
+        assert week_two[1]['id'] is None and week_two[1]['spotify_url'] == 'https://example.com/custom'
+
+        sza = archive.weeks_featuring('sza')
+        assert [(row['week_start'], row['name']) for row in sza] == [
+            ('2025-10-03', 'girl, get up.'), ('2025-10-03', 'Saturn'), ('2025-10-10', 'Saturn')]
+        assert [row['name'] for row in archive.weeks_featuring('Tyler, The Creator')] == ['Tyler Song']
+        assert archive.weeks_featuring('Nobody') == []
+
+        history = archive.popularity_history('saturn')
+        assert [(row['week_start'], row['popularity']) for row in history] == [('2025-10-03', 80), ('2025-10-10', 84)]
+        assert archive.popularity_history('track2') == history
+
+
+if __name__ == "__main__":
+    test_weeks_round_trip_and_answer_cross_week_queries()
+    print("✅ Track archive tests passed")
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Test script for tracklist row fitting
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from tracklist_template import (ELLIPSIS, TRACK_NAME_SIZES, fit_text, get_tracklist_template,
+                                text_width)
+
+
+def test_fit_text_prefers_largest_size_then_truncates():
+    """Short text keeps the largest size; text too wide at every size is cut to the longest prefix that fits"""
+    assert fit_text("Saturn", TRACK_NAME_SIZES, 930) == ("Saturn", TRACK_NAME_SIZES[0])
+
+    long_name = "All The Stars From The Black Panther Soundtrack Deluxe Edition " * 3
+    text, size = fit_text(long_name, TRACK_NAME_SIZES, 930)
+    assert size == TRACK_NAME_SIZES[-1]
+    assert text.endswith(ELLIPSIS)
+    assert text_width(text, size) <= 930
+    # One more character would no longer fit
+    prefix = text[:-len(ELLIPSIS)]
+    longer = long_name[:len(prefix) + 1].rstrip() + ELLIPSIS
+    assert text_width(longer, size) > 930
+
+
+def test_rows_fit_the_canvas():
+    """Every laid-out line ends inside the canvas margin and clear of the logo"""
+    template = get_tracklist_template("New Music Friday - October 10, 2025")
+    tracks = [{'name': "Where Them Girls At (Remix) [feat. Nicki Minaj] " * 2,
+               'artist': "Kendrick Lamar, SZA, Future, Metro Boomin & The Weeknd " * 2}] * 10
+
+    for row in template.layout_rows(tracks):
+        for text, font, (_, y) in ((row.name, row.name_font, row.name_xy), (row.artist, row.artist_font, row.artist_xy)):
+            assert font.getlength(text) <= template.row_width(y, y + font.size)
+
+
+if __name__ == "__main__":
+    test_fit_text_prefers_largest_size_then_truncates()
+    test_rows_fit_the_canvas()
+    print("🎉 Tracklist template tests complete!")
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Compact archive of every week's tracks
+Appends each week's track list to one SQLite file (output/archive.db) with track
+details stored once and each week's chart as rows of (week, position, track,
+popularity), so questions across weeks are indexed queries instead of loading
+every nmf_data_*.json
+
+Usage:
+    python track_archive.py --import                # archive the weeks saved in output/
+    python track_archive.py --artist "SZA"          # weeks featuring an artist
+    python track_archive.py --track "girl, get up." # popularity history of a track
+"""
+
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import SpotifyConfig
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FILENAME = "archive.db"
+
+SPOTIFY_TRACK_URL = "https://open.spotify.com/track/"
+
+# Track details are stored once and referenced by integer id; a week is a list of
+# (position, track, popularity) rows. spotify_url is only stored when it is not
+# the usual URL of the track's Spotify ID.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    id INTEGER PRIMARY KEY,
+    track_key TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL COLLATE NOCASE,
+    artist TEXT NOT NULL,
+    album TEXT,
+    spotify_url TEXT,
+    album_art_url TEXT
+);
+CREATE INDEX IF NOT EXISTS tracks_by_name ON tracks (name);
+
+CREATE TABLE IF NOT EXISTS track_artists (
+    artist TEXT NOT NULL COLLATE NOCASE,
+    track_id INTEGER NOT NULL,
+    PRIMARY KEY (artist, track_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS weeks (
+    week_start TEXT PRIMARY KEY,
+    run TEXT,
+    track_count INTEGER NOT NULL,
+    archived_at TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS appearances (
+    week_start TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    track_id INTEGER NOT NULL,
+    popularity INTEGER,
+    playlist_source TEXT,
+    PRIMARY KEY (week_start, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS appearances_by_track ON appearances (track_id, week_start);
+"""
+
+
+def track_key(track: Dict) -> str:
+    """Stable identity of a track: its Spotify ID, else "name|artist" """
+    spotify_id = track.get('id') or track.get('track_id')
+    if spotify_id:
+        return str(spotify_id)
+    return f"{(track.get('name') or '').strip().lower()}|{(track.get('artist') or '').strip().lower()}"
+
+
+def credited_artists(artist: str) -> List[str]:
+    """Each artist of a credit like "Doechii, SZA", plus the full credit for names containing commas"""
+    artist = (artist or '').strip()
+    parts = [part.strip() for part in artist.split(',') if part.strip()]
+    return list(dict.fromkeys([artist, *parts])) if artist else []
+
+
+class TrackArchive:
+    """SQLite store of the tracks of every archived week"""
+
+    def __init__(self, path: str):
+        """
+        Open (creating if needed) the archive
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.executescript(SCHEMA)
+
+    @classmethod
+    def for_output_dir(cls, output_dir: str = SpotifyConfig.OUTPUT_DIR) -> 'TrackArchive':
+        """Open the archive kept in an output directory"""
+        return cls(os.path.join(output_dir, ARCHIVE_FILENAME))
+
+    def close(self) -> None:
+        """Close the database"""
+        self._db.close()
+
+    def __enter__(self) -> 'TrackArchive':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def archive_week(self, week_start: str, tracks: List[Dict], run: Optional[str] = None) -> int:
+        """
+        Store a week's tracks, replacing what an earlier run archived for the week
+
+        Args:
+            week_start: Week start date (YYYY-MM-DD)
+            tracks: The week's tracks in display order
+            run: Run the tracks came from (e.g. its timestamp)
+
+        Returns:
+            Number of tracks archived
+        """
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM appearances WHERE week_start = ?", (week_start,))
+            for position, track in enumerate(tracks, 1):
+                key = track_key(track)
+                spotify_url = track.get('spotify_url')
+                if spotify_url == f"{SPOTIFY_TRACK_URL}{key}":
+                    spotify_url = None
+                self._db.execute(
+                    """INSERT INTO tracks (track_key, name, artist, album, spotify_url, album_art_url)
+                       VALUES (?, ?, ?, ?, ?, ?)
+                       ON CONFLICT (track_key) DO UPDATE SET
+                           name = excluded.name, artist = excluded.artist, album = excluded.album,
+                           spotify_url = excluded.spotify_url, album_art_url = excluded.album_art_url""",
+                    (key, track.get('name') or 'Unknown Track', track.get('artist') or 'Unknown Artist',
+                     track.get('album'), spotify_url, track.get('album_art_url'))
+                )
+                track_id = self._db.execute("SELECT id FROM tracks WHERE track_key = ?", (key,)).fetchone()[0]
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO track_artists (artist, track_id) VALUES (?, ?)",
+                    [(artist, track_id) for artist in credited_artists(track.get('artist'))]
+                )
+                self._db.execute(
+                    """INSERT OR REPLACE INTO appearances (week_start, position, track_id, popularity, playlist_source)
+                       VALUES (?, ?, ?, ?, ?)""",
+                    (week_start, position, track_id, track.get('popularity'), track.get('playlist_source'))
+                )
+            self._db.execute(
+                "INSERT OR REPLACE INTO weeks (week_start, run, track_count, archived_at) VALUES (?, ?, ?, ?)",
+                (week_start, run, len(tracks), datetime.now().isoformat())
+            )
+        return len(tracks)
+
+    def weeks(self) -> List[str]:
+        """Archived weeks, oldest first"""
+        with self._lock:
+            return [row['week_start'] for row in self._db.execute("SELECT week_start FROM weeks ORDER BY week_start")]
+
+    def week_tracks(self, week_start: str) -> List[Dict]:
+        """A week's tracks in display order, shaped like the automation's track dicts"""
+        with self._lock:
+            rows = self._db.execute(
+                """SELECT t.track_key, t.name, t.artist, t.album, a.popularity, t.album_art_url,
+                          t.spotify_url, a.playlist_source
+                   FROM appearances a JOIN tracks t ON t.id = a.track_id
+                   WHERE a.week_start = ? ORDER BY a.position""",
+                (week_start,)
+            ).fetchall()
+        tracks = []
+        for row in rows:
+            track = dict(row, week_start=week_start)
+            key = track.pop('track_key')
+            spotify_id = None if '|' in key else key
+            track = {'id': spotify_id, **track}
+            if not track['spotify_url'] and spotify_id:
+                track['spotify_url'] = f"{SPOTIFY_TRACK_URL}{spotify_id}"
+            tracks.append(track)
+        return tracks
+
+    def weeks_featuring(self, artist: str) -> List[Dict]:
+        """
+        Every week an artist appeared, with their tracks
+
+        Args:
+            artist: Artist name (case-insensitive); matches any credited artist of a track
+
+        Returns:
+            [{'week_start', 'position', 'name', 'artist', 'popularity'}] by week
+        """
+        with self._lock:
+            rows = self._db.execute(
+                """SELECT a.week_start, a.position, t.name, t.artist, a.popularity
+                   FROM track_artists ta
+                   JOIN appearances a ON a.track_id = ta.track_id
+                   JOIN tracks t ON t.id = ta.track_id
+                   WHERE ta.artist = ? ORDER BY a.week_start, a.position""",
+                (artist.strip(),)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def popularity_history(self, track: str) -> List[Dict]:
+        """
+        Popularity of a track in every week it appeared
+
+        Args:
+            track: Spotify track ID or track name (case-insensitive)
+
+        Returns:
+            [{'week_start', 'position', 'popularity', 'name', 'artist'}] by week
+        """
+        with self._lock:
+            rows = self._db.execute(
+                """SELECT a.week_start, a.position, a.popularity, t.name, t.artist
+                   FROM tracks t JOIN appearances a ON a.track_id = t.id
+                   WHERE t.track_key = ?1 OR t.name = ?1 ORDER BY a.week_start""",
+                (track.strip(),)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def archive_tracks(week_start: str, tracks: List[Dict], output_dir: str = SpotifyConfig.OUTPUT_DIR,
+                   run: Optional[str] = None) -> bool:
+    """
+    Add a saved week to the output directory's archive
+
+    Failures are logged rather than raised so archiving never fails a run.
+
+    Returns:
+        Whether the week was archived
+    """
+    try:
+        with TrackArchive.for_output_dir(output_dir) as archive:
+            archive.archive_week(week_start, tracks, run)
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ Could not archive the tracks of {week_start}: {e}")
+        return False
+
+
+def iter_data_files(output_dir: str) -> Iterator[Tuple[str, str, List[Dict]]]:
+    """
+    Tracks of the latest nmf_data_*.json of every week in an output directory
+
+    Files that cannot be read are logged and skipped.
+
+    Yields:
+        (week_start, path, tracks), oldest week first
+    """
+    from backfill import data_files_by_week
+    from cover_batch import load_tracks_from_file
+
+    for week, path in sorted(data_files_by_week(output_dir).items()):
+        try:
+            tracks = load_tracks_from_file(path)
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"⚠️ Could not read {path}, not archiving week {week}: {e}")
+            continue
+        yield week, path, tracks
+
+
+def import_data_files(archive: TrackArchive, output_dir: str, skip_archived: bool = False) -> int:
+    """
+    Archive the latest nmf_data_*.json of every week in an output directory
+
+    Args:
+        archive: Archive to add the weeks to
+        output_dir: Directory holding the nmf_data_*.json files
+        skip_archived: Leave weeks that are already archived as they are
+
+    Returns:
+        Number of weeks archived
+    """
+    skipped = set(archive.weeks()) if skip_archived else set()
+    archived = 0
+    for week, path, tracks in iter_data_files(output_dir):
+        if week not in skipped:
+            archive.archive_week(week, tracks, run=os.path.basename(path))
+            archived += 1
+    return archived
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Archive weekly track data and query it across weeks")
+    parser.add_argument('--output-dir', default=SpotifyConfig.OUTPUT_DIR, help="Output directory (default: output)")
+    parser.add_argument('--import', dest='import_files', action='store_true',
+                        help="Archive the latest nmf_data_*.json of every week")
+    parser.add_argument('--artist', help="List the weeks featuring an artist")
+    parser.add_argument('--track', help="Show the popularity history of a track (name or Spotify ID)")
+    args = parser.parse_args()
+
+    with TrackArchive.for_output_dir(args.output_dir) as archive:
+        if args.import_files:
+            weeks = import_data_files(archive, args.output_dir)
+            print(f"🗄️ Archived {weeks} weeks to {archive.path} ({os.path.getsize(archive.path) / 1024:.0f}KB)")
+        if args.artist:
+            rows = archive.weeks_featuring(args.artist)
+            print(f"🎤 {args.artist}: {len({row['week_start'] for row in rows})} weeks")
+            for row in rows:
+                print(f"   {row['week_start']}  #{row['position']:<2} {row['name']} - {row['artist']} ({row['popularity']})")
+        if args.track:
+            rows = archive.popularity_history(args.track)
+            print(f"📈 {args.track}: {len(rows)} weeks")
+            for row in rows:
+                print(f"   {row['week_start']}  #{row['position']:<2} popularity {row['popularity']}")
+        if not (args.import_files or args.artist or args.track):
+            print(f"🗄️ {len(archive.weeks())} weeks archived in {archive.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""
+Cached tracklist template
+The red title band, footer and logo of a tracklist are the same for every
+render of a week, so they are drawn once per (subtitle, title) and each render
+only draws its track rows onto a copy of the cached base
+"""
+
+import logging
+import os
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from PIL import Image, ImageDraw
+
+from brand_fonts import load_font_prefer_helvetica
+from config import SpotifyConfig
+
+logger = logging.getLogger(__name__)
+
+LOGO_PATH = os.path.join(os.path.dirname(__file__), '..', '..', '..', 'public', 'tlogo.png')
+
+# Same red as "NEW" on the artist image
+BRAND_RED = (226, 62, 54)
+TITLE_HEIGHT = 120
+FOOTER_TEXT = "Suave's new music friday recap"
+LOGO_HEIGHT = 48
+LOGO_MARGIN = 40
+LOGO_PADDING = 10
+
+# Track rows: left edge of the number, left edge of the text, vertical pitch and right margin
+ROW_MARGIN = 50
+ROW_TEXT_X = ROW_MARGIN + 50
+ROW_TOP = TITLE_HEIGHT + 50
+ROW_HEIGHT = 85
+NUMBER_SIZE = 38
+ELLIPSIS = "..."
+
+# Font sizes tried for each line of a row, largest first; text that does not fit the smallest is truncated
+TRACK_NAME_SIZES = (38, 34, 32, 28)
+ARTIST_SIZES = (28, 26, 24, 22)
+
+SMART_QUOTES = str.maketrans({'\u201c': '"', '\u201d': '"', '\u2018': "'", '\u2019': "'"})
+
+
+class TrackRow(NamedTuple):
+    """Laid-out tracklist row: text, fonts and positions"""
+    number: str
+    number_xy: Tuple[int, int]
+    name: str
+    name_font: object
+    name_xy: Tuple[int, int]
+    artist: str
+    artist_font: object
+    artist_xy: Tuple[int, int]
+
+
+@lru_cache(maxsize=8192)
+def text_width(text: str, size: int) -> float:
+    """Advance width of text in the brand font, measured once per (text, size)"""
+    return load_font_prefer_helvetica(size).getlength(text)
+
+
+def fit_text(text: str, sizes: Sequence[int], max_width: float) -> Tuple[str, int]:
+    """
+    Fit text into a width using the largest size that holds it
+
+    Args:
+        text: Text to fit
+        sizes: Candidate font sizes, largest first
+        max_width: Available width in pixels
+
+    Returns:
+        (text, size): the text at the largest size that fits, or the smallest size
+        with the text cut at the longest prefix that fits with an ellipsis
+    """
+    for size in sizes:
+        if text_width(text, size) <= max_width:
+            return text, size
+
+    size = sizes[-1]
+    # Binary search for the longest prefix that still fits with the ellipsis
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if text_width(text[:middle].rstrip() + ELLIPSIS, size) <= max_width:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low].rstrip() + ELLIPSIS, size
+
+
+def week_subtitle(week_start: Optional[str] = None) -> str:
+    """
+    Second header line naming the week
+
+    Args:
+        week_start: Week start date (YYYY-MM-DD); the most recent Friday if missing or invalid
+
+    Returns:
+        e.g. "New Music Friday - October 10, 2025"
+    """
+    try:
+        friday_date = datetime.strptime(week_start, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        today = datetime.now()
+        days_since_friday = (today.weekday() - 4) % 7  # 4 = Friday (0=Monday, 4=Friday)
+        friday_date = today - timedelta(days=days_since_friday)
+    return f"New Music Friday - {friday_date.strftime('%B %d, %Y')}"
+
+
+@lru_cache(maxsize=None)
+def load_logo(height: int) -> Optional[Image.Image]:
+    """The brand logo scaled to a height, loaded and resized once per process"""
+    try:
+        logo = Image.open(LOGO_PATH)
+        if logo.mode != 'RGBA':
+            logo = logo.convert('RGBA')
+        width = int(height * (logo.width / logo.height))
+        return logo.resize((width, height), Image.Resampling.LANCZOS)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not load logo from {LOGO_PATH}: {e}. Skipping logo branding.")
+        return None
+
+
+class TracklistTemplate:
+    """Pre-rendered header, footer and logo of a week's tracklist"""
+
+    def __init__(self, subtitle: str, title: str = "New Music Out Now"):
+        """
+        Render the parts of the tracklist that do not depend on the tracks
+
+        Args:
+            subtitle: Second header line, e.g. "New Music Friday - October 10, 2025"
+            title: First header line
+        """
+        canvas_width, canvas_height = SpotifyConfig.CANVAS_SIZE
+        self.size = SpotifyConfig.CANVAS_SIZE
+        self.base = Image.new('RGB', self.size, SpotifyConfig.SPOTIFY_BLACK)
+        draw = ImageDraw.Draw(self.base)
+        title_font = load_font_prefer_helvetica(50)
+        small_font = load_font_prefer_helvetica(28)
+
+        draw.rectangle([0, 0, canvas_width, TITLE_HEIGHT], fill=BRAND_RED)
+        title_width = self._text_width(draw, title, title_font)
+        draw.text(((canvas_width - title_width) // 2, 15), title, fill=SpotifyConfig.SPOTIFY_WHITE, font=title_font)
+        subtitle_width = self._text_width(draw, subtitle, small_font)
+        draw.text(((canvas_width - subtitle_width) // 2, 70), subtitle, fill=SpotifyConfig.SPOTIFY_WHITE, font=small_font)
+
+        footer_width = self._text_width(draw, FOOTER_TEXT, small_font)
+        draw.text(((canvas_width - footer_width) // 2, canvas_height - 40), FOOTER_TEXT,
+                  fill=SpotifyConfig.SPOTIFY_GRAY, font=small_font)
+
+        # The logo sits on a black plate drawn over the rows, so it is kept as a patch to paste back after them
+        self.logo_patch: Optional[Tuple[Image.Image, Tuple[int, int]]] = None
+        logo = load_logo(LOGO_HEIGHT)
+        if logo is not None:
+            logo_x = canvas_width - logo.width - LOGO_MARGIN
+            logo_y = canvas_height - LOGO_HEIGHT - LOGO_MARGIN
+            plate = [logo_x - LOGO_PADDING, logo_y - LOGO_PADDING,
+                     logo_x + logo.width + LOGO_PADDING, logo_y + LOGO_HEIGHT + LOGO_PADDING]
+            draw.rectangle(plate, fill=(0, 0, 0))
+            self.base.paste(logo, (logo_x, logo_y), logo)
+            # rectangle() includes its end coordinates, crop() does not
+            self.logo_patch = (self.base.crop((plate[0], plate[1], plate[2] + 1, plate[3] + 1)), (plate[0], plate[1]))
+
+    @staticmethod
+    def _text_width(draw: ImageDraw.ImageDraw, text: str, font) -> int:
+        bbox = draw.textbbox((0, 0), text, font=font)
+        return bbox[2] - bbox[0]
+
+    def row_width(self, top: int, bottom: int) -> int:
+        """Width available to row text between two y coordinates, stopping short of the logo plate"""
+        right = self.size[0] - ROW_MARGIN
+        if self.logo_patch is not None:
+            patch, (plate_x, plate_y) = self.logo_patch
+            if top < plate_y + patch.height and bottom > plate_y:
+                right = min(right, plate_x - LOGO_PADDING)
+        return right - ROW_TEXT_X
+
+    def layout_rows(self, tracks: List[Dict], first_number: int = 1) -> List[TrackRow]:
+        """
+        Lay out the track rows in one pass
+
+        Each line gets the largest size that fits its measured width; fonts come
+        from the shared per-size cache, so all rows reuse the same font objects.
+
+        Args:
+            tracks: Tracks in display order (at most ten fit the canvas)
+            first_number: Number shown on the first row, for tracklists split over several pages
+
+        Returns:
+            One TrackRow per track
+        """
+        rows = []
+        for i, track in enumerate(tracks):
+            row_y = ROW_TOP + i * ROW_HEIGHT
+            name_y = row_y + 5
+
+            name = (track.get('name') or '').translate(SMART_QUOTES)
+            name, name_size = fit_text(name, TRACK_NAME_SIZES, self.row_width(name_y, name_y + TRACK_NAME_SIZES[0]))
+            name_font = load_font_prefer_helvetica(name_size)
+            name_bbox = name_font.getbbox(name)
+            artist_y = name_y + (name_bbox[3] - name_bbox[1]) + 8
+
+            artist = (track.get('artist') or '').translate(SMART_QUOTES)
+            artist, artist_size = fit_text(artist, ARTIST_SIZES, self.row_width(artist_y, artist_y + ARTIST_SIZES[0]))
+
+            rows.append(TrackRow(
+                number=f"{first_number + i:2d}.",
+                number_xy=(ROW_MARGIN, row_y),
+                name=name,
+                name_font=name_font,
+                name_xy=(ROW_TEXT_X, name_y),
+                artist=artist,
+                artist_font=load_font_prefer_helvetica(artist_size),
+                artist_xy=(ROW_TEXT_X, artist_y)
+            ))
+        return rows
+
+    def draw_rows(self, canvas: Image.Image, rows: List[TrackRow]) -> None:
+        """Draw laid-out rows onto a canvas from new_canvas()"""
+        draw = ImageDraw.Draw(canvas)
+        number_font = load_font_prefer_helvetica(NUMBER_SIZE)
+        for row in rows:
+            draw.text(row.number_xy, row.number, fill=SpotifyConfig.SPOTIFY_GRAY, font=number_font)
+            draw.text(row.name_xy, row.name, fill=SpotifyConfig.SPOTIFY_WHITE, font=row.name_font)
+            draw.text(row.artist_xy, row.artist, fill=SpotifyConfig.SPOTIFY_GRAY, font=row.artist_font)
+
+    def new_canvas(self) -> Image.Image:
+        """A copy of the base to draw track rows on"""
+        return self.base.copy()
+
+    def finish(self, canvas: Image.Image) -> Image.Image:
+        """Restore the logo over anything the rows drew beneath it"""
+        if self.logo_patch is not None:
+            patch, position = self.logo_patch
+            canvas.paste(patch, position)
+        return canvas
+
+
+@lru_cache(maxsize=8)
+def get_tracklist_template(subtitle: str, title: str = "New Music Out Now") -> TracklistTemplate:
+    """Cached template for a week's subtitle and title"""
+    return TracklistTemplate(subtitle, title)
@@ -0,0 +1,109 @@
+import { createClient } from '@supabase/supabase-js'
+import { spawn } from 'child_process'
+import { join } from 'path'
+
+// Lazy Supabase client to avoid module-level errors
+let supabaseInstance = null
+function getSupabase() {
+    if (!supabaseInstance) {
+        const supabaseUrl = process.env.NEXT_PUBLIC_SUPABASE_URL
+        const supabaseKey = process.env.SUPABASE_SERVICE_KEY
+        if (!supabaseUrl || !supabaseKey) {
+            throw new Error('Missing Supabase environment variables')
+        }
+        supabaseInstance = createClient(supabaseUrl, supabaseKey)
+    }
+    return supabaseInstance
+}
+
+export const config = {
+  api: {
+    responseLimit: false,
+  },
+}
+
+/**
+ * Streams a week's caption as it is generated
+ * Relays the JSON lines written by `caption_generator.py --stream`:
+ *   {"type": "token", "text": "..."} as the caption is written
+ *   {"type": "done", "caption": "...", "hashtags": [...], ...} once it is complete
+ * The finished caption is saved to the week's images row like generate-caption does.
+ */
+export default async function handler(req, res) {
+  if (req.method !== 'POST') {
+    return res.status(405).json({ error: 'Method not allowed' })
+  }
+
+  const { week_start, regenerate = false } = req.body
+  if (!week_start || !/^\d{4}-\d{2}-\d{2}$/.test(week_start)) {
+    return res.status(400).json({ error: 'week_start (YYYY-MM-DD) is required' })
+  }
+
+  const args = [join(process.cwd(), 'pages', 'api', 'spotify_api', 'caption_generator.py'), '--week', week_start, '--stream']
+  if (regenerate) {
+    args.push('--no-cache')
+  }
+  const child = spawn('python3', args, { cwd: join(process.cwd(), 'pages', 'api', 'spotify_api') })
+
+  res.writeHead(200, {
+    'Content-Type': 'application/x-ndjson; charset=utf-8',
+    'Cache-Control': 'no-cache, no-transform',
+    'X-Accel-Buffering': 'no'
+  })
+
+  // Stop generating if the dashboard goes away before the response is finished
+  res.on('close', () => {
+    if (!res.writableEnded) child.kill()
+  })
+
+  let buffered = ''
+  let result = null
+  child.stdout.setEncoding('utf8')
+  child.stdout.on('data', (chunk) => {
+    buffered += chunk
+    const lines = buffered.split('\n')
+    buffered = lines.pop()
+    for (const line of lines) {
+      if (!line.trim()) continue
+      try {
+        const event = JSON.parse(line)
+        if (event.type === 'done') {
+          result = event
+        }
+        res.write(line + '\n')
+      } catch (error) {
+        console.error('Ignoring malformed caption stream line:', line)
+      }
+    }
+  })
+  child.stderr.on('data', (chunk) => console.error(chunk.toString()))
+
+  child.on('close', async (code) => {
+    if (!result) {
+      res.write(JSON.stringify({ type: 'error', error: `Caption generation failed (exit code ${code})` }) + '\n')
+      return res.end()
+    }
+
+    try {
+      const { error: updateError } = await getSupabase()
+        .from('images')
+        .upsert({
+          week_start: week_start,
+          caption: result.caption,
+          hashtags: result.hashtags,
+          caption_style: result.style,
+          updated_at: new Date().toISOString()
+        }, {
+          onConflict: 'week_start'
+        })
+      if (updateError) {
+        console.error('Error saving streamed caption:', updateError)
+        res.write(JSON.stringify({ type: 'error', error: 'Failed to save caption' }) + '\n')
+      }
+    } catch (error) {
+      console.error('Error saving streamed caption:', error)
+      res.write(JSON.stringify({ type: 'error', error: 'Failed to save caption' }) + '\n')
+    }
+    res.end()
+  })
+}
@@ -0,0 +1,10 @@
+-- Migration: Add cover_set column to images table
+-- Stores the pre-rendered cover of every candidate track of the week, so choosing
+-- a different cover track is a lookup instead of a new render
+
+-- Add column for the keyed cover set ({spotify_track_id: public_url})
+ALTER TABLE images
+ADD COLUMN IF NOT EXISTS cover_set JSONB;
+
+-- Add comment for documentation
+COMMENT ON COLUMN images.cover_set IS 'Pre-rendered cover image URL per candidate track, keyed by Spotify track ID';
@@ -0,0 +1,10 @@
+-- Migration: Add carousel_urls column to images table
+-- Stores the slides of the week's multi-slide Instagram post (cover, tracklist
+-- pages and artist cards) in posting order
+
+-- Add column for the ordered slide URLs
+ALTER TABLE images
+ADD COLUMN IF NOT EXISTS carousel_urls JSONB;
+
+-- Add comment for documentation
+COMMENT ON COLUMN images.carousel_urls IS 'Carousel slide image URLs in posting order';
@@ -0,0 +1,10 @@
+-- Migration: Add caption_variants column to images table
+-- Stores a caption in every style (emoji_heavy, minimal, review_style, balanced),
+-- generated together in one request, so the admin can compare them side by side
+
+-- Add column for the variants ({variants: {style: {caption, character_count, method}}, hashtags, generated_at, method})
+ALTER TABLE images
+ADD COLUMN IF NOT EXISTS caption_variants JSONB;
+
+-- Add comment for documentation
+COMMENT ON COLUMN images.caption_variants IS 'Caption per style plus shared hashtags, generated in one batched request';